@@ -6,6 +6,14 @@
 
 """Command line script listing all available Jira projects"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 import json
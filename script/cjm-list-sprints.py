@@ -6,17 +6,25 @@
 
 """Command line script listing all sprints related to given board"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 import json
 
 # Third party imports
-import dateutil.parser
 import tabulate
 
 # Project imports
 import cjm
 import cjm.cfg
+import cjm.dates
 import cjm.request
 
 DEFAULT_FILE = ".cjm.json"
@@ -70,15 +78,15 @@ def main(options):
                     "name": sprint["name"],
                     "state": sprint["state"],
                     "start_date": (
-                        dateutil.parser.parse(sprint["startDate"]).date().isoformat()
+                        cjm.dates.parse_date(sprint["startDate"]).isoformat()
                         if "startDate" in sprint
                         else None),
                     "end_date": (
-                        dateutil.parser.parse(sprint["endDate"]).date().isoformat()
+                        cjm.dates.parse_date(sprint["endDate"]).isoformat()
                         if "endDate" in sprint
                         else None),
                     "complete_date": (
-                        dateutil.parser.parse(sprint["completeDate"]).date().isoformat()
+                        cjm.dates.parse_date(sprint["completeDate"]).isoformat()
                         if "completeDate" in sprint
                         else None)
                 }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script pulling the jira data needed by the sprint scripts into the local issue
+store"""
+
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
+# Standard library imports
+import concurrent.futures
+import json
+import sys
+import time
+
+# Third party imports
+import tabulate
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.codes
+import cjm.data
+import cjm.issue
+import cjm.project
+import cjm.run
+import cjm.schema
+import cjm.store
+import cjm.team
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    parser.add_argument(
+        "sprint_file", action="store",
+        help=(
+            "Path to the json sprint data file as generated by the {0:s} script and described by"
+            " the {1:s} schema"
+            "".format(cjm.SM_CREATE_SPRINT_FILE, cjm.schema.make_subpath("sprint.json"))))
+    parser.add_argument(
+        "--full", action="store_true", dest="full",
+        help="Request all the project issues instead of these updated since the last sync")
+
+    return parser.parse_args(args)
+
+
+def _timed(callback):
+    """Make a callback returning the result of given callback together with its execution time"""
+    def __timed_cb():
+        started_at = time.time()
+        result = callback()
+        return result, time.time() - started_at
+
+    return __timed_cb
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    sprint_data = cjm.data.load(cfg, options.sprint_file, "sprint.json")
+
+    cfg["sprint"]["id"] = sprint_data.get("id")
+    cfg["project"]["key"] = sprint_data["project"]["key"]
+
+    if not cjm.store.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The issue store path is not specified. Use the '--store' CLI option or the"
+            " defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
+    # The field ids are needed to store the issues, so the fields go first:
+
+    fields, fields_time = _timed(lambda: cjm.issue.request_fields(cfg, refresh=True))()
+    cjm.store.make_field_list(cfg)
+
+    # The issues (including their comments, comment tags and sprint membership) and the other
+    #  resources are requested concurrently:
+
+    tasks = (
+        ("issues", lambda: cjm.store.sync_project(cfg, full=options.full)),
+        ("project", lambda: cjm.project.request_project_by_key(
+            cfg, cfg["project"]["key"], refresh=True)),
+        ("current user", lambda: cjm.team.request_current_user(cfg, refresh=True)),
+        ("users", lambda: cjm.team.request_users(cfg, refresh=True)))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = [executor.submit(_timed(t)) for _, t in tasks]
+        results = [("fields", fields, fields_time)] + [
+            (n, *f.result()) for (n, _), f in zip(tasks, futures)]
+
+    def __count(result):
+        if isinstance(result, int):
+            return result
+        if isinstance(result, list):
+            return len(result)
+        return 1
+
+    summary = [{"resource": n, "count": __count(r), "time": t} for n, r, t in results]
+
+    if options.json_output:
+        print(json.dumps(summary, indent=4, sort_keys=False))
+    else:
+        print(tabulate.tabulate(
+            [(s["resource"], s["count"], "{0:.2f}s".format(s["time"])) for s in summary],
+            headers=["Resource", "Count", "Time"], tablefmt="orgtbl"))
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
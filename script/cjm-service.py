@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script running the cjm service executing the other scripts with warm caches"""
+
+# Standard library imports
+import sys
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.client
+import cjm.codes
+import cjm.run
+import cjm.service
+
+
+def parse_options(args):
+    """Parse command line options"""
+    defaults = cjm.cfg.load_defaults()
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    default_socket_path = cjm.client.get_socket_path()
+
+    parser.add_argument(
+        "--socket", action="store", metavar="PATH", dest="socket_path",
+        default=default_socket_path,
+        help=(
+            "PATH of the Unix socket the service listens on. The scripts delegate their runs to"
+            " the service if the socket path is specified by the {0:s} environment variable or"
+            " the service.socket entry of the defaults file{1:s}"
+            "".format(cjm.client.SOCKET_ENV_VAR, cjm.cfg.fmt_dft(default_socket_path))))
+    parser.add_argument(
+        "--no-preload", action="store_false", dest="preload",
+        help="Load the scripts on their first run instead of the service start")
+
+    return parser.parse_args(args)
+
+
+def main(options):
+    """Entry function"""
+    if options.socket_path is None:
+        sys.stderr.write(
+            "ERROR: The service socket path is not specified. Use the '--socket' CLI option, the"
+            " {0:s} environment variable or the defaults file to specify it\n"
+            "".format(cjm.client.SOCKET_ENV_VAR))
+        return cjm.codes.CONFIGURATION_ERROR
+
+    print("Serving on {0:s} (press Ctrl+C to stop)".format(options.socket_path))
+    sys.stdout.flush()
+
+    try:
+        cjm.service.serve(options.socket_path, preload=options.preload)
+    except KeyboardInterrupt:
+        pass
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run(main, parse_options(sys.argv[1:]))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script synchronizing the local issue store with jira"""
+
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
+# Standard library imports
+import sys
+import time
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.codes
+import cjm.run
+import cjm.store
+
+
+_PROJECT_KEY_ARG_NAME = "--project-key"
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    default_project_key = defaults.get("project", {}).get("key")
+
+    parser.add_argument(
+        _PROJECT_KEY_ARG_NAME, action="store", metavar="KEY", dest="project_key",
+        default=default_project_key,
+        help=(
+            "KEY of the project to be synchronized{0:s}"
+            "".format(cjm.cfg.fmt_dft(default_project_key))))
+    parser.add_argument(
+        "--full", action="store_true", dest="full",
+        help="Request all the project issues instead of these updated since the last sync")
+
+    return parser.parse_args(args)
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+    cfg["project"]["key"] = options.project_key
+
+    if cfg["project"]["key"] is None:
+        sys.stderr.write(
+            "ERROR: The project key is not specified. Use the '{0:s}' CLI option or the defaults"
+            " file to specify it\n".format(_PROJECT_KEY_ARG_NAME))
+        return cjm.codes.CONFIGURATION_ERROR
+
+    if not cjm.store.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The issue store path is not specified. Use the '--store' CLI option or the"
+            " defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
+    started_at = time.time()
+    issue_count = cjm.store.sync_project(cfg, full=options.full)
+
+    print(
+        "Synchronized {0:d} issue(s) of the {1:s} project in {2:.2f}s"
+        "".format(issue_count, cfg["project"]["key"], time.time() - started_at))
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == '__main__':
+    cjm.run.run_2(main, parse_options)
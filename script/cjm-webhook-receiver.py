@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script receiving jira webhook events and applying them to the local issue store"""
+
+# Standard library imports
+import http.server
+import json
+import sys
+
+# Third party imports
+import requests
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.codes
+import cjm.run
+import cjm.store
+import cjm.webhook
+
+
+# Number of seconds the --send request waits for the receiver:
+_SEND_TIMEOUT = 30
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    default_address = defaults.get("webhook", {}).get("address", "127.0.0.1")
+    default_port = defaults.get("webhook", {}).get("port", 8765)
+    default_secret = defaults.get("webhook", {}).get("secret")
+
+    parser.add_argument(
+        "--address", action="store", metavar="ADDRESS", dest="address",
+        default=default_address,
+        help="ADDRESS the receiver listens on{0:s}".format(cjm.cfg.fmt_dft(default_address)))
+    parser.add_argument(
+        "--port", action="store", type=int, metavar="NUMBER", dest="port",
+        default=default_port,
+        help="Port NUMBER the receiver listens on{0:s}".format(cjm.cfg.fmt_dft(default_port)))
+    parser.add_argument(
+        "--secret", action="store", metavar="VALUE", dest="secret",
+        default=default_secret,
+        help=(
+            "Webhook secret used to verify the {0:s} header of the received events (events are"
+            " not verified if not specified){1:s}".format(
+                cjm.webhook.SIGNATURE_HEADER, cjm.cfg.fmt_dft_token(default_secret))))
+    parser.add_argument(
+        "--send", action="store", metavar="PATH", dest="send_file_path",
+        help=(
+            "Instead of receiving events, send the event payload read from the json file PATH to"
+            " the receiver (a stand-in for jira when testing)"))
+
+    return parser.parse_args(args)
+
+
+def _make_request_handler(cfg, conn, options):
+    """Create the http request handler class applying the received events to the store"""
+
+    class _RequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):  # pylint: disable=invalid-name
+            """Handle single webhook event"""
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            if options.secret is not None and not cjm.webhook.verify_signature(
+                    options.secret, body, self.headers.get(cjm.webhook.SIGNATURE_HEADER)):
+                self.send_error(403, "Invalid signature")
+                return
+
+            try:
+                summary = cjm.webhook.apply_event(cfg, conn, json.loads(body.decode("utf-8")))
+            except (KeyError, TypeError, ValueError) as e:
+                sys.stderr.write("WARNING: Malformed webhook event ignored ({0})\n".format(e))
+                self.send_error(400, "Malformed event")
+                return
+
+            if summary is not None:
+                print(json.dumps(summary, sort_keys=True))
+                sys.stdout.flush()
+
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            if options.verbose:
+                super().log_message(format, *args)
+
+    return _RequestHandler
+
+
+def _send_event(options):
+    """Send the event payload file to the receiver"""
+    try:
+        with open(options.send_file_path, "rb") as payload_file:
+            body = payload_file.read()
+    except IOError as e:
+        sys.stderr.write(
+            "ERROR: Event payload file ('{0:s}') I/O error\n".format(options.send_file_path))
+        sys.stderr.write("    {0}\n".format(e))
+        return cjm.codes.FILESYSTEM_ERROR
+
+    headers = {"Content-Type": "application/json"}
+
+    if options.secret is not None:
+        headers[cjm.webhook.SIGNATURE_HEADER] = cjm.webhook.make_signature(options.secret, body)
+
+    response = requests.post(
+        "http://{0:s}:{1:d}/".format(options.address, options.port), data=body, headers=headers,
+        timeout=_SEND_TIMEOUT)
+
+    print("Receiver response: {0:d}".format(response.status_code))
+
+    return cjm.codes.NO_ERROR if response.ok else cjm.codes.REQUEST_ERROR
+
+
+def main(options, defaults):
+    """Entry function"""
+    if options.send_file_path is not None:
+        return _send_event(options)
+
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    if not cjm.store.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The issue store path is not specified. Use the '--store' CLI option or the"
+            " defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
+    # Determine the story points and sprint field ids used to store the issues:
+    cjm.store.make_field_list(cfg)
+
+    conn = cjm.store.connect(cfg)
+
+    # The events keep the synchronized projects fresh (see cjm.webhook.apply_event), provided no
+    #  change made before the receiver start is missing:
+    for project_key in cjm.store.list_synced_projects(conn):
+        issue_count = cjm.store.sync_project(
+            {**cfg, "project": {**cfg["project"], "key": project_key}})
+        print("Synchronized {0:d} issue(s) of the {1:s} project".format(issue_count, project_key))
+    server = http.server.HTTPServer(
+        (options.address, options.port), _make_request_handler(cfg, conn, options))
+
+    print("Receiving events on {0:s}:{1:d} (press Ctrl+C to stop)".format(
+        options.address, options.port))
+    sys.stdout.flush()
+
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
@@ -5,7 +5,10 @@
 
 SM_CREATE_CAPACITY_FILE = "sm-create-capacity-file.py"
 SM_CREATE_COMMITMENT_FILE = "sm-create-commitment-file.py"
+SM_CREATE_DELIVERY_FILE = "sm-create-delivery-file.py"
 SM_CREATE_SPRINT_FILE = "sm-create-sprint-file.py"
 SM_CREATE_TASKS_FILE = "sm-create-tasks-file.py"
 SM_CREATE_TEAM_FILE = "sm-create-team-file.py"
 SM_CREATE_GENERATE_DELIVERY_REPORT = "sm-generate-delivery-report.py"
+SM_GENERATE_CAPACITY_REPORT = "sm-generate-capacity-report.py"
+SM_GENERATE_COMMITMENT_REPORT = "sm-generate-commitment-report.py"
@@ -0,0 +1,364 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Historical sprint data analytics
+
+The capacity, commitment and delivery data files of every sprint are reduced to a sprint record:
+the per-person capacity and story point sums stored as arrays (columns). The records are cached,
+if the cache directory path is configured, so the data files are only parsed again when they
+change. The records of all the sprints are combined to the people x sprints matrices the velocity
+and ratio trends are computed from
+
+The unassigned issues are accounted to the person with the empty account id, so the team values
+are the sums over all the people
+
+The delivery forecast is a Monte Carlo simulation: the story points committed by every person are
+multiplied by delivery ratios (delivered to committed story points) drawn from the past sprints of
+the person, many times over, and the percentiles of the results are reported"""
+
+# Standard library imports
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+# Third party imports
+import numpy
+
+# Project imports
+import cjm.capacity
+import cjm.data
+import cjm.dates
+import cjm.issue
+import cjm.sprint
+import cjm.team
+
+# Columns of the sprint records: the sprint capacity, the commitment (story points of the issues
+#  in the commitment file) and the committed and delivered story points of the delivery file. The
+#  values of a missing data file are NaN:
+COLUMNS = ("capacity", "commitment", "committed", "delivered")
+
+UNASSIGNED_ID = ""
+
+_CACHE_VERSION = 1
+_DATA_VARIANTS = ("capacity", "commitment", "delivery")
+
+
+def _make_data_paths(cfg, sprint_path, sprint_data):
+    """Determine the data file paths of given sprint. Relative paths are relative to the sprint data
+    file directory. The data file paths of cfg are ignored as they refer to a single sprint"""
+    cfg = {**cfg, "path": {**cfg["path"], **{v: None for v in _DATA_VARIANTS}}}
+    cjm.sprint.apply_data_file_paths(cfg, sprint_data)
+
+    return {
+        v: os.path.join(os.path.dirname(os.path.abspath(sprint_path)), cfg["path"][v])
+        for v in _DATA_VARIANTS}
+
+
+def _make_cache_path(cfg, sprint_path, data_paths):
+    """Make the cache file path of the record of given sprint. The file name is derived from the
+    paths, sizes and modification times of the sprint data files, so a changed file is never
+    served from the cache"""
+    def __stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [path, stat.st_size, stat.st_mtime_ns]
+
+    key = json.dumps(
+        [_CACHE_VERSION, __stat(os.path.abspath(sprint_path))] +
+        [__stat(data_paths[v]) for v in _DATA_VARIANTS])
+
+    return os.path.join(
+        cfg["path"]["analytics"], "{0:s}.npz".format(hashlib.sha256(key.encode()).hexdigest()))
+
+
+def _read_cache(cache_path):
+    try:
+        with numpy.load(cache_path, allow_pickle=False) as arrays:
+            return {k: arrays[k] for k in arrays.files}
+    except (IOError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, record):
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Write to a temporary file first so concurrent runs never read a truncated file:
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(tmp_fd, "wb") as tmp_file:
+                numpy.savez(tmp_file, **record)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except IOError as e:
+        sys.stderr.write(
+            "WARNING: Sprint record cache file ('{0:s}') I/O error\n".format(cache_path))
+        sys.stderr.write("    {0}\n".format(e))
+
+
+def _reduce_sprint(cfg, sprint_data, data_paths):
+    """Reduce the data files of given sprint to the sprint record"""
+    values = {}     # Column name -> account id -> value
+    names = {}
+
+    if os.path.exists(data_paths["capacity"]):
+        capacity_data = cjm.data.load(cfg, data_paths["capacity"], "capacity.json")
+        people = cjm.capacity.process_person_capacity_list(sprint_data, capacity_data)
+        values["capacity"] = {p["account id"]: p["sprint capacity"] for p in people}
+        names.update((p["account id"], cjm.team.format_full_name(p)) for p in people)
+
+    if os.path.exists(data_paths["commitment"]):
+        commitment_data = cjm.data.load(cfg, data_paths["commitment"], "commitment.json")
+        issue_table = cjm.issue.IssueTable(commitment_data["issues"])
+        values["commitment"] = {
+            a: issue_table.person_total("story points", a) for a in issue_table.assignee_ids()}
+
+    if os.path.exists(data_paths["delivery"]):
+        delivery_data = cjm.data.load(cfg, data_paths["delivery"], "delivery.json")
+        issue_table = cjm.issue.IssueTable(delivery_data["issues"])
+        for column, key in (
+                ("committed", "committed story points"),
+                ("delivered", "delivered story points")):
+            values[column] = {
+                a: issue_table.person_total(key, a) for a in issue_table.assignee_ids()}
+
+    account_ids = sorted({UNASSIGNED_ID if a is None else a for v in values.values() for a in v})
+
+    record = {
+        "name": numpy.array(sprint_data["name"]),
+        "start date": numpy.array(sprint_data["start date"]),
+        "end date": numpy.array(sprint_data["end date"]),
+        "account ids": numpy.array(account_ids, dtype=str),
+        "names": numpy.array([names.get(a, "") for a in account_ids], dtype=str)
+    }
+
+    for column in COLUMNS:
+        if column in values:
+            column_values = {
+                UNASSIGNED_ID if a is None else a: v for a, v in values[column].items()}
+            record[column] = numpy.array(
+                [column_values.get(a, 0) for a in account_ids], dtype=float)
+        else:
+            record[column] = numpy.full(len(account_ids), numpy.nan)
+
+    return record
+
+
+def load_sprint_record(cfg, sprint_path):
+    """Load the record of the sprint described by given sprint data file. Return a dict of numpy
+    arrays: the sprint "name", "start date" and "end date" (0-d arrays), the "account ids" and the
+    full "names" of the people and one array per COLUMNS entry"""
+    sprint_data = cjm.data.load(cfg, sprint_path, "sprint.json")
+    data_paths = _make_data_paths(cfg, sprint_path, sprint_data)
+
+    if cfg["path"]["analytics"] is None:
+        return _reduce_sprint(cfg, sprint_data, data_paths)
+
+    cache_path = _make_cache_path(cfg, sprint_path, data_paths)
+    record = _read_cache(cache_path)
+
+    if record is None:
+        record = _reduce_sprint(cfg, sprint_data, data_paths)
+        _write_cache(cache_path, record)
+
+    return record
+
+
+def load_sprint_records(cfg, sprint_paths, jobs=1):
+    """Load the records of given sprints using up to given number of worker processes. Return
+    them sorted by the sprint start date"""
+    if jobs <= 1 or len(sprint_paths) <= 1:
+        records = [load_sprint_record(cfg, p) for p in sprint_paths]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            records = list(executor.map(
+                load_sprint_record, [cfg] * len(sprint_paths), sprint_paths,
+                chunksize=max(1, len(sprint_paths) // (jobs * 4))))
+
+    return sorted(records, key=lambda r: cjm.dates.parse_date(str(r["start date"])))
+
+
+def combine_sprint_records(records):
+    """Combine given sprint records to people x sprints matrices. Return a dict with the "sprints"
+    list (name, start date and end date of every sprint), the "account ids" and "names" arrays of
+    the people and one matrix per COLUMNS entry. The values of the people who don't take part in a
+    sprint are NaN"""
+    sizes = [len(r["account ids"]) for r in records]
+    account_ids, rows = numpy.unique(
+        numpy.concatenate([r["account ids"] for r in records] or [numpy.array([], dtype=str)]),
+        return_inverse=True)
+    cols = numpy.repeat(numpy.arange(len(records)), sizes)
+
+    # The latest known name of every person:
+    names = numpy.full(len(account_ids), "", dtype=object)
+    record_names = numpy.concatenate(
+        [r["names"] for r in records] or [numpy.array([], dtype=str)]).astype(object)
+    known = record_names != ""
+    names[rows[known]] = record_names[known]
+
+    result = {
+        "sprints": [
+            {"name": str(r["name"]), "start date": str(r["start date"]),
+             "end date": str(r["end date"])}
+            for r in records],
+        "account ids": account_ids,
+        "names": names
+    }
+
+    for column in COLUMNS:
+        matrix = numpy.full((len(account_ids), len(records)), numpy.nan)
+        matrix[rows, cols] = numpy.concatenate(
+            [r[column] for r in records] or [numpy.array([], dtype=float)])
+        result[column] = matrix
+
+    return result
+
+
+def _ratios(numerators, denominators):
+    """Return the percentage ratios of given arrays, NaN where the denominator is not positive"""
+    result = numpy.full(numpy.shape(numerators), numpy.nan)
+    numpy.divide(
+        numerators * 100, denominators, out=result,
+        where=numpy.nan_to_num(denominators) > 0)
+    return result
+
+
+def _moving_averages(matrix, window):
+    """Return the moving averages of the last window (or fewer) defined values of every row at
+    every column. NaN where no value is defined"""
+    defined = ~numpy.isnan(matrix)
+    zero = numpy.zeros((matrix.shape[0], 1))
+    sums = numpy.concatenate((zero, numpy.cumsum(numpy.where(defined, matrix, 0), axis=1)), axis=1)
+    counts = numpy.concatenate((zero, numpy.cumsum(defined, axis=1)), axis=1)
+    upper = numpy.arange(1, matrix.shape[1] + 1)
+    lower = numpy.maximum(upper - window, 0)
+
+    window_sums = sums[:, upper] - sums[:, lower]
+    window_counts = counts[:, upper] - counts[:, lower]
+
+    return numpy.divide(
+        window_sums, window_counts, out=numpy.full(matrix.shape, numpy.nan),
+        where=window_counts > 0)
+
+
+def _means(matrix):
+    """Return the means of the defined values of every row. NaN for the rows without them"""
+    counts = (~numpy.isnan(matrix)).sum(axis=1)
+    return numpy.divide(
+        numpy.nansum(matrix, axis=1), counts, out=numpy.full(len(matrix), numpy.nan),
+        where=counts > 0)
+
+
+def _slopes(matrix):
+    """Return the least squares slopes of the defined values of every row against the column
+    index. NaN for the rows with less than two defined values"""
+    defined = ~numpy.isnan(matrix)
+    x = numpy.where(defined, numpy.arange(matrix.shape[1]), 0)
+    y = numpy.where(defined, matrix, 0)
+    n = defined.sum(axis=1)
+    sx = x.sum(axis=1)
+    sy = y.sum(axis=1)
+    denominators = n * (x * x).sum(axis=1) - sx * sx
+
+    return numpy.divide(
+        n * (x * y).sum(axis=1) - sx * sy, denominators,
+        out=numpy.full(len(matrix), numpy.nan), where=denominators > 0)
+
+
+def compute_trends(table, window=3):
+    """Compute the velocity (delivered story points), commitment ratio (commitment to capacity)
+    and delivery ratio (delivered to committed story points) trends of the combined sprint
+    records (see combine_sprint_records, at least one sprint is needed). The recent velocity is
+    the average of the last window sprints. Return a dict with the "team" per sprint arrays and
+    the "people" per person (and sprint) arrays. The people arrays include the per person sums of
+    the record columns"""
+    def __team_sums(matrix):
+        # A team value is NaN only if nobody has it:
+        sums = numpy.nansum(matrix, axis=0)
+        sums[numpy.isnan(matrix).all(axis=0)] = numpy.nan
+        return sums
+
+    team = {c: __team_sums(table[c]) for c in COLUMNS}
+    team["velocity"] = team["delivered"]
+    team["velocity average"] = _moving_averages(team["velocity"][numpy.newaxis, :], window)[0]
+    team["velocity trend"] = _slopes(team["velocity"][numpy.newaxis, :])[0]
+    team["commitment ratio"] = _ratios(team["commitment"], team["capacity"])
+    team["delivery ratio"] = _ratios(team["delivered"], team["committed"])
+
+    velocity = table["delivered"]
+    velocity_averages = _moving_averages(velocity, window)
+    sums = {c: numpy.nansum(table[c], axis=1) for c in COLUMNS}
+
+    people = {
+        **sums,
+        "velocity": velocity,
+        "sprint count": (~numpy.isnan(velocity)).sum(axis=1),
+        "mean velocity": _means(velocity),
+        "recent velocity": velocity_averages[:, -1],
+        "velocity trend": _slopes(velocity),
+        "commitment ratio": _ratios(sums["commitment"], sums["capacity"]),
+        "delivery ratio": _ratios(sums["delivered"], sums["committed"])
+    }
+
+    return {"team": team, "people": people}
+
+
+def delivery_ratio_samples(table, account_ids):
+    """Return the past delivery ratios (delivered to committed story points, as fractions) of the
+    people with given account ids (None means the unassigned issues) taken from the combined sprint
+    records (see combine_sprint_records). The sprints without committed story points are skipped.
+    The people without such sprints get the team ratios"""
+    def __samples(delivered, committed):
+        defined = numpy.nan_to_num(committed) > 0
+        return delivered[defined] / committed[defined]
+
+    team_samples = __samples(
+        numpy.nansum(table["delivered"], axis=0), numpy.nansum(table["committed"], axis=0))
+    rows = {a: i for i, a in enumerate(table["account ids"].tolist())}
+
+    result = []
+
+    for account_id in account_ids:
+        row = rows.get(UNASSIGNED_ID if account_id is None else account_id)
+        samples = (
+            numpy.array([]) if row is None
+            else __samples(table["delivered"][row], table["committed"][row]))
+        result.append(samples if len(samples) else team_samples)
+
+    return result
+
+
+def forecast_delivery(ratio_samples, commitments, percentiles=(50, 15), runs=10000, rng=None):
+    """Simulate the delivery of given commitments (story points per person) runs times, drawing
+    the delivery ratio of every person and run from the person ratio_samples (see
+    delivery_ratio_samples) independently. Return a dict with the "people" (people x percentiles)
+    and "team" (percentiles) arrays of the delivered story point percentiles. A person without
+    ratio samples delivers nothing. The 15th percentile is the story points delivered with the
+    85% probability (P85)"""
+    rng = numpy.random.default_rng() if rng is None else rng
+    commitments = numpy.asarray(commitments, dtype=float)
+
+    # Pad the samples to a people x samples matrix, so all the draws are made at once:
+    counts = numpy.array([len(s) for s in ratio_samples], dtype=int)
+    samples = numpy.zeros((len(ratio_samples), max(max(counts.tolist(), default=0), 1)))
+    samples[numpy.arange(samples.shape[1]) < counts[:, numpy.newaxis]] = numpy.concatenate(
+        [numpy.asarray(s, dtype=float) for s in ratio_samples] + [numpy.array([])])
+
+    indices = (rng.random((len(ratio_samples), runs)) * counts[:, numpy.newaxis]).astype(int)
+    delivered = (
+        numpy.take_along_axis(samples, indices, axis=1) *
+        numpy.where(counts > 0, commitments, 0)[:, numpy.newaxis])
+
+    return {
+        "people": numpy.percentile(delivered, percentiles, axis=1).T.reshape(
+            len(ratio_samples), len(percentiles)),
+        "team": numpy.percentile(delivered.sum(axis=0), percentiles)
+    }
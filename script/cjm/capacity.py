@@ -6,14 +6,17 @@
 # Standard library imports
 import datetime
 import decimal
+import re
 
 # Third party imports
-import dateutil.parser
 import numpy
 
 # Project imports
+import cjm.dates
 import cjm.presentation
 
+_ISO_DATE_RE = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+
 
 def deserialize_dates(iso_dates, start_date, end_date):
     """Deserialize a list of dates and return only these of them which match given time range"""
@@ -22,7 +25,7 @@ def deserialize_dates(iso_dates, start_date, end_date):
         return start_date <= date < end_date + datetime.timedelta(days=1)
 
     return sorted({
-        d for d in [dateutil.parser.parse(s).date() for s in iso_dates]
+        d for d in [cjm.dates.parse_date(s) for s in iso_dates]
         if __date_in_sprint(d)})
 
 
@@ -33,8 +36,8 @@ def process_team_capacity(sprint_data, capacity_data):
     the not serialized dates in it. If there is a need to dump it into json, some
     additional serialize_team_capacity function should be added.
     """
-    sprint_start_date = dateutil.parser.parse(sprint_data["start date"]).date()
-    sprint_end_date = dateutil.parser.parse(sprint_data["end date"]).date()
+    sprint_start_date = cjm.dates.parse_date(sprint_data["start date"])
+    sprint_end_date = cjm.dates.parse_date(sprint_data["end date"])
     workday_count = numpy.busday_count(sprint_start_date, sprint_end_date).item()
 
     national_holidays = deserialize_dates(
@@ -42,6 +45,9 @@ def process_team_capacity(sprint_data, capacity_data):
     extra_holidays = deserialize_dates(
         capacity_data["additional holidays"], sprint_start_date, sprint_end_date)
     shared_holidays = sorted(national_holidays + extra_holidays)
+    calendar_holidays = {
+        c: deserialize_dates(d, sprint_start_date, sprint_end_date)
+        for c, d in capacity_data.get("calendars", {}).items()}
 
     return {
         "sprint start date": sprint_start_date,
@@ -50,39 +56,237 @@ def process_team_capacity(sprint_data, capacity_data):
                                         #  holidays deduction
         "national holidays": national_holidays,
         "extra holidays": extra_holidays,
-        "shared holidays": shared_holidays
+        "shared holidays": shared_holidays,
+        "calendar shared holidays": {   # Shared holidays of the people with own holiday calendar
+            c: sorted(h + extra_holidays) for c, h in calendar_holidays.items()}
     }
 
 
+def _person_shared_holidays(team_capacity, person_data):
+    """Return the shared holidays applying to given person: the ones of the person's holiday
+    calendar if the capacity data specifies it, the national ones otherwise"""
+    return team_capacity["calendar shared holidays"].get(
+        person_data.get("calendar"), team_capacity["shared holidays"])
+
+
 def process_person_capacity(team_capacity, person_data):
     """Determine actual personal capacity basing on the team capacity and personal capacity data"""
+    return process_people_capacity(team_capacity, [person_data])[0]
 
-    shared_count = len(team_capacity["shared holidays"])
-    personal_holidays = deserialize_dates(
-        person_data["personal holidays"], team_capacity["sprint start date"],
-        team_capacity["sprint end date"])
-    personal_count = len(personal_holidays)
-    daily_capacity = person_data["daily capacity"]
-    sprint_workdays = team_capacity["workday count"] - shared_count - personal_count
-    sprint_capacity = sprint_workdays * daily_capacity
 
-    return {
-        "account id": person_data["account id"],
-        "last name": person_data["last name"],
-        "first name": person_data["first name"],
-        "daily capacity": person_data["daily capacity"],
-        "personal holidays": personal_holidays,
-        "holidays": sorted(team_capacity["shared holidays"] + personal_holidays),
-        "sprint workday count": sprint_workdays,
-        "sprint capacity": sprint_capacity
-    }
+def _to_datetime64(iso_dates):
+    """Convert a list of date strings to a datetime64 array. Plain YYYY-MM-DD dates are converted
+    by numpy, other formats by cjm.dates (numpy would shift the dates with time zone offsets)"""
+    if all(_ISO_DATE_RE.match(s) for s in iso_dates):
+        return numpy.array(iso_dates, dtype="datetime64[D]")
+    return numpy.array(
+        [cjm.dates.parse_date(s) for s in iso_dates], dtype="datetime64[D]")
+
+
+def normalize_day_count(value):
+    """Convert a day count computed with floats back to an int unless it has a fractional part"""
+    value = round(float(value), 6)
+    return int(value) if value.is_integer() else value
+
+
+def _collect_absences(people):
+    """Split the personal holidays of given people into the single day absences (date strings) and
+    the absence intervals. Return the owner (person index) and date lists of the former and the
+    owner, start date, end date and fraction lists of the latter"""
+    days = ([], [])
+    intervals = ([], [], [], [])
+
+    for owner, person in enumerate(people):
+        for absence in person["personal holidays"]:
+            if isinstance(absence, str):
+                days[0].append(owner)
+                days[1].append(absence)
+            else:
+                intervals[0].append(owner)
+                intervals[1].append(absence["start"])
+                intervals[2].append(absence["end"])
+                intervals[3].append(absence.get("fraction", 1))
+
+    return days, intervals
+
+
+def _clip_absence_days(days, start_date, span):
+    """Convert given single day absences (the owner and date lists as collected by
+    _collect_absences) to the owner, day offset and absence fraction arrays. The day offsets are
+    counted from given start date (a datetime64), the days out of the span are skipped"""
+    owners = numpy.array(days[0], dtype=numpy.int64)
+    offsets = (_to_datetime64(days[1]) - start_date).astype(numpy.int64)
+    in_range = (offsets >= 0) & (offsets < span)
+
+    return owners[in_range], offsets[in_range], numpy.ones(numpy.count_nonzero(in_range))
+
+
+def _expand_absence_intervals(intervals, start_date, span):
+    """Expand given absence intervals (the owner, start date, end date and fraction lists as
+    collected by _collect_absences) to the owner, day offset and absence fraction arrays of the
+    workdays they cover. The intervals are clipped to span days from given start date (a
+    datetime64)"""
+    owners, starts, ends, fractions = intervals
+
+    # The expanded day offsets are the interval first day offsets plus the positions within the
+    #  intervals:
+    first_offsets = numpy.maximum((_to_datetime64(starts) - start_date).astype(numpy.int64), 0)
+    last_offsets = numpy.minimum((_to_datetime64(ends) - start_date).astype(numpy.int64), span - 1)
+    lengths = numpy.maximum(last_offsets - first_offsets + 1, 0)
+    offsets = (
+        numpy.repeat(first_offsets - numpy.cumsum(lengths) + lengths, lengths) +
+        numpy.arange(lengths.sum()))
+    workdays = numpy.is_busday(start_date + offsets)
+
+    return (
+        numpy.repeat(numpy.array(owners, dtype=numpy.int64), lengths)[workdays],
+        offsets[workdays],
+        numpy.repeat(numpy.array(fractions, dtype=float), lengths)[workdays])
+
+
+def _make_personal_absence(people, start_date, span):
+    """Make people x days matrix of the personal absence fractions over span days from given start
+    date (a datetime64). The personal holidays of all the people are converted, clipped to the
+    date range and deduplicated in a few array operations instead of one person at a time"""
+    days, intervals = _collect_absences(people)
+    owners, offsets, absence_fractions = (
+        numpy.concatenate(a) for a in zip(
+            _clip_absence_days(days, start_date, span),
+            _expand_absence_intervals(intervals, start_date, span)))
+
+    # The absence days are encoded as owner * span + day offset, so numpy.unique deduplicates them
+    #  per person. A day covered by multiple absences counts with the largest fraction:
+    codes, code_indices = numpy.unique(owners * span + offsets, return_inverse=True)
+    code_fractions = numpy.zeros(len(codes))
+    numpy.maximum.at(code_fractions, code_indices, absence_fractions)
+
+    personal_absence = numpy.zeros((len(people), span))
+    personal_absence[codes // span, codes % span] = code_fractions
+
+    return personal_absence
+
+
+def _make_shared_holiday_counts(shared_holidays, start_date, span):
+    """Make people x days matrix of the numbers of the shared holidays (one list of dates per
+    person) falling on every day of span days from given start date (a datetime64). The dates out
+    of the range are skipped"""
+    rows = {}
+
+    for holidays in shared_holidays:
+        if tuple(holidays) not in rows:
+            offsets = (numpy.array(holidays, dtype="datetime64[D]") - start_date).astype(
+                numpy.int64)
+            rows[tuple(holidays)] = numpy.bincount(
+                offsets[(offsets >= 0) & (offsets < span)], minlength=span)
+
+    return numpy.array(
+        [rows[tuple(h)] for h in shared_holidays], dtype=numpy.int64).reshape(-1, span)
+
+
+def process_people_capacity(team_capacity, people):
+    """Determine actual personal capacity of given people (a list of personal capacity data).
+    Return the same list as calling process_person_capacity for every person would
+
+    The personal holidays are either dates (a whole day absence) or absence intervals: objects
+    with the start and end dates (inclusive) and an optional fraction of every day the person is
+    absent (1 by default). An interval covers the workdays (Monday to Friday) between its dates"""
+    start_date = numpy.datetime64(team_capacity["sprint start date"], "D")
+    span = (team_capacity["sprint end date"] - team_capacity["sprint start date"]).days + 1
+
+    # People x sprint days matrix of the personal absence fractions and the boolean matrix of the
+    #  days the people are absent (including the shared holidays), so the per-day lookups and the
+    #  counts don't search the holiday lists:
+    personal_absence = _make_personal_absence(people, start_date, span)
+    shared_holidays = [_person_shared_holidays(team_capacity, p) for p in people]
+    absence = (personal_absence > 0) | (
+        _make_shared_holiday_counts(shared_holidays, start_date, span) > 0)
+
+    workday_counts = (
+        team_capacity["workday count"] - numpy.array([len(h) for h in shared_holidays], dtype=int)
+        - personal_absence.sum(axis=1))
+
+    return [
+        {
+            "account id": p["account id"],
+            "last name": p["last name"],
+            "first name": p["first name"],
+            "daily capacity": p["daily capacity"],
+            "personal holidays": h.tolist(),
+            "holidays": sorted(s + h.tolist()),
+            "absence": a,   # Boolean array of the absence days, indexed by the day offset from the
+                            #  sprint start (see is_absent)
+            "sprint workday count": w,
+            "sprint capacity": normalize_day_count(w * p["daily capacity"])
+        }
+        for p, s, h, a, w in zip(
+            people, shared_holidays,
+            [start_date + numpy.flatnonzero(r) for r in personal_absence], absence,
+            [normalize_day_count(c) for c in workday_counts.tolist()])]
+
+
+def plan_people_capacity(periods, people, shared_holidays):
+    """Determine workday counts of given people (a list of personal capacity data) in every given
+    period (a list of the start and end date tuples, e.g. the sprints of a planning horizon). The
+    shared holidays are given as one list of dates per person. Return people x periods array
+
+    The counts are the same as process_people_capacity determines for every period separately.
+    The absences and the holidays are laid out once as people x days matrices over the whole
+    horizon and summed per period from their cumulative sums"""
+    start_date = numpy.datetime64(min(s for s, _ in periods), "D")
+    span = (max(e for _, e in periods) - min(s for s, _ in periods)).days + 1
+
+    lost_days = (
+        _make_personal_absence(people, start_date, span) +
+        _make_shared_holiday_counts(shared_holidays, start_date, span))
+    lost_day_sums = numpy.concatenate(
+        (numpy.zeros((len(people), 1)), numpy.cumsum(lost_days, axis=1)), axis=1)
+
+    period_starts = numpy.array([s for s, _ in periods], dtype="datetime64[D]")
+    period_ends = numpy.array([e for _, e in periods], dtype="datetime64[D]")
+    first_offsets = (period_starts - start_date).astype(numpy.int64)
+    last_offsets = (period_ends - start_date).astype(numpy.int64)
+
+    return (
+        numpy.busday_count(period_starts, period_ends)[numpy.newaxis, :] -
+        (lost_day_sums[:, last_offsets + 1] - lost_day_sums[:, first_offsets]))
+
+
+def is_absent(team_capacity, person_capacity, date):
+    """Check if the person (as returned by process_people_capacity) is absent on given date. The
+    dates out of the sprint are never absence days"""
+    offset = (date - team_capacity["sprint start date"]).days
+    return 0 <= offset < len(person_capacity["absence"]) and bool(
+        person_capacity["absence"][offset])
+
+
+def compact_absences(absences):
+    """Convert the whole day absences (date strings) in given personal holidays list to absence
+    intervals. Every run of consecutive workdays (bridged over weekends) becomes one interval,
+    single workdays and weekend days stay dates. Return the new list sorted by date. The capacity
+    determined from it is the same as from the original one"""
+    dates = numpy.unique(_to_datetime64([a for a in absences if isinstance(a, str)]))
+    workdays = dates[numpy.is_busday(dates)]
+
+    # Consecutive workdays have consecutive workday numbers:
+    numbers = numpy.busday_count(numpy.datetime64("1970-01-01", "D"), workdays)
+    run_bounds = numpy.flatnonzero(numpy.diff(numbers) != 1) + 1
+    run_starts = numpy.concatenate(([0], run_bounds))[:len(workdays)]
+    run_ends = numpy.concatenate((run_bounds, [len(workdays)])) - 1
+
+    result = [
+        str(workdays[s]) if s == e else {"start": str(workdays[s]), "end": str(workdays[e])}
+        for s, e in zip(run_starts.tolist(), run_ends.tolist())]
+    result += [str(d) for d in dates[~numpy.is_busday(dates)]]
+    result += [a for a in absences if not isinstance(a, str)]
+
+    return sorted(result, key=lambda a: a if isinstance(a, str) else a["start"])
 
 
 def process_person_capacity_list(sprint_data, capacity_data):
     """Convenience method returning a list of personal capacity data based on provided sprint and
     capacity data"""
     team_capacity = process_team_capacity(sprint_data, capacity_data)
-    return [process_person_capacity(team_capacity, p) for p in capacity_data["people"]]
+    return process_people_capacity(team_capacity, capacity_data["people"])
 
 
 def make_person_capacity_lut(person_capacity_list):
@@ -127,7 +331,7 @@ def determine_summary(commitment_value, capacity_value):
     if capacity_value > 0:
         ratio = (
             decimal.Decimal("{0:d}.0000".format(commitment_value)) /
-            decimal.Decimal(capacity_value) * 100)
+            decimal.Decimal(str(capacity_value)) * 100)
         ratio = ratio.quantize(decimal.Decimal("0.00"), decimal.ROUND_HALF_UP)
         status = determine_ratio_status(ratio)
     else:
@@ -38,10 +38,29 @@ def init_defaults():
                 "name": None,
                 "token": None
             },
+            "request": {
+                "workers": 8,                   # Maximum number of concurrent requests made by
+                                                #  the bulk operations (e.g. comment posting)
+                "rate limit": None,             # Maximum number of requests per second (None
+                                                #  means no limit)
+                "backend": "requests",          # HTTP client: "requests" or "httpx" (HTTP/2,
+                                                #  needs the httpx[http2] package)
+                "compression": ["br", "gzip", "deflate"]    # Accepted response content
+                                                #  encodings (these the installed packages can't
+                                                #  decode are skipped)
+            },
+            "search": {
+                "pagination": "offset", # Issue search pagination mode: "offset" (the legacy
+                                        #  search API paginated with startAt) or "token" (the
+                                        #  enhanced search API paginated with nextPageToken)
+                "page size": 50         # Requested number of results per page (jira may return
+                                        #  fewer)
+            },
             "fields": {
                 "story points": None,
                 "epic link": None,
-                "epic name": None
+                "epic name": None,
+                "sprint": None
             },
             "issue": {
                 "type": {
@@ -82,9 +101,22 @@ def init_defaults():
                                        #  be negative) to determine sprint end week name (affects
                                        #  ending weeks split between years)
                 }
+            },
+            "holidays": {
+                "default": "PL" # Holiday calendar code (see cjm.holiday) of the people who don't
+                                #  specify their own one
             }
         },
+        "store": {
+            "max age": 900,             # Number of seconds after which the local issue store
+                                        #  data is no longer used in place of jira requests
+            "resource max age": 86400,  # The same for the rarely changing resources (fields,
+                                        #  project data, users)
+            "sync interval": 60         # Number of seconds since the last synchronization
+                                        #  during which the store is not synchronized again
+        },
         "report": {
+            "author": None, # Report author name (None means the current jira user full name)
             "capacity": {
                 "page break": {
                     "absence section": True,
@@ -99,7 +131,14 @@ def init_defaults():
             "capacity": None,
             "commitment": None,
             "delivery": None,
-            "report template": None
+            "report template": None,
+            "store": None,      # Local issue store (cjm.store) database path; None disables the
+                                #  store
+            "snapshots": None,  # Snapshot store (cjm.snapshot) directory path
+            "holidays": None,   # Holiday calendar cache (cjm.holiday) directory path; None keeps
+                                #  the calendars in memory only
+            "analytics": None   # Sprint record cache (cjm.analytics) directory path; None
+                                #  disables the cache
         }
     }
 
@@ -135,6 +174,8 @@ def apply_options(cfg, options):
     cfg["path"]["capacity"] = options.capacity_file_path
     cfg["path"]["commitment"] = options.commitment_file_path
     cfg["path"]["delivery"] = options.delivery_file_path
+    cfg["path"]["store"] = options.store_path
+    cfg["path"]["snapshots"] = options.snapshot_dir_path
     cfg["calendar"]["week"]["system"] = options.week_numbering_system
     return cfg
 
@@ -157,6 +198,30 @@ def apply_config(cfg, defaults):
     cfg["calendar"]["week"]["name"]["upper offset"] = wn_config.get(
         "upper offset", cfg["calendar"]["week"]["name"]["upper offset"])
 
+    cfg["calendar"]["holidays"]["default"] = defaults.get("calendar", {}).get(
+        "holidays", {}).get("default", cfg["calendar"]["holidays"]["default"])
+
+    for key in ("holidays", "analytics"):
+        cfg["path"][key] = defaults.get("path", {}).get(key, cfg["path"][key])
+
+    rq_config = defaults.get("jira", {}).get("request", {})
+    cfg["jira"]["request"]["workers"] = rq_config.get(
+        "workers", cfg["jira"]["request"]["workers"])
+    cfg["jira"]["request"]["rate limit"] = rq_config.get(
+        "rate limit", cfg["jira"]["request"]["rate limit"])
+    cfg["jira"]["request"]["backend"] = rq_config.get(
+        "backend", cfg["jira"]["request"]["backend"])
+    cfg["jira"]["request"]["compression"] = rq_config.get(
+        "compression", cfg["jira"]["request"]["compression"])
+
+    se_config = defaults.get("jira", {}).get("search", {})
+    for key in ("pagination", "page size"):
+        cfg["jira"]["search"][key] = se_config.get(key, cfg["jira"]["search"][key])
+
+    st_config = defaults.get("store", {})
+    for key in ("max age", "resource max age", "sync interval"):
+        cfg["store"][key] = st_config.get(key, cfg["store"][key])
+
     cfg["project"]["comment ns"] = defaults.get("project", {}).get(
         "comment ns", cfg["project"]["comment ns"])
 
@@ -207,6 +272,8 @@ def make_common_parser(defaults):
     default_scheme = defaults.get("jira", {}).get("scheme")
     default_wns = defaults.get("calendar", {}).get("week", {}).get(
         "system", CALENDAR_WEEK_SYSTEM_ISO)
+    default_store_path = defaults.get("path", {}).get("store")
+    default_snapshot_dir_path = defaults.get("path", {}).get("snapshots")
 
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -252,6 +319,18 @@ def make_common_parser(defaults):
     parser.add_argument(
         "--delivery-file", action="store", metavar="PATH", dest="delivery_file_path",
         help="Override of the default delivery data file associated with given sprint")
+    parser.add_argument(
+        "--store", action="store", metavar="PATH", dest="store_path",
+        default=default_store_path,
+        help=(
+            "Local issue store database PATH used to avoid repeated jira requests{0:s}"
+            "".format(fmt_dft(default_store_path))))
+    parser.add_argument(
+        "--snapshot-dir", action="store", metavar="PATH", dest="snapshot_dir_path",
+        default=default_snapshot_dir_path,
+        help=(
+            "Sprint data snapshot store directory PATH{0:s}"
+            "".format(fmt_dft(default_snapshot_dir_path))))
     parser.add_argument(
         "--week-system", action="store", metavar="SYSTEM",
         choices=(CALENDAR_WEEK_SYSTEM_ISO, CALENDAR_WEEK_SYSTEM_NORTH_AMERICAN),
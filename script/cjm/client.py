@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Thin client delegating script runs to the cjm service (see cjm-service.py)
+
+The module depends on the standard library only, so the scripts can call delegate before importing
+anything else and a delegated run doesn't pay for the third party imports"""
+
+# Standard library imports
+import json
+import os
+import socket
+import sys
+
+# Project imports
+import cjm.cfg
+import cjm.codes
+
+
+SOCKET_ENV_VAR = "CJM_SERVICE_SOCKET"
+
+
+def get_socket_path():
+    """Determine the cjm service socket path: the CJM_SERVICE_SOCKET environment variable or the
+    service.socket entry of the defaults file. Return None if none of them is set (an empty
+    environment variable disables the service)"""
+    socket_path = os.environ.get(SOCKET_ENV_VAR)
+
+    if socket_path is None:
+        socket_path = cjm.cfg.load_defaults().get("service", {}).get("socket")
+
+    return socket_path or None
+
+
+def delegate(script_path, args=None):
+    """Run given script in the cjm service and exit with the script exit code. Return without
+    doing anything if the service is not configured or not running, i.e. let the caller run the
+    script locally"""
+    socket_path = get_socket_path()
+
+    if socket_path is None or not os.path.exists(socket_path):
+        return
+
+    request = {
+        "script": os.path.basename(script_path),
+        "args": sys.argv[1:] if args is None else list(args),
+        "cwd": os.getcwd()
+    }
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            # Stale socket file left by a service that is not running anymore:
+            return
+
+        try:
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as sock_file:
+                response = json.loads(sock_file.readline().decode("utf-8"))
+        except (OSError, ValueError) as e:
+            # The script might have been partially executed, so it is not run again locally:
+            sys.stderr.write(
+                "ERROR: The cjm service ('{0:s}') connection failed\n".format(socket_path))
+            sys.stderr.write("    {0}\n".format(e))
+            sys.exit(cjm.codes.REQUEST_ERROR)
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["code"])
@@ -10,6 +10,7 @@ import json
 import jsonschema
 
 # Project imports
+import cjm.issue
 import cjm.schema
 import cjm.request
 
@@ -23,5 +24,7 @@ def load_data(cfg, commitment_file):
 
 
 def calc_total(issues):
-    """Return sum of story points for given issues"""
+    """Return sum of story points for given issues (an issue iterable or a cjm.issue.IssueTable)"""
+    if isinstance(issues, cjm.issue.IssueTable):
+        return issues.total("story points")
     return sum([int(i["story points"]) for i in issues if i["story points"] is not None])
@@ -8,12 +8,11 @@ import json
 import sys
 
 # Third party imports
-import dateutil.parser
 import isoweek
-import jsonschema
 
 # Project imports
 import cjm.codes
+import cjm.dates
 import cjm.schema
 
 
@@ -22,9 +21,8 @@ def load(cfg, file_name, schema_name):
        errors"""
     try:
         with open(file_name) as data_file:
-            schema = cjm.schema.load(cfg, schema_name)
             data = json.load(data_file)
-            jsonschema.validate(data, schema)
+            cjm.schema.validate(cfg, data, schema_name)
     except IOError as e:
         sys.stderr.write(
             "ERROR: JSON data file ('{0:s}') I/O error\n".format(file_name))
@@ -34,15 +32,16 @@ def load(cfg, file_name, schema_name):
     return data
 
 
-def make_default_file_name(cfg, sprint_data, variant):
+def make_default_file_name(cfg, sprint_data, variant, extension="json"):
     """Construct default sprint data file name"""
-    start_date = dateutil.parser.parse(sprint_data["start date"]).date()
-    end_date = dateutil.parser.parse(sprint_data["end date"]).date()
+    start_date = cjm.dates.parse_date(sprint_data["start date"])
+    end_date = cjm.dates.parse_date(sprint_data["end date"])
 
-    return "{0:s}_{1:d}-{2:s}_{3:s}.json".format(
+    return "{0:s}_{1:d}-{2:s}_{3:s}.{4:s}".format(
         sprint_data["project"]["name"].lower(),
         isoweek.Week.withdate(start_date).year,
-        cjm.sprint.generate_sprint_period_name(cfg, start_date, end_date).lower(), variant)
+        cjm.sprint.generate_sprint_period_name(cfg, start_date, end_date).lower(), variant,
+        extension)
 
 
 def make_flag_filter(field_name, filter_directive):
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Date and time parsing helpers
+
+The ISO-8601 dates of the data files and the timestamps returned by jira (e.g.
+2021-03-10T10:00:00.000+0100) are parsed by the standard library. Other formats are left to
+dateutil. The results are memoized as the same dates repeat a lot in the processed data"""
+
+# Standard library imports
+import datetime
+import functools
+import re
+
+# Third party imports
+import dateutil.parser
+
+_CACHE_SIZE = 65536
+
+_DATE_RE = re.compile(r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$")
+_DATETIME_RE = re.compile(
+    r"^(?P<datetime>[0-9]{4}-[0-9]{2}-[0-9]{2}[T ][0-9]{2}:[0-9]{2}"
+    r"(?::[0-9]{2}(?:\.[0-9]{3}(?:[0-9]{3})?)?)?)"
+    r"(?:(?P<utc>Z)|(?P<offset>[+-][0-9]{2}):?(?P<offset_minutes>[0-9]{2}))?$")
+
+
+def _parse_iso_datetime(text):
+    """Parse strict ISO-8601 date or date and time. Return None if the text is in other format.
+    Raise ValueError if it is not a valid date"""
+    if _DATE_RE.match(text):
+        return datetime.datetime.combine(datetime.date.fromisoformat(text), datetime.time())
+
+    match = _DATETIME_RE.match(text)
+
+    if match is None:
+        return None
+
+    # The time zone offset is normalized to the +HH:MM form accepted by all the python versions:
+    if match.group("utc") is not None:
+        text = match.group("datetime") + "+00:00"
+    elif match.group("offset") is not None:
+        text = "{0:s}{1:s}:{2:s}".format(
+            match.group("datetime"), match.group("offset"), match.group("offset_minutes"))
+
+    return datetime.datetime.fromisoformat(text)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def parse_datetime(text):
+    """Parse date and time string. Raise ValueError if it can't be parsed"""
+    try:
+        result = _parse_iso_datetime(text)
+    except ValueError:
+        result = None
+
+    return result if result is not None else dateutil.parser.parse(text)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def parse_date(text):
+    """Parse date string (a time part is accepted and dropped, the date is not shifted by the time
+    zone offset). Raise ValueError if it can't be parsed"""
+    if _DATE_RE.match(text):
+        try:
+            return datetime.date.fromisoformat(text)
+        except ValueError:
+            pass
+
+    return parse_datetime(text).date()
@@ -0,0 +1,137 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Public holiday calendars
+
+A calendar is identified by a code made of the ISO 3166 country code and an optional subdivision
+code (e.g. "PL", "DE-BY"). The holidays of every calendar year are computed by the holidays package
+once and cached in memory and, if the cache directory path is configured, on disk, so the
+following runs only load them. The calendars are sorted datetime64 arrays queried for date ranges
+with a binary search"""
+
+# Standard library imports
+import functools
+import json
+import os
+import re
+import sys
+import tempfile
+
+# Third party imports
+import holidays
+import numpy
+
+# Project imports
+import cjm.codes
+
+_CODE_RE = re.compile(r"^(?P<country>[A-Z]{2,3})(?:-(?P<subdivision>[A-Z0-9]{1,3}))?$")
+
+
+def parse_code(code):
+    """Split calendar code into the country and subdivision (None if not specified) codes"""
+    match = _CODE_RE.match(code)
+
+    if match is None:
+        sys.stderr.write("ERROR: Invalid holiday calendar code ('{0:s}')\n".format(code))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+    return match.group("country"), match.group("subdivision")
+
+
+def person_code(cfg, person):
+    """Return the holiday calendar code of given person (team or capacity data entry)"""
+    return person.get("calendar") or cfg["calendar"]["holidays"]["default"]
+
+
+def _compute_year(code, year):
+    country, subdivision = parse_code(code)
+
+    try:
+        calendar = holidays.country_holidays(country, subdiv=subdivision, years=year)
+    except NotImplementedError as e:
+        sys.stderr.write("ERROR: Unsupported holiday calendar ('{0:s}')\n".format(code))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+    return sorted(d.isoformat() for d in calendar)
+
+
+def _make_cache_path(cache_dir, code, year):
+    return os.path.join(cache_dir, "{0:s}-{1:d}.json".format(code, year))
+
+
+def _read_cache(cache_path):
+    """Return the cached holiday dates or None if they are missing or were computed by a different
+    holidays package version"""
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            data = json.load(cache_file)
+    except (IOError, ValueError):
+        return None
+
+    if data.get("version") != holidays.__version__:
+        return None
+
+    return data["dates"]
+
+
+def _write_cache(cache_path, dates):
+    data = {"version": holidays.__version__, "dates": dates}
+
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Write to a temporary file first so concurrent runs never read a truncated file:
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(tmp_fd, "w", encoding="utf-8") as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except IOError as e:
+        sys.stderr.write(
+            "WARNING: Holiday calendar cache file ('{0:s}') I/O error\n".format(cache_path))
+        sys.stderr.write("    {0}\n".format(e))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_year(cache_dir, code, year):
+    if cache_dir is None:
+        dates = _compute_year(code, year)
+    else:
+        cache_path = _make_cache_path(cache_dir, code, year)
+        dates = _read_cache(cache_path)
+        if dates is None:
+            dates = _compute_year(code, year)
+            _write_cache(cache_path, dates)
+
+    result = numpy.array(dates, dtype="datetime64[D]")
+    result.flags.writeable = False
+
+    return result
+
+
+def load_calendar(cfg, code, years):
+    """Load holidays of given calendar and years (an iterable of ints). Return them as a sorted
+    datetime64 array"""
+    return numpy.concatenate(
+        [_load_year(cfg["path"]["holidays"], code, y) for y in sorted(set(years))] or
+        [numpy.array([], dtype="datetime64[D]")])
+
+
+def find_holidays(cfg, code, start_date, end_date, workdays_only=True):
+    """Find holidays of given calendar between given dates (inclusive). Return them as a sorted
+    list of dates. The holidays falling on weekends are skipped unless workdays_only is False"""
+    calendar = load_calendar(cfg, code, range(start_date.year, end_date.year + 1))
+    lower = numpy.searchsorted(calendar, numpy.datetime64(start_date, "D"), side="left")
+    upper = numpy.searchsorted(calendar, numpy.datetime64(end_date, "D"), side="right")
+
+    result = calendar[lower:upper]
+
+    if workdays_only:
+        result = result[numpy.is_busday(result)]
+
+    return result.tolist()
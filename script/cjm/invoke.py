@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""In-process execution of cjm-* and sm-* scripts
+
+Running several scripts in one process lets them share the process wide state: the request
+session, the schema and field caches and the local issue store connections"""
+
+# Standard library imports
+import contextlib
+import importlib.util
+import inspect
+import io
+import os
+import re
+import sys
+import traceback
+
+# Third party imports
+import jsonschema
+
+# Project imports
+import cjm.cfg
+import cjm.codes
+
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+_MODULES = {}
+
+
+def load_script(script_name):
+    """Load the module of given script (e.g. cjm.SM_CREATE_COMMITMENT_FILE). Each script is loaded
+    only once per process"""
+    module = _MODULES.get(script_name)
+
+    if module is None:
+        module_name = "cjm_script_{0:s}".format(
+            re.sub(r"\W", "_", os.path.splitext(script_name)[0]))
+        spec = importlib.util.spec_from_file_location(
+            module_name, os.path.join(SCRIPT_DIR, script_name))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _MODULES[script_name] = module
+
+    return module
+
+
+def run_script(script_name, args):
+    """Run the entry function of given script with given command line arguments in the current
+    process. Return the exit code and the captured standard output of the script
+
+    Both script conventions are supported: parse_options(args) with main(options) and
+    parse_options(args, defaults) with main(options, defaults) (see cjm.run). The defaults file is
+    loaded from the current directory, like in case of a standalone script invocation. Data
+    validation and I/O errors are reported with the INPUT_DATA_ERROR and FILESYSTEM_ERROR codes
+    instead of being raised. The standard output redirection is process wide, so scripts must not
+    be run concurrently in threads of one process"""
+    module = load_script(script_name)
+    output = io.StringIO()
+    options = None
+    argv = sys.argv
+
+    with contextlib.redirect_stdout(output):
+        try:
+            # The argument parser takes the program name (used by the usage messages) from here:
+            sys.argv = [script_name] + list(args)
+
+            if len(inspect.signature(module.parse_options).parameters) > 1:
+                defaults = cjm.cfg.load_defaults()
+                options = module.parse_options(args, defaults)
+                code = module.main(options, defaults)
+            else:
+                options = module.parse_options(args)
+                code = module.main(options)
+        except SystemExit as e:
+            # Raised by the argument parser (e.g. invalid arguments):
+            code = (
+                e.code if e.code is None or isinstance(e.code, int)
+                else cjm.codes.INVALID_ARGUMENT_ERROR)
+        except cjm.codes.CjmError as e:
+            if options is not None and options.verbose:
+                traceback.print_exc(file=sys.stderr)
+            code = e.code
+        except jsonschema.exceptions.ValidationError as e:
+            sys.stderr.write("ERROR: {0:s} data validation error\n".format(script_name))
+            sys.stderr.write("    {0:s}\n".format(e.message))
+            code = cjm.codes.INPUT_DATA_ERROR
+        except IOError as e:
+            sys.stderr.write("ERROR: {0:s} I/O error\n".format(script_name))
+            sys.stderr.write("    {0}\n".format(e))
+            code = cjm.codes.FILESYSTEM_ERROR
+        finally:
+            sys.argv = argv
+
+    return (cjm.codes.NO_ERROR if code is None else code), output.getvalue()
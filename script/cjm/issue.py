@@ -4,74 +4,213 @@
 """Issue related helper functions"""
 
 # Standard library imports
-import copy
+import collections.abc
+import concurrent.futures
+import re
 import sys
+import threading
 
 # Project imports
 import cjm.codes
 import cjm.request
+import cjm.store
 
 
 JIRA_COMMENT_CONTENT_TYPE_PARAGRAPH = "paragraph"
 JIRA_COMMENT_CONTENT_TYPE_TEXT = "text"
 
+COMMENT_RESULT_POSTED = "posted"
+COMMENT_RESULT_PRESENT = "present"
+COMMENT_RESULT_FAILED = "failed"
+
+_FIELDS_LOCK = threading.Lock()
+_FIELDS_CACHE = {}
+
+# Issue record keys set by extract_issue_data. Any other keys (e.g. the ones derived by the
+#  commitment and delivery scripts) are kept in the per record overflow dict
+_ISSUE_KEYS = (
+    "id", "key", "summary", "assignee id", "story points", "status", "resolution date")
+_ISSUE_SLOTS = {k: "_" + k.replace(" ", "_") for k in _ISSUE_KEYS}
+_EXTRA_SLOT = "_extra"
+
+
+class Issue(collections.abc.Mapping):
+    """Immutable issue record as returned by extract_issue_data
+
+    The record is a read only mapping with the issue data keys (see _ISSUE_KEYS) kept in slots, so
+    the records are small. Other keys are kept in an overflow dict allocated only when the record
+    has any. Derived records (e.g. with the delivery status added) are made with evolve. Use
+    to_dict to serialize a record (e.g. to json)"""
+
+    __slots__ = tuple(_ISSUE_SLOTS.values()) + (_EXTRA_SLOT,)
+
+    def __init__(self, values):
+        extra = {}
+        for key, value in values.items():
+            if key in _ISSUE_SLOTS:
+                object.__setattr__(self, _ISSUE_SLOTS[key], value)
+            else:
+                extra[key] = value
+        object.__setattr__(self, _EXTRA_SLOT, extra or None)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, _ISSUE_SLOTS[key])
+        except KeyError:
+            extra = getattr(self, _EXTRA_SLOT)
+            if extra is None:
+                raise
+            return extra[key]
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        yield from (k for k, s in _ISSUE_SLOTS.items() if hasattr(self, s))
+        extra = getattr(self, _EXTRA_SLOT)
+        if extra is not None:
+            yield from extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Issue records are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Issue records are immutable")
+
+    def __reduce__(self):
+        return (Issue, (self.to_dict(),))
+
+    def __repr__(self):
+        return "Issue({0!r})".format(self.to_dict())
+
+    def evolve(self, values):
+        """Return a copy of the record with given values (a key to value dict) added or replaced"""
+        return Issue({**self, **values})
+
+    def to_dict(self):
+        """Return the record as a plain dict"""
+        return dict(self)
+
+
+class IssueTable:
+    """Issues grouped by assignee together with the per assignee story point sums
+
+    The table is built in a single pass over the issues. The sums are kept for the story points,
+    committed story points and delivered story points keys (the ones the issues have). Issues with
+    the None value of a key are skipped by its sums"""
+
+    SUM_KEYS = ("story points", "committed story points", "delivered story points")
+
+    def __init__(self, issues):
+        self._groups = {}
+        self._sums = {}
+
+        for issue in issues:
+            assignee_id = issue["assignee id"]
+            self._groups.setdefault(assignee_id, []).append(issue)
+            sums = self._sums.setdefault(assignee_id, dict.fromkeys(self.SUM_KEYS, 0))
+
+            for key in self.SUM_KEYS:
+                value = issue.get(key)
+                if value is not None:
+                    sums[key] += int(value)
+
+    def assignee_ids(self):
+        """Return the account ids of the people with assigned issues (None stands for the
+        unassigned issues)"""
+        return list(self._groups)
+
+    def person_issues(self, account_id):
+        """Return the list of issues assigned to the person with given account id (None means the
+        unassigned issues)"""
+        return self._groups.get(account_id, [])
+
+    def person_total(self, key, account_id):
+        """Return the sum of given key values of the issues assigned to the person with given
+        account id (None means the unassigned issues)"""
+        return self._sums.get(account_id, {}).get(key, 0)
+
+    def unassigned_total(self, key):
+        """Return the sum of given key values of the unassigned issues"""
+        return self.person_total(key, None)
+
+    def assigned_total(self, key):
+        """Return the sum of given key values of the issues assigned to anyone"""
+        return self.total(key) - self.unassigned_total(key)
+
+    def total(self, key):
+        """Return the sum of given key values of all the issues"""
+        return sum(s[key] for s in self._sums.values())
 
 
 def assigned_issues(issues):
     """Extract list of issues assigned to anyone"""
-    return [
-        copy.copy(i) for i in issues
-        if i["assignee id"] is not None]
+    return [i for i in issues if i["assignee id"] is not None]
 
 
 def unassigned_issues(issues):
     """Extract list of unassigned issues"""
-    return [
-        copy.copy(i) for i in issues
-        if i["assignee id"] is None]
+    return [i for i in issues if i["assignee id"] is None]
 
 
 def person_issues(issues, person_data):
     """Extract list of issues assigned to the given person"""
-    return [
-        copy.copy(i) for i in issues
-        if i["assignee id"] == person_data["account id"]]
+    return [i for i in issues if i["assignee id"] == person_data["account id"]]
 
 
-def detect_story_point_field_id(cfg):
-    """Determine identifier of the story point issue field"""
-    url = cjm.request.make_cj_url(cfg, "field")
-    response = cjm.request.make_cj_request(cfg, url)
+def request_fields(cfg, refresh=False):
+    """Request the list of issue fields. The list is requested only once per jira host in the
+    process lifetime, i.e. it is shared by all the scripts run in one process (see cjm.invoke).
+    It is also taken from the local issue store if possible (see cjm.store.request_resource)"""
+    cache_key = (cfg["jira"]["scheme"], cfg["jira"]["host"])
 
-    for field in response.json():
-        if field["name"] == "Story Points":
-            return field["id"]
+    with _FIELDS_LOCK:
+        fields = None if refresh else _FIELDS_CACHE.get(cache_key)
 
-    raise cjm.codes.CjmError(cjm.codes.INTEGRATION_ERROR)
+    if fields is None:
+        url = cjm.request.make_cj_url(cfg, "field")
+        fields = cjm.store.request_resource(
+            cfg, "fields", lambda: cjm.request.make_cj_request(cfg, url).json(), refresh=refresh)
 
+        with _FIELDS_LOCK:
+            _FIELDS_CACHE[cache_key] = fields
+
+    return fields
 
-def detect_epic_link_field_id(cfg):
-    """Determine identifier of the epic link issue field"""
-    url = cjm.request.make_cj_url(cfg, "field")
-    response = cjm.request.make_cj_request(cfg, url)
 
-    for field in response.json():
-        if field["name"] == "Epic Link":
+def detect_field_id(cfg, field_name, required=True):
+    """Determine identifier of the issue field with given name. Return None if the field doesn't
+    exist and it is not required"""
+    for field in request_fields(cfg):
+        if field["name"] == field_name:
             return field["id"]
 
+    if not required:
+        return None
+
     raise cjm.codes.CjmError(cjm.codes.INTEGRATION_ERROR)
 
 
+def detect_story_point_field_id(cfg):
+    """Determine identifier of the story point issue field"""
+    return detect_field_id(cfg, "Story Points")
+
+
+def detect_epic_link_field_id(cfg):
+    """Determine identifier of the epic link issue field"""
+    return detect_field_id(cfg, "Epic Link")
+
+
 def detect_epic_name_field_id(cfg):
     """Determine identifier of the epic name issue field"""
-    url = cjm.request.make_cj_url(cfg, "field")
-    response = cjm.request.make_cj_request(cfg, url)
+    return detect_field_id(cfg, "Epic Name")
 
-    for field in response.json():
-        if field["name"] == "Epic Name":
-            return field["id"]
 
-    raise cjm.codes.CjmError(cjm.codes.INTEGRATION_ERROR)
+def detect_sprint_field_id(cfg):
+    """Determine identifier of the sprint issue field. Return None if there is no such field"""
+    return detect_field_id(cfg, "Sprint", required=False)
 
 
 # "ghx-label-1" = "ghx-label-4"  = b3d4ff
@@ -108,12 +247,25 @@ def request_epic_update(cfg, issue_spec):
 
     url = cjm.request.make_cj_agile_url(cfg, "epic", issue_spec["key"])
     cjm.request.make_cj_post_request(cfg, url, json=json)
+    cjm.store.invalidate_issue(cfg, issue_spec["key"])
+
+
+def extract_comment_texts(comment):
+    """Return texts of all the paragraph text nodes of given jira comment. Plain text comment
+    bodies (as sent by the webhooks) are split into lines instead"""
+    if isinstance(comment["body"], str):
+        return comment["body"].splitlines()
 
+    return [
+        content_l2["text"]
+        for content_l1 in comment["body"]["content"]
+        if content_l1["type"] == JIRA_COMMENT_CONTENT_TYPE_PARAGRAPH
+        for content_l2 in content_l1.get("content", [])
+        if content_l2["type"] == JIRA_COMMENT_CONTENT_TYPE_TEXT]
 
-def request_issue_comments_regexp(cfg, issue_key, comment_re):
-    """Return these of specific issue's comments that match given regular expression"""
-    # pylint: disable=too-many-nested-blocks
 
+def request_issue_comments(cfg, issue_key, memo=True):
+    """Return all comments of specific issue"""
     comments = []
     comments_url = cjm.request.make_cj_url(cfg, "issue", issue_key, "comment")
 
@@ -123,18 +275,10 @@ def request_issue_comments_regexp(cfg, issue_key, comment_re):
     while True:
         response = cjm.request.make_cj_request(
             cfg, comments_url,
-            params={"startAt": start_at, "maxResults": max_results})
+            params={"startAt": start_at, "maxResults": max_results}, memo=memo)
         response_json = response.json()
 
-        for comment in response_json["comments"]:
-            for content_l1 in comment["body"]["content"]:
-                if content_l1["type"] == JIRA_COMMENT_CONTENT_TYPE_PARAGRAPH:
-                    for content_l2 in content_l1["content"]:
-                        if content_l2["type"] == JIRA_COMMENT_CONTENT_TYPE_TEXT:
-                            m = comment_re.match(content_l2["text"])
-                            if m is not None:
-                                comments.append(m)
-
+        comments += response_json["comments"]
         start_at += max_results
 
         if start_at >= response_json["total"]:
@@ -143,12 +287,41 @@ def request_issue_comments_regexp(cfg, issue_key, comment_re):
     return comments
 
 
+def request_issue_comments_regexp(cfg, issue_key, comment_re, memo=True):
+    """Return these of specific issue's comments that match given regular expression
+
+    The comments are taken from the local issue store when it is fresh enough (see cjm.store).
+    Use memo=False to bypass both the store and the request memo (see
+    cjm.request.make_cj_request)"""
+    conn = cjm.store.fresh_connection(cfg) if memo else None
+    comment_texts = None if conn is None else cjm.store.query_issue_comment_texts(conn, issue_key)
+
+    if comment_texts is None:
+        comment_texts = [
+            extract_comment_texts(c) for c in request_issue_comments(cfg, issue_key, memo)]
+
+    return [
+        m for m in (comment_re.match(text) for texts in comment_texts for text in texts)
+        if m is not None]
+
+
+def make_issue_data_fields(cfg):
+    """Make the list of issue fields used by extract_issue_data (e.g. to be requested by the issue
+    search)"""
+    return [
+        f for f in (
+            "summary", "assignee", "status", "resolutiondate",
+            cfg["jira"]["fields"]["story points"])
+        if f is not None]
+
+
 def extract_issue_data(cfg, issue):
-    """Common function converting jira issue description to a tailored set of properties"""
+    """Common function converting jira issue description to a tailored set of properties (an Issue
+    record)"""
     def __account_id_cb(usr):
         return None if usr is None else usr["accountId"]
 
-    return {
+    return Issue({
         "id": int(issue["id"]),
         "key": issue["key"],
         "summary": issue["fields"]["summary"],
@@ -156,12 +329,19 @@ def extract_issue_data(cfg, issue):
         "story points": issue["fields"].get(cfg["jira"]["fields"]["story points"]),
         "status": issue["fields"]["status"]["name"],
         "resolution date": issue["fields"]["resolutiondate"]
-    }
+    })
 
 
 def request_issue(cfg, issue_key):
     """Return issue identified by given key.
     Return None if not found"""
+    conn = cjm.store.fresh_connection(cfg)
+
+    if conn is not None:
+        issues = cjm.store.query_issues_by_keys(cfg, conn, [issue_key])
+        if issues:
+            return issues[0]
+
     issue_url = cjm.request.make_cj_url(cfg, "issue", issue_key)
     response = cjm.request.make_cj_request(cfg, issue_url, tolerate_404=True)
 
@@ -181,28 +361,25 @@ def request_issues_by_keys(cfg, issue_keys):
     if not issue_keys:
         return []
 
-    issues = []
-    issues_url = cjm.request.make_cj_url(cfg, "search")
+    conn = cjm.store.fresh_connection(cfg)
 
-    jql = 'key in ({0:s})'.format(", ".join(issue_keys))
-    start_at = 0
-    max_results = 50
+    if conn is not None:
+        stored_issues = cjm.store.query_issues_by_keys(cfg, conn, issue_keys)
+        stored_keys = {i["key"] for i in stored_issues}
+        missing_keys = [k for k in issue_keys if k not in stored_keys]
+        return stored_issues + _request_issues_by_keys_remote(cfg, missing_keys)
 
-    while True:
-        response = cjm.request.make_cj_post_request(
-            cfg, issues_url,
-            json={"jql": jql, "startAt": start_at, "maxResults": max_results})
-        response_json = response.json()
+    return _request_issues_by_keys_remote(cfg, issue_keys)
 
-        for issue in response_json["issues"]:
-            issues.append(extract_issue_data(cfg, issue))
 
-        start_at += max_results
+def _request_issues_by_keys_remote(cfg, issue_keys):
+    if not issue_keys:
+        return []
 
-        if start_at >= response_json["total"]:
-            break
+    jql = 'key in ({0:s})'.format(", ".join(issue_keys))
 
-    return issues
+    return cjm.request.search_issues(
+        cfg, jql, make_issue_data_fields(cfg), issue_cb=lambda i: extract_issue_data(cfg, i))
 
 
 def make_comment_body(comment_text):
@@ -228,9 +405,53 @@ def make_comment_body(comment_text):
 
 def request_comment_create(cfg, issue_key, comment_json):
     """Request addition of specified comment body to given issue
-    The comment body is constructed e.g. by the make_comment_body function"""
+    The comment body is constructed e.g. by the make_comment_body function. The issue may also be
+    identified by its id"""
     url = cjm.request.make_cj_url(cfg, "issue", issue_key, "comment")
-    return cjm.request.make_cj_post_request(cfg, url, json=comment_json).json()
+    response = cjm.request.make_cj_post_request(cfg, url, json=comment_json)
+    cjm.store.invalidate_issue(cfg, issue_key)
+    return response.json()
+
+
+def request_comments_create_bulk(cfg, comments, verbose=False):
+    """Post given tag comments concurrently and return the per-issue results
+
+    :param comments: Iterable of (issue, comment_text) pairs; Each issue is a dict with at least
+        the "id" and "key" elements
+    :param verbose: Print a line before each comment is posted
+
+    The number of concurrent requests is limited by the jira.request.workers configuration
+    variable. Right before posting, the target issue comments are checked again for the presence
+    of the comment text and the comment is not posted if it is already there. This makes the
+    function safe to be retried after a partial failure.
+
+    The returned list contains {"issue", "comment", "result"} dicts in the input order with the
+    result being one of the COMMENT_RESULT_* values"""
+    comments = list(comments)
+
+    def __post_comment(issue, comment_text):
+        comment_re = re.compile(r"{0:s}\s*$".format(re.escape(comment_text)))
+
+        try:
+            if request_issue_comments_regexp(cfg, issue["key"], comment_re, memo=False):
+                return COMMENT_RESULT_PRESENT
+
+            if verbose:
+                print("Posting '{0:s}' to issue {1:s}".format(comment_text, issue["key"]))
+
+            request_comment_create(cfg, str(issue["id"]), make_comment_body(comment_text))
+        except cjm.codes.CjmError:
+            return COMMENT_RESULT_FAILED
+
+        return COMMENT_RESULT_POSTED
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, cfg["jira"]["request"]["workers"])) as executor:
+        futures = [executor.submit(__post_comment, i, c) for i, c in comments]
+
+    return [
+        {"issue": i, "comment": c, "result": f.result()}
+        for (i, c), f in zip(comments, futures)]
 
 
 def request_issue_types(cfg):
@@ -284,7 +505,26 @@ def request_issue_create(cfg, issue_spec):
 
     create_url = cjm.request.make_cj_url(cfg, "issue")
     response = cjm.request.make_cj_post_request(cfg, create_url, json=json)
-    return request_issue(cfg, response.json()["key"])
+    cjm.store.invalidate_issue(cfg, response.json()["key"])
+    return make_created_issue_data(cfg, json, response.json())
+
+
+def make_created_issue_data(cfg, create_json, response_json):
+    """Build the extract_issue_data record of a freshly created issue locally, i.e. using the
+    issue creation request payload and the creation response (id, key, self) only
+
+    The fields not specified in the payload (e.g. status) are assigned the None value. Use
+    request_issues_by_keys to get the actual jira state of such records"""
+    return extract_issue_data(cfg, {
+        "id": response_json["id"],
+        "key": response_json["key"],
+        "fields": {
+            "assignee": None,
+            "status": {"name": None},
+            "resolutiondate": None,
+            **create_json["fields"]
+        }
+    })
 
 
 def request_issue_link_create(cfg, inward_key, outward_key, link_type):
@@ -303,3 +543,4 @@ def request_issue_link_create(cfg, inward_key, outward_key, link_type):
 
     url = cjm.request.make_cj_url(cfg, "issueLink")
     cjm.request.make_cj_post_request(cfg, url, json=json)
+    cjm.store.invalidate_issue(cfg, inward_key)
@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Append-only operation journal helpers"""
+
+# Standard library imports
+import json
+import os
+import sys
+
+# Project imports
+import cjm.codes
+
+
+def make_journal_path(journal_dir, journal_id):
+    """Construct path of the journal file associated with given identifier (e.g. tasks set id)"""
+    return os.path.join(journal_dir, "{0:s}.journal".format(journal_id))
+
+
+def load_entries(journal_path):
+    """Load all entries recorded in given journal file. Return an empty list if the journal file
+    doesn't exist yet
+
+    Malformed entries (e.g. a trailing line truncated by an interrupted write) are skipped"""
+    if not os.path.exists(journal_path):
+        return []
+
+    entries = []
+
+    try:
+        with open(journal_path, encoding="utf-8") as journal_file:
+            for line_no, line in enumerate(journal_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    sys.stderr.write(
+                        "WARNING: Skipping malformed journal ('{0:s}') entry in line {1:d}\n"
+                        "".format(journal_path, line_no))
+    except IOError as e:
+        sys.stderr.write("ERROR: Journal file ('{0:s}') I/O error\n".format(journal_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+
+    return entries
+
+
+def append_entry(journal_path, entry):
+    """Append given entry to the journal file and make sure it reached the disk before returning
+
+    The entry is written in a separate line even if the previous write was interrupted and left
+    the last line unterminated"""
+    try:
+        with open(journal_path, "ab") as journal_file:
+            if journal_file.tell() > 0 and not _ends_with_newline(journal_path):
+                journal_file.write(b"\n")
+            journal_file.write(json.dumps(entry, sort_keys=True).encode("utf-8") + b"\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+    except IOError as e:
+        sys.stderr.write("ERROR: Journal file ('{0:s}') I/O error\n".format(journal_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+
+
+def _ends_with_newline(file_path):
+    with open(file_path, "rb") as data_file:
+        data_file.seek(-1, os.SEEK_END)
+        return data_file.read(1) == b"\n"
@@ -9,6 +9,10 @@ import sys
 
 # Third party imports
 import colorama
+import tabulate
+
+# Project imports
+import cjm.issue
 
 
 STATUS_CODES = enum.Enum(
@@ -128,3 +132,21 @@ def print_data_warnings(warnings):
             "    {0:s}\n        {1:s}\n".format(
                 color_issue_key(key),
                 "\n        ".join([w["msg"] for w in warnings[key]])))
+
+
+def print_comment_results(results):
+    """Print the per-issue results of the cjm.issue.request_comments_create_bulk function"""
+    def __fmt_result(result):
+        return {
+            cjm.issue.COMMENT_RESULT_POSTED: (
+                colorama.Fore.GREEN + result + colorama.Style.RESET_ALL),
+            cjm.issue.COMMENT_RESULT_PRESENT: (
+                colorama.Style.DIM + result + colorama.Style.RESET_ALL),
+            cjm.issue.COMMENT_RESULT_FAILED: (
+                colorama.Fore.RED + colorama.Style.BRIGHT + result + colorama.Style.RESET_ALL)
+        }.get(result, result)
+
+    print(tabulate.tabulate(
+        [(r["issue"]["key"], color_issue_comment(r["comment"]), __fmt_result(r["result"]))
+         for r in results],
+        headers=["Key", "Comment", "Result"], tablefmt="orgtbl"))
@@ -6,11 +6,16 @@
 # Project imports
 import cjm.codes
 import cjm.request
+import cjm.store
 
 
-def request_project_by_key(cfg, project_key):
-    """Request project data by jira project key"""
+def request_project_by_key(cfg, project_key, refresh=False):
+    """Request project data by jira project key. The data is taken from the local issue store if
+    possible (see cjm.store.request_resource)"""
+    def __request():
+        url = cjm.request.make_cj_url(cfg, "project", project_key)
+        response = cjm.request.make_cj_request(cfg, url)
+        return response.json()
 
-    url = cjm.request.make_cj_url(cfg, "project", project_key)
-    response = cjm.request.make_cj_request(cfg, url)
-    return response.json()
+    return cjm.store.request_resource(
+        cfg, "project/{0:s}".format(project_key), __request, refresh=refresh)
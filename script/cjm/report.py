@@ -6,19 +6,43 @@
 # Standard library imports
 import copy
 import datetime
+import io
 import os
+import sys
 
 # Third party imports
 import odf.dc
 import odf.namespaces
+import odf.opendocument
 import odf.text
 
 # Project imports
+import cjm.codes
+import cjm.data
+import cjm.snapshot
 import cjm.sprint
+import cjm.team
 
 
 ISO_DATE_STYLENAME = "N121"
 
+_TEMPLATE_CACHE = {}
+
+
+def load_template(cfg):
+    """Load a new document from the report template file (path.report template). The template file
+    content is read only once per process unless the file changes"""
+    template_path = os.path.abspath(cfg["path"]["report template"])
+    cache_key = (template_path, os.path.getmtime(template_path))
+    template_data = _TEMPLATE_CACHE.get(cache_key)
+
+    if template_data is None:
+        with open(template_path, "rb") as template_file:
+            template_data = template_file.read()
+        _TEMPLATE_CACHE[cache_key] = template_data
+
+    return odf.opendocument.load(io.BytesIO(template_data))
+
 
 def add_elements(parent_element, *elements):
     """Add given xml dom elements to the parent element and then return it"""
@@ -102,6 +126,14 @@ def make_sprint_period_val(cfg):
         cfg, cfg["sprint"]["start date"], cfg["sprint"]["end date"])
 
 
+def make_report_author_val(cfg):
+    """Compose report author name to be put into the report head table"""
+    if cfg["report"]["author"] is not None:
+        return cfg["report"]["author"]
+
+    return cjm.team.request_user_full_name(cfg)
+
+
 def make_sprint_workdays_val(capacity_data):
     """Compose sprint workday value to be put into the report head table"""
     return capacity_data["workday count"] - len(capacity_data["shared holidays"])
@@ -200,6 +232,18 @@ def add_report_arguments(group, default_output_file_path, defaults):
         default=default_template_path,
         help=("PATH to the report template file (default: '{0:s}')".format(default_template_path)))
 
+    group.add_argument(
+        "--author", action="store", metavar="NAME", dest="author_name",
+        help="NAME of the report author (default: full name of the jira user)")
+
+    group.add_argument(
+        "--snapshot", action="store", metavar="ID", dest="snapshot_ref",
+        help=(
+            "Take the sprint data from the snapshot identified by given ID (prefix) or the most"
+            " recent one of the sprint ('{0:s}') instead of the data files. The snapshot store"
+            " directory is specified by the --snapshot-dir option".format(
+                cjm.snapshot.SNAPSHOT_LATEST)))
+
     return group
 
 
@@ -211,5 +255,35 @@ def apply_options(cfg, options):
     cfg["path"]["output"] = options.output_file_path
     cfg["client"]["name"] = options.client_name
     cfg["path"]["report template"] = options.template_path
+    cfg["report"]["author"] = options.author_name
 
     return cfg
+
+
+def load_snapshot(cfg, options, sprint_data, kind=None):
+    """Load the sprint snapshot specified by the --snapshot option. Return None if the option is
+    not specified
+
+    The most recent snapshot is searched among the snapshots of given kind (if specified)"""
+    if options.snapshot_ref is None:
+        return None
+
+    if not cjm.snapshot.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The snapshot store directory is not specified. Use the '--snapshot-dir' CLI"
+            " option or the defaults file to specify it\n")
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+    return cjm.snapshot.load(
+        cfg, options.snapshot_ref, project_key=sprint_data["project"]["key"],
+        period=cjm.snapshot.make_period_name(cfg, sprint_data),
+        kind=kind if options.snapshot_ref == cjm.snapshot.SNAPSHOT_LATEST else None)
+
+
+def load_data(cfg, snapshot, variant):
+    """Load given sprint data variant (e.g. "capacity") from the data file or, if specified, from
+    the snapshot"""
+    if snapshot is None:
+        return cjm.data.load(cfg, cfg["path"][variant], "{0:s}.json".format(variant))
+
+    return cjm.snapshot.get_document(cfg, snapshot, variant)
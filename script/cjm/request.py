@@ -4,7 +4,13 @@
 """Jira API request wrappers and helpers"""
 
 # Standard library imports
+import concurrent.futures
+import contextlib
+import functools
+import importlib.util
 import sys
+import threading
+import time
 import urllib.parse
 
 # Third party imports
@@ -13,12 +19,34 @@ import requests
 # Project imports
 import cjm.cfg
 import cjm.codes
+import cjm.stream
 
 _CJ_API_PATH = "rest/api/3"
 _CJ_AGILE_PATH = "rest/agile/1.0"
 _CJ_GADGET_PATH = "/rest/gadget/1.0"
 _CJ_ISSUE_PATH = "/browse"
 
+PAGINATION_TOKEN = "token"
+PAGINATION_OFFSET = "offset"
+
+_THROTTLE_LOCK = threading.Lock()
+_THROTTLE_STATE = {"next slot": 0.0}
+
+BACKEND_REQUESTS = "requests"
+BACKEND_HTTPX = "httpx"
+
+# Modules needed to decode the content encodings other than gzip and deflate:
+_ENCODING_MODULES = {"br": ("brotli", "brotlicffi"), "zstd": ("zstandard",)}
+
+# All the requests made with given backend share one session, so connections to the jira host are
+#  reused:
+_SESSION_LOCK = threading.Lock()
+_SESSIONS = {}
+
+_MEMO_LOCK = threading.Lock()
+_MEMO_STACK = [{"responses": {}, "in flight": {}}]
+
+
 def _get_jira_host(cfg):
     """Retrieve the jira host name from given configuration data. Raise an exception if it is not
     specified"""
@@ -73,10 +101,9 @@ def make_cj_issue_url(cfg, *resource_path):
     return urllib.parse.urlunparse(url_parts)
 
 
-def make_cj_request(cfg, url, params=None, tolerate_404=True):
-    """Make Cloud Jira API GET request"""
-    params = {} if params is None else params
-
+def _get_auth(cfg):
+    """Retrieve the jira user name and token from given configuration data. Raise an exception if
+    any of them is not specified"""
     if cfg["jira"]["user"]["name"] is None:
         sys.stderr.write(
             "ERROR: Jira user name not specified. Use the '{0:s}' CLI option or the defaults"
@@ -89,9 +116,208 @@ def make_cj_request(cfg, url, params=None, tolerate_404=True):
             " file to specify it\n".format(cjm.cfg.USER_TOKEN_ARG_NAME))
         raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
 
-    response = requests.get(
-        url, params=params,
-        auth=(cfg["jira"]["user"]["name"], cfg["jira"]["user"]["token"]))
+    return (cfg["jira"]["user"]["name"], cfg["jira"]["user"]["token"])
+
+
+class _HttpxResponse:
+    """Adapter giving a httpx response the requests response interface used by this module"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.ok = response.is_success
+
+    def json(self):
+        """Decode the json response body"""
+        return self._response.json()
+
+    def iter_content(self, chunk_size=None):
+        """Iterate over the decoded response body chunks"""
+        return self._response.iter_bytes(chunk_size=chunk_size)
+
+    def close(self):
+        """Release the connection of a streamed response"""
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _HttpxSession:
+    """Adapter giving a HTTP/2 enabled httpx client the requests session interface used by this
+    module. Concurrent requests are multiplexed over a single connection"""
+
+    def __init__(self, httpx):
+        self._client = httpx.Client(http2=True, timeout=None)
+
+    def get(self, url, params=None, auth=None, headers=None):
+        """Make GET request"""
+        return _HttpxResponse(self._client.get(url, params=params, auth=auth, headers=headers))
+
+    def post(self, url, json=None, auth=None, headers=None, stream=False):
+        """Make POST request"""
+        request = self._client.build_request("POST", url, json=json, headers=headers)
+        return _HttpxResponse(self._client.send(request, auth=auth, stream=stream))
+
+
+def _make_session(backend):
+    """Create the session of given request backend. Raise an exception if the backend is unknown or
+    its packages are not installed"""
+    if backend == BACKEND_REQUESTS:
+        return requests.Session()
+
+    if backend != BACKEND_HTTPX:
+        sys.stderr.write(
+            "ERROR: Unknown request backend ('{0}'). Use '{1:s}' or '{2:s}'\n"
+            "".format(backend, BACKEND_REQUESTS, BACKEND_HTTPX))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+    try:
+        import httpx    # pylint: disable=import-outside-toplevel
+        return _HttpxSession(httpx)
+    except ImportError as e:
+        sys.stderr.write(
+            "ERROR: The '{0:s}' request backend needs the httpx package with HTTP/2 support"
+            " ('pip install httpx[http2]')\n".format(backend))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+
+def _get_session(cfg):
+    """Return the session of the configured request backend (jira.request.backend)"""
+    backend = cfg["jira"]["request"]["backend"]
+
+    with _SESSION_LOCK:
+        session = _SESSIONS.get(backend)
+
+        if session is None:
+            session = _SESSIONS[backend] = _make_session(backend)
+
+    return session
+
+
+@functools.lru_cache(maxsize=None)
+def _make_accept_encoding(encodings):
+    """Make the Accept-Encoding header value out of given content encodings skipping the ones which
+    can't be decoded with the installed packages"""
+    def __is_supported(encoding):
+        return any(
+            importlib.util.find_spec(m) is not None
+            for m in _ENCODING_MODULES.get(encoding, ("zlib",)))
+
+    supported = [e for e in encodings if __is_supported(e)]
+    return ", ".join(supported) if supported else "identity"
+
+
+def _make_headers(cfg):
+    return {"Accept-Encoding": _make_accept_encoding(
+        tuple(cfg["jira"]["request"]["compression"]))}
+
+
+def _throttle(cfg):
+    """Delay the calling thread so that the requests made by all the threads of the process don't
+    exceed the configured rate limit"""
+    rate_limit = cfg["jira"]["request"]["rate limit"]
+
+    if not rate_limit:
+        return
+
+    with _THROTTLE_LOCK:
+        now = time.monotonic()
+        slot = max(now, _THROTTLE_STATE["next slot"])
+        _THROTTLE_STATE["next slot"] = slot + 1.0 / rate_limit
+
+    if slot > now:
+        time.sleep(slot - now)
+
+
+@contextlib.contextmanager
+def memo_scope():
+    """Context manager running the enclosed block with a fresh, empty GET request memo
+
+    The memo of the enclosing scope (by default the process wide one) is neither consulted nor
+    updated within the block. Scopes are process wide, i.e. they affect all the threads"""
+    table = {"responses": {}, "in flight": {}}
+
+    with _MEMO_LOCK:
+        _MEMO_STACK.append(table)
+    try:
+        yield
+    finally:
+        with _MEMO_LOCK:
+            _MEMO_STACK.remove(table)
+
+
+def clear_memo():
+    """Forget all the GET responses memoized in the current memo scope"""
+    with _MEMO_LOCK:
+        _MEMO_STACK[-1]["responses"].clear()
+
+
+def _make_memo_key(auth, url, params):
+    return (auth[0], url, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+def _request_get(cfg, url, params, auth):
+    _throttle(cfg)
+    return _get_session(cfg).get(url, params=params, auth=auth, headers=_make_headers(cfg))
+
+
+def _request_get_memoized(cfg, url, params, auth):
+    """Make the GET request unless an identical one was already made in the current memo scope.
+    If an identical request is in flight, wait for its response instead of making a new one"""
+    key = _make_memo_key(auth, url, params)
+
+    with _MEMO_LOCK:
+        table = _MEMO_STACK[-1]
+        response = table["responses"].get(key)
+
+        if response is not None:
+            return response
+
+        future = table["in flight"].get(key)
+        leader = future is None
+
+        if leader:
+            future = concurrent.futures.Future()
+            table["in flight"][key] = future
+
+    if not leader:
+        return future.result()
+
+    try:
+        response = _request_get(cfg, url, params, auth)
+    except BaseException as e:
+        with _MEMO_LOCK:
+            del table["in flight"][key]
+        future.set_exception(e)
+        raise
+
+    with _MEMO_LOCK:
+        if response.status_code in (200, 404):
+            table["responses"][key] = response
+        del table["in flight"][key]
+    future.set_result(response)
+
+    return response
+
+
+def make_cj_request(cfg, url, params=None, tolerate_404=True, memo=True):
+    """Make Cloud Jira API GET request
+
+    Responses are memoized, i.e. an identical request made again in the same memo scope (see
+    memo_scope) is answered without a network call and concurrent identical requests are
+    coalesced into a single one. Use memo=False when a fresh response is required"""
+    params = {} if params is None else params
+    auth = _get_auth(cfg)
+
+    if memo:
+        response = _request_get_memoized(cfg, url, params, auth)
+    else:
+        response = _request_get(cfg, url, params, auth)
 
     if (response.status_code != 200) and not (response.status_code == 404 and tolerate_404):
         sys.stderr.write(
@@ -102,23 +328,14 @@ def make_cj_request(cfg, url, params=None, tolerate_404=True):
     return response
 
 
-def make_cj_post_request(cfg, url, json):
-    """Make Cloud Jira API POST request"""
-    if cfg["jira"]["user"]["name"] is None:
-        sys.stderr.write(
-            "ERROR: Jira user name not specified. Use the '{0:s}' CLI option or the defaults"
-            " file to specify it\n".format(cjm.cfg.USER_NAME_ARG_NAME))
-        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
-
-    if cfg["jira"]["user"]["token"] is None:
-        sys.stderr.write(
-            "ERROR: Jira user token not specified. Use the '{0:s}' CLI option or the defaults"
-            " file to specify it\n".format(cjm.cfg.USER_TOKEN_ARG_NAME))
-        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+def make_cj_post_request(cfg, url, json, stream=False):
+    """Make Cloud Jira API POST request. The body of a streamed response is read on demand (see
+    cjm.stream)"""
+    auth = _get_auth(cfg)
 
-    response = requests.post(
-        url, json=json,
-        auth=(cfg["jira"]["user"]["name"], cfg["jira"]["user"]["token"]))
+    _throttle(cfg)
+    response = _get_session(cfg).post(
+        url, json=json, auth=auth, headers=_make_headers(cfg), stream=stream)
 
     if not response.ok:
         sys.stderr.write(
@@ -127,3 +344,125 @@ def make_cj_post_request(cfg, url, json):
         raise cjm.codes.CjmError(cjm.codes.REQUEST_ERROR)
 
     return response
+
+
+def iterate_offset_pages(request_page_cb, items_key, page_size):
+    """Iterate over the items of an offset (startAt) paginated resource
+
+    The request_page_cb(start_at, max_results) callback returns the decoded response of a single
+    page. The offset is advanced by the number of the returned items, so pages trimmed by jira
+    (to its own maximum page size) don't cause any items to be skipped"""
+    start_at = 0
+
+    while True:
+        page = request_page_cb(start_at, page_size)
+        items = page[items_key]
+
+        yield from items
+
+        start_at += len(items)
+
+        if not items or page.get("isLast", False) or start_at >= page.get("total", start_at + 1):
+            break
+
+
+def iterate_token_pages(request_page_cb, items_key):
+    """Iterate over the items of a token (nextPageToken) paginated resource
+
+    The request_page_cb(page_token) callback returns the decoded response of a single page. The
+    token is None for the first page"""
+    page_token = None
+
+    while True:
+        page = request_page_cb(page_token)
+
+        yield from page[items_key]
+
+        page_token = page.get("nextPageToken")
+
+        if page.get("isLast", page_token is None) or page_token is None:
+            break
+
+
+def _request_search_page(cfg, url, json, issue_cb):
+    """Request single issue search page. If the issue callback is given, the issues are converted
+    with it while the response is being parsed (see cjm.stream)"""
+    if issue_cb is None:
+        return make_cj_post_request(cfg, url, json=json).json()
+
+    with make_cj_post_request(cfg, url, json=json, stream=True) as response:
+        return cjm.stream.parse_object(cjm.stream.iter_chunks(response), "issues", issue_cb)
+
+
+def _search_issues_by_token(cfg, jql, fields, issue_cb):
+    search_url = make_cj_url(cfg, "search", "jql")
+
+    def __request_page(page_token):
+        json = {"jql": jql, "maxResults": cfg["jira"]["search"]["page size"], "fields": fields}
+        if page_token is not None:
+            json["nextPageToken"] = page_token
+        return _request_search_page(cfg, search_url, json, issue_cb)
+
+    return list(iterate_token_pages(__request_page, "issues"))
+
+
+def _search_issues_by_offset(cfg, jql, fields, workers, issue_cb):
+    search_url = make_cj_url(cfg, "search")
+
+    def __request_page(start_at, max_results):
+        return _request_search_page(
+            cfg, search_url,
+            {"jql": jql, "startAt": start_at, "maxResults": max_results, "fields": fields},
+            issue_cb)
+
+    if workers <= 1:
+        return list(iterate_offset_pages(
+            __request_page, "issues", cfg["jira"]["search"]["page size"]))
+
+    # The first page determines the number of the remaining ones and the page size actually used
+    #  by jira. The remaining pages are requested concurrently:
+    first_page = __request_page(0, cfg["jira"]["search"]["page size"])
+    page_size = max(first_page["maxResults"], 1)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = [first_page] + list(executor.map(
+            lambda s: __request_page(s, page_size),
+            range(len(first_page["issues"]), first_page["total"], page_size)))
+
+    return [i for p in pages for i in p["issues"]]
+
+
+def search_issues(cfg, jql, fields, workers=1, issue_cb=None):
+    """Request all the issues matching given JQL query with given fields using the configured
+    pagination mode (jira.search.pagination)
+
+    The raw issues are returned unless the issue callback is given. In such case the responses are
+    parsed incrementally and every issue is replaced with the callback result (which has to keep the
+    issue "id") as soon as it is parsed, so the raw issues of a whole page are never kept in memory
+
+    The token mode walks the result set with the cursor returned by the enhanced search API, so the
+    pages are sequential. The offset mode uses the legacy search API. Its pages are requested by
+    up to given number of concurrent workers, but an issue may move between pages when the result
+    set changes during the search (e.g. an issue is updated), i.e. it may be returned twice or not
+    at all. Duplicates are removed in both modes"""
+    pagination = cfg["jira"]["search"]["pagination"]
+
+    if pagination == PAGINATION_TOKEN:
+        issues = _search_issues_by_token(cfg, jql, fields, issue_cb)
+    elif pagination == PAGINATION_OFFSET:
+        issues = _search_issues_by_offset(cfg, jql, fields, workers, issue_cb)
+    else:
+        sys.stderr.write(
+            "ERROR: Unknown issue search pagination mode ('{0}'). Use '{1:s}' or '{2:s}'\n"
+            "".format(pagination, PAGINATION_TOKEN, PAGINATION_OFFSET))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+    issue_ids = set()
+    unique_issues = []
+
+    for issue in issues:
+        if issue["id"] not in issue_ids:
+            issue_ids.add(issue["id"])
+            unique_issues.append(issue)
+
+    return unique_issues
@@ -4,16 +4,49 @@
 """JSON schema data handling helpers"""
 
 # Standard library imports
+import functools
 import os
 import json
 
+# Third party imports
+import jsonschema
+
 
 def make_subpath(schema_file):
     """Construct a relative schema file path"""
     return os.path.join("cjm", "schema", schema_file)
 
 
+@functools.lru_cache(maxsize=None)
+def _load_file(schema_path):
+    with open(schema_path) as schema_file:
+        return json.load(schema_file)
+
+
 def load(cfg, name):
-    """Load specified JSON schema"""
-    schema_path = os.path.join(cfg["path"]["data"], make_subpath(name))
-    return json.load(open(schema_path))
+    """Load specified JSON schema
+
+    Schemas are loaded once per process. The returned object is shared, so it must not be
+    modified"""
+    return _load_file(os.path.abspath(os.path.join(cfg["path"]["data"], make_subpath(name))))
+
+
+@functools.lru_cache(maxsize=None)
+def _make_validator(schema_path):
+    schema = _load_file(schema_path)
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
+def validate(cfg, data, name):
+    """Validate data against specified JSON schema. Raise the same error jsonschema.validate would
+
+    The schema itself is checked and its validator created once per process, so validating many
+    data files of the same kind does not pay for it again"""
+    error = jsonschema.exceptions.best_match(
+        _make_validator(
+            os.path.abspath(os.path.join(cfg["path"]["data"], make_subpath(name)))
+        ).iter_errors(data))
+    if error is not None:
+        raise error
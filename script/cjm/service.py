@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Long-running service executing cjm-* and sm-* scripts on behalf of cjm.client
+
+The service runs the scripts in its own process (see cjm.invoke), so the imports, the request
+session, the schema, field and report template caches and the local issue store connections stay
+warm between the runs. Requests are served one at a time as every run changes the process working
+directory and redirects its standard output and error streams.
+
+Protocol: the client sends a single JSON line {"script": NAME, "args": [...], "cwd": PATH} and
+receives a single JSON line {"code": EXIT_CODE, "stdout": TEXT, "stderr": TEXT}"""
+
+# Standard library imports
+import contextlib
+import glob
+import io
+import json
+import os
+import re
+import socketserver
+import sys
+import traceback
+
+# Project imports
+import cjm.codes
+import cjm.invoke
+import cjm.request
+
+
+# Scripts that are not run by the service (the long-running ones and the scripts managing their
+#  own worker processes):
+EXCLUDED_SCRIPTS = (
+    "cjm-service.py", "cjm-webhook-receiver.py", "sm-analyze-velocity.py", "sm-run-batch.py")
+
+_SCRIPT_NAME_RE = re.compile(r"^(cjm|sm)-[a-z0-9-]+\.py$")
+
+
+def list_scripts():
+    """List names of the scripts which can be run by the service"""
+    return sorted(
+        n for n in (os.path.basename(p) for p in glob.glob(
+            os.path.join(cjm.invoke.SCRIPT_DIR, "*.py")))
+        if _SCRIPT_NAME_RE.match(n) and n not in EXCLUDED_SCRIPTS)
+
+
+def execute(request):
+    """Execute single script run request. Return the response"""
+    script_name = request["script"]
+    stderr = io.StringIO()
+    stdout = ""
+    cwd = os.getcwd()
+
+    if script_name not in list_scripts():
+        return {
+            "code": cjm.codes.INVALID_ARGUMENT_ERROR, "stdout": "",
+            "stderr": "ERROR: The cjm service can't run the '{0:s}' script\n".format(script_name)}
+
+    try:
+        with contextlib.redirect_stderr(stderr), cjm.request.memo_scope():
+            try:
+                os.chdir(request["cwd"])
+                code, stdout = cjm.invoke.run_script(script_name, request["args"])
+            except Exception:   # pylint: disable=broad-except
+                # The service outlives failures of single runs. Exit code 1 is what python
+                #  returns for an uncaught exception:
+                traceback.print_exc(file=sys.stderr)
+                code = 1
+    finally:
+        os.chdir(cwd)
+
+    return {"code": code, "stdout": stdout, "stderr": stderr.getvalue()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+        except ValueError:
+            return
+
+        response = execute(request)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+def serve(socket_path, preload=True):
+    """Serve script run requests on the Unix socket with given path until interrupted"""
+    if preload:
+        for script_name in list_scripts():
+            cjm.invoke.load_script(script_name)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    # The service runs with the credentials of its owner, so nobody else may connect:
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(socket_path, _RequestHandler)
+    finally:
+        os.umask(old_umask)
+
+    try:
+        with server:
+            server.serve_forever()
+    finally:
+        os.unlink(socket_path)
@@ -0,0 +1,222 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Point-in-time sprint data snapshots kept in a compressed, content addressed store
+
+The snapshot store directory (path.snapshots configuration variable) contains:
+
+* objects/<xx>/<sha256>.json.gz - gzip compressed JSON objects named by the SHA-256 digest of
+  their canonical serialization. Every issue is stored as a separate object, so issues that
+  didn't change between snapshots are stored only once
+* index.jsonl - append-only list of snapshots (one JSON object per line) identifying the
+  snapshot manifest object together with the project key, sprint period, kind and creation time
+
+Objects are never modified or removed. Snapshots can be read without any jira access."""
+
+# Standard library imports
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+# Third party imports
+import isoweek
+
+# Project imports
+import cjm.codes
+import cjm.dates
+import cjm.journal
+import cjm.schema
+import cjm.sprint
+
+
+SNAPSHOT_KIND_COMMITMENT = "commitment"
+SNAPSHOT_KIND_DELIVERY = "delivery"
+
+SNAPSHOT_LATEST = "latest"
+
+_MANIFEST_VERSION = 1
+_INDEX_FILE_NAME = "index.jsonl"
+_OBJECTS_DIR_NAME = "objects"
+
+
+def is_enabled(cfg):
+    """Check if the snapshot store is configured"""
+    return cfg["path"]["snapshots"] is not None
+
+
+def make_period_name(cfg, sprint_data):
+    """Compose the sprint period name used to index snapshots (e.g. 2021-WW10-WW11)"""
+    start_date = cjm.dates.parse_date(sprint_data["start date"])
+    end_date = cjm.dates.parse_date(sprint_data["end date"])
+
+    return "{0:d}-{1:s}".format(
+        isoweek.Week.withdate(start_date).year,
+        cjm.sprint.generate_sprint_period_name(cfg, start_date, end_date))
+
+
+def _serialize(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _make_object_path(cfg, object_id):
+    return os.path.join(
+        cfg["path"]["snapshots"], _OBJECTS_DIR_NAME, object_id[:2],
+        "{0:s}.json.gz".format(object_id))
+
+
+def _make_index_path(cfg):
+    return os.path.join(cfg["path"]["snapshots"], _INDEX_FILE_NAME)
+
+
+def put_object(cfg, obj):
+    """Store given JSON serializable object unless it is already stored. Return its identifier"""
+    data = _serialize(obj)
+    object_id = hashlib.sha256(data).hexdigest()
+    object_path = _make_object_path(cfg, object_id)
+
+    if os.path.exists(object_path):
+        return object_id
+
+    try:
+        object_dir = os.path.dirname(object_path)
+        os.makedirs(object_dir, exist_ok=True)
+
+        # Write to a temporary file first so interrupted writes never leave a truncated object:
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=object_dir, suffix=".tmp")
+        try:
+            with os.fdopen(tmp_fd, "wb") as tmp_file:
+                tmp_file.write(gzip.compress(data, mtime=0))
+            os.replace(tmp_path, object_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except IOError as e:
+        sys.stderr.write("ERROR: Snapshot object ('{0:s}') I/O error\n".format(object_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+
+    return object_id
+
+
+def get_object(cfg, object_id):
+    """Load the stored object identified by given identifier"""
+    object_path = _make_object_path(cfg, object_id)
+
+    try:
+        with gzip.open(object_path, "rb") as object_file:
+            return json.loads(object_file.read().decode("utf-8"))
+    except (IOError, ValueError) as e:
+        sys.stderr.write("ERROR: Snapshot object ('{0:s}') read error\n".format(object_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+
+
+def _put_document(cfg, document):
+    """Store given data document. Issue lists are stored item by item"""
+    document = dict(document)
+    issue_ids = None
+
+    if isinstance(document.get("issues"), list):
+        issue_ids = [put_object(cfg, i) for i in document.pop("issues")]
+
+    return {"object": put_object(cfg, document), "issues": issue_ids}
+
+
+def _get_document(cfg, document_ref):
+    document = get_object(cfg, document_ref["object"])
+
+    if document_ref["issues"] is not None:
+        document["issues"] = [get_object(cfg, i) for i in document_ref["issues"]]
+
+    return document
+
+
+def record(cfg, kind, sprint_data, documents):
+    """Record a new snapshot of given kind consisting of the sprint data and given data documents
+    (a dictionary mapping data variants, e.g. "capacity", to the data). Return the index entry
+    of the recorded snapshot"""
+    manifest = {
+        "version": _MANIFEST_VERSION,
+        "sprint": _put_document(cfg, sprint_data),
+        "documents": {k: _put_document(cfg, v) for k, v in documents.items()}
+    }
+
+    entry = {
+        "id": put_object(cfg, manifest),
+        "kind": kind,
+        "project": sprint_data["project"]["key"],
+        "period": make_period_name(cfg, sprint_data),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    }
+
+    cjm.journal.append_entry(_make_index_path(cfg), entry)
+
+    return entry
+
+
+def list_snapshots(cfg, project_key=None, period=None, kind=None):
+    """Return index entries of recorded snapshots matching given criteria (None matches all) in
+    the recording order"""
+    return [
+        e for e in cjm.journal.load_entries(_make_index_path(cfg))
+        if (project_key is None or e["project"] == project_key) and
+        (period is None or e["period"] == period) and
+        (kind is None or e["kind"] == kind)]
+
+
+def find_snapshot(cfg, snapshot_ref, project_key=None, period=None, kind=None):
+    """Find the index entry of the snapshot identified by given reference: a (unique) snapshot id
+    prefix or SNAPSHOT_LATEST for the most recent snapshot matching the other criteria"""
+    entries = list_snapshots(cfg, project_key, period, kind)
+
+    if snapshot_ref == SNAPSHOT_LATEST:
+        matching = entries[-1:]
+    else:
+        matching = list({e["id"]: e for e in entries if e["id"].startswith(snapshot_ref)}.values())
+
+    if not matching:
+        sys.stderr.write("ERROR: Snapshot '{0:s}' not found\n".format(snapshot_ref))
+        raise cjm.codes.CjmError(cjm.codes.INVALID_ARGUMENT_ERROR)
+
+    if len(matching) > 1:
+        sys.stderr.write(
+            "ERROR: Snapshot id prefix '{0:s}' is ambiguous ({1:s})\n"
+            "".format(snapshot_ref, ", ".join(e["id"][:12] for e in matching)))
+        raise cjm.codes.CjmError(cjm.codes.INVALID_ARGUMENT_ERROR)
+
+    return matching[0]
+
+
+def load(cfg, snapshot_ref, project_key=None, period=None, kind=None):
+    """Load the snapshot identified by given reference (see find_snapshot). The returned
+    dictionary contains the index entry items together with the sprint data ("sprint") and the
+    data documents ("documents")"""
+    entry = find_snapshot(cfg, snapshot_ref, project_key, period, kind)
+    manifest = get_object(cfg, entry["id"])
+
+    snapshot = dict(entry)
+    snapshot["sprint"] = _get_document(cfg, manifest["sprint"])
+    snapshot["documents"] = {
+        k: _get_document(cfg, v) for k, v in manifest["documents"].items()}
+
+    return snapshot
+
+
+def get_document(cfg, snapshot, variant):
+    """Return given data variant (e.g. "commitment") of the loaded snapshot validated against
+    its schema"""
+    document = snapshot["documents"].get(variant)
+
+    if document is None:
+        sys.stderr.write(
+            "ERROR: The {0:s} snapshot {1:s} doesn't contain the {2:s} data\n"
+            "".format(snapshot["kind"], snapshot["id"][:12], variant))
+        raise cjm.codes.CjmError(cjm.codes.INPUT_DATA_ERROR)
+
+    cjm.schema.validate(cfg, document, "{0:s}.json".format(variant))
+
+    return document
@@ -6,6 +6,8 @@
 # Standard imports
 import datetime
 import json
+import os.path
+import sys
 
 # Third party imports
 import jsonschema
@@ -16,6 +18,7 @@ import cjm.issue
 import cjm.schema
 import cjm.request
 import cjm.codes
+import cjm.store
 
 
 def apply_data_file_paths(cfg, sprint_data):
@@ -35,6 +38,62 @@ def apply_data_file_paths(cfg, sprint_data):
     return cfg
 
 
+SPRINT_LIST_CONFIG_FILE = ".stl.json"
+
+
+def load_sprint_list(list_path):
+    """Load sprint data file paths from given sprint list file: a json list of the paths (if the
+    file name has the .json extension) or a text file with one path per line (lines starting
+    with '#' are ignored). The paths are relative to the list file directory"""
+    try:
+        with open(list_path, encoding="utf-8") as list_file:
+            if list_path.endswith(".json"):
+                lines = json.load(list_file)
+            else:
+                lines = [l.strip() for l in list_file]
+    except IOError as e:
+        sys.stderr.write("ERROR: Sprint list file ('{0:s}') I/O error\n".format(list_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+    except json.JSONDecodeError as e:
+        sys.stderr.write("ERROR: Sprint list file ('{0:s}') decoding error\n".format(list_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.INPUT_DATA_ERROR)
+
+    if not isinstance(lines, list) or not all(isinstance(l, str) for l in lines):
+        sys.stderr.write(
+            "ERROR: Sprint list file ('{0:s}') is not a list of paths\n".format(list_path))
+        raise cjm.codes.CjmError(cjm.codes.INPUT_DATA_ERROR)
+
+    list_dir = os.path.dirname(list_path)
+
+    return [os.path.join(list_dir, l) for l in lines if l and not l.startswith("#")]
+
+
+def find_config_sprint_list(config_path=SPRINT_LIST_CONFIG_FILE):
+    """Return the path of the sprint list file referenced by given sprint list configuration file
+    (the "sprint list file" under the "sow data path", both relative to the configuration file
+    directory). Return None if the configuration file doesn't exist"""
+    if not os.path.exists(config_path):
+        return None
+
+    try:
+        with open(config_path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+        return os.path.join(
+            os.path.dirname(config_path), config["sow data path"], config["sprint list file"])
+    except IOError as e:
+        sys.stderr.write(
+            "ERROR: Sprint list configuration file ('{0:s}') I/O error\n".format(config_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        sys.stderr.write(
+            "ERROR: Sprint list configuration file ('{0:s}') is invalid\n".format(config_path))
+        sys.stderr.write("    {0}\n".format(e))
+        raise cjm.codes.CjmError(cjm.codes.CONFIGURATION_ERROR)
+
+
 def get_iso_week(date):
     """Determine ISO week number"""
     return date.isocalendar()[1]
@@ -105,54 +164,42 @@ def load_data(cfg, sprint_file):
 
 
 def request_issues_by_sprint(cfg):
-    """Request all issues associated with given sprint"""
-    issues = []
+    """Request all issues associated with given sprint
 
-    sprint_issues_url = cjm.request.make_cj_agile_url(
-        cfg, "sprint/{0:d}/issue".format(cfg["sprint"]["id"]))
+    The issues are taken from the local issue store when it is fresh enough (see cjm.store) and
+    it knows any issue of the sprint. In such case only issues of the current project are
+    returned"""
+    conn = cjm.store.fresh_connection(cfg)
 
-    start_at = 0
-    max_results = 50
+    if conn is not None:
+        issues = cjm.store.query_issues_by_sprint(cfg, conn, cfg["sprint"]["id"])
+        if issues is not None:
+            return issues
 
-    while True:
-        response = cjm.request.make_cj_request(
-            cfg, sprint_issues_url,
-            {"startAt": start_at, "maxResults": max_results})
-        response_json = response.json()
-
-        for issue in response_json["issues"]:
-            issues.append(cjm.issue.extract_issue_data(cfg, issue))
-
-        start_at += max_results
+    sprint_issues_url = cjm.request.make_cj_agile_url(
+        cfg, "sprint/{0:d}/issue".format(cfg["sprint"]["id"]))
 
-        if start_at >= response_json["total"]:
-            break
+    def __request_page(start_at, max_results):
+        return cjm.request.make_cj_request(
+            cfg, sprint_issues_url, {"startAt": start_at, "maxResults": max_results}).json()
 
-    return issues
+    return [
+        cjm.issue.extract_issue_data(cfg, i)
+        for i in cjm.request.iterate_offset_pages(
+            __request_page, "issues", cfg["jira"]["search"]["page size"])]
 
 
 def request_issues_by_comment(cfg, comment):
-    """Request all issues with given comment"""
-    issues = []
-
-    sprint_issues_url = cjm.request.make_cj_url(cfg, "search")
-
-    jql = 'project = "{0:s}" AND comment ~ "{1:s}"'.format(cfg["project"]["key"], comment)
-    start_at = 0
-    max_results = 50
-
-    while True:
-        response = cjm.request.make_cj_post_request(
-            cfg, sprint_issues_url,
-            json={"jql": jql, "startAt": start_at, "maxResults": max_results})
-        response_json = response.json()
+    """Request all issues with given comment
 
-        for issue in response_json["issues"]:
-            issues.append(cjm.issue.extract_issue_data(cfg, issue))
+    The issues are taken from the local issue store when it is fresh enough (see cjm.store)"""
+    conn = cjm.store.fresh_connection(cfg)
 
-        start_at += max_results
+    if conn is not None:
+        return cjm.store.query_issues_by_comment(cfg, conn, comment)
 
-        if start_at >= response_json["total"]:
-            break
+    jql = 'project = "{0:s}" AND comment ~ "{1:s}"'.format(cfg["project"]["key"], comment)
 
-    return issues
+    return cjm.request.search_issues(
+        cfg, jql, cjm.issue.make_issue_data_fields(cfg),
+        issue_cb=lambda i: cjm.issue.extract_issue_data(cfg, i))
@@ -0,0 +1,553 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Local SQLite issue store kept up to date by incremental JQL synchronization
+
+The store keeps issues, their comments and selected field values per project. The fetchers in
+cjm.sprint and cjm.issue answer from the store when it is enabled (path.store configuration
+variable) and the project was synchronized less than store.max age seconds ago. Otherwise they
+fall back to jira requests.
+
+Comment tags (whitespace separated comment tokens containing a slash, e.g. sprint management
+comments or task tracking ids) are indexed, so looking up issues carrying a given tag doesn't
+scan the comments."""
+
+# Standard library imports
+import concurrent.futures
+import importlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# Project imports
+import cjm.codes
+import cjm.request
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issue (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    project TEXT NOT NULL,
+    updated TEXT
+);
+CREATE INDEX IF NOT EXISTS issue_key ON issue (key);
+CREATE TABLE IF NOT EXISTS field_value (
+    issue_id INTEGER NOT NULL,
+    field_id TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (issue_id, field_id)
+);
+CREATE TABLE IF NOT EXISTS issue_sprint (
+    sprint_id INTEGER NOT NULL,
+    issue_id INTEGER NOT NULL,
+    PRIMARY KEY (sprint_id, issue_id)
+);
+CREATE INDEX IF NOT EXISTS issue_sprint_issue ON issue_sprint (issue_id);
+CREATE TABLE IF NOT EXISTS comment (
+    id INTEGER PRIMARY KEY,
+    issue_id INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    updated TEXT
+);
+CREATE INDEX IF NOT EXISTS comment_issue ON comment (issue_id);
+CREATE TABLE IF NOT EXISTS comment_tag (
+    tag TEXT NOT NULL,
+    comment_id INTEGER NOT NULL,
+    issue_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, comment_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS comment_tag_comment ON comment_tag (comment_id);
+CREATE TABLE IF NOT EXISTS resource (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync (
+    project TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+"""
+
+# The incremental synchronization requests issues updated within the number of minutes elapsed
+#  since the previous synchronization start increased by this margin. The relative JQL date
+#  form is used to stay independent of the jira user profile time zone:
+_SYNC_MARGIN_MINUTES = 2
+
+_SPRINT_ID_RE = re.compile(r"\bid=(?P<id>[0-9]+)")
+
+# Version of the database layout (PRAGMA user_version). Databases with an older version get their
+#  derived tables rebuilt when opened:
+_SCHEMA_VERSION = 1
+
+# Comment tags are the whitespace separated comment tokens containing a slash, e.g. sprint
+#  management comments (Mobica/<sow>/<code>/WWxx/Committed) or task tracking ids. Surrounding
+#  punctuation is not a part of the tag:
+_TAG_TOKEN_RE = re.compile(r"\S*/\S*")
+_TAG_STRIP_CHARS = ".,;:!?\"'()"
+
+# Upper bound of a tag prefix range query (the greatest code point):
+_TAG_PREFIX_END = chr(0x10FFFF)
+
+# Maximum number of issue keys bound to a single query (older SQLite builds allow up to 999 bound
+#  variables per statement)
+_KEY_CHUNK_SIZE = 500
+
+_STORE_LOCK = threading.RLock()
+_CONNECTIONS = {}
+
+
+def _issue_module():
+    """Return the cjm.issue module. It is imported on first use, as it imports this module"""
+    return importlib.import_module("cjm.issue")
+
+
+def is_enabled(cfg):
+    """Check if the local issue store is enabled"""
+    return cfg["path"]["store"] is not None
+
+
+def connect(cfg):
+    """Return the (cached) connection to the store database. Create the database if needed"""
+    store_path = cfg["path"]["store"]
+
+    with _STORE_LOCK:
+        conn = _CONNECTIONS.get(store_path)
+
+        if conn is None:
+            try:
+                store_dir = os.path.dirname(os.path.abspath(store_path))
+                os.makedirs(store_dir, exist_ok=True)
+                conn = sqlite3.connect(store_path, check_same_thread=False)
+                conn.executescript(_SCHEMA)
+                _upgrade_schema(conn)
+            except (IOError, sqlite3.Error) as e:
+                sys.stderr.write(
+                    "ERROR: Issue store ('{0:s}') access error\n".format(store_path))
+                sys.stderr.write("    {0}\n".format(e))
+                raise cjm.codes.CjmError(cjm.codes.FILESYSTEM_ERROR)
+            _CONNECTIONS[store_path] = conn
+
+    return conn
+
+
+def _upgrade_schema(conn):
+    """Rebuild the derived tables of a database created by an older version of the store"""
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+
+    if version < 1:
+        conn.execute("DELETE FROM comment_tag")
+        for comment_id, issue_id, body in conn.execute(
+                "SELECT id, issue_id, body FROM comment").fetchall():
+            _insert_comment_tags(conn, comment_id, issue_id, body)
+
+    if version < _SCHEMA_VERSION:
+        conn.execute("PRAGMA user_version = {0:d}".format(_SCHEMA_VERSION))
+        conn.commit()
+
+
+def commit(conn):
+    """Make the store changes made so far durable"""
+    with _STORE_LOCK:
+        conn.commit()
+
+
+def get_synced_at(conn, project_key):
+    """Return the unix timestamp of the last successful synchronization start of given project
+    or None if the project was never synchronized"""
+    with _STORE_LOCK:
+        row = conn.execute(
+            "SELECT synced_at FROM sync WHERE project = ?", (project_key,)).fetchone()
+    return None if row is None else row[0]
+
+
+def mark_synced(conn, project_key, synced_at):
+    """Record that the stored data of given project was complete at given unix timestamp, e.g.
+    when a webhook event is applied by a receiver running since the last synchronization. Earlier
+    timestamps and the projects never synchronized are ignored"""
+    with _STORE_LOCK:
+        conn.execute(
+            "UPDATE sync SET synced_at = MAX(synced_at, ?) WHERE project = ?",
+            (synced_at, project_key))
+
+
+def invalidate_issue(cfg, issue_ref):
+    """Make the stored data of the project of given issue (key or id) stale after the current
+    process changed the issue in jira, so the data is neither used in place of jira requests nor
+    skipped by the next update. The synchronization time is only moved back, which widens the next
+    incremental synchronization. All the projects are invalidated if the issue project can't be
+    determined"""
+    if not is_enabled(cfg):
+        return
+
+    conn = connect(cfg)
+    issue_ref = str(issue_ref)
+    stale_at = time.time() - max(cfg["store"]["max age"], cfg["store"]["sync interval"]) - 1
+
+    with _STORE_LOCK:
+        row = conn.execute(
+            "SELECT project FROM issue WHERE key = ? OR id = ?", (issue_ref, issue_ref)).fetchone()
+
+        if row is not None:
+            project_key = row[0]
+        elif "-" in issue_ref:
+            project_key = issue_ref.rsplit("-", 1)[0]
+        else:
+            project_key = None
+
+        if project_key is None:
+            conn.execute("UPDATE sync SET synced_at = MIN(synced_at, ?)", (stale_at,))
+        else:
+            conn.execute(
+                "UPDATE sync SET synced_at = MIN(synced_at, ?) WHERE project = ?",
+                (stale_at, project_key))
+        conn.commit()
+
+
+def list_synced_projects(conn):
+    """Return the sorted list of keys of the projects synchronized so far"""
+    with _STORE_LOCK:
+        return [p for (p,) in conn.execute("SELECT project FROM sync ORDER BY project").fetchall()]
+
+
+def fresh_connection(cfg):
+    """Return the store connection if the store is enabled and the current project (project.key)
+    data is fresh enough to be used instead of jira requests. Return None otherwise"""
+    if not is_enabled(cfg) or cfg["project"]["key"] is None:
+        return None
+
+    conn = connect(cfg)
+    synced_at = get_synced_at(conn, cfg["project"]["key"])
+
+    if synced_at is None or time.time() - synced_at > cfg["store"]["max age"]:
+        return None
+
+    return conn
+
+
+def get_resource(cfg, name):
+    """Return the stored value of given jira resource (e.g. the field list) if the store is enabled
+    and the value is younger than store.resource max age seconds. Return None otherwise"""
+    if not is_enabled(cfg):
+        return None
+
+    conn = connect(cfg)
+
+    with _STORE_LOCK:
+        row = conn.execute(
+            "SELECT value, fetched_at FROM resource WHERE name = ?", (name,)).fetchone()
+
+    if row is None or time.time() - row[1] > cfg["store"]["resource max age"]:
+        return None
+
+    return json.loads(row[0])
+
+
+def put_resource(cfg, name, value):
+    """Store the value of given jira resource if the store is enabled"""
+    if not is_enabled(cfg):
+        return
+
+    conn = connect(cfg)
+
+    with _STORE_LOCK:
+        conn.execute(
+            "INSERT OR REPLACE INTO resource (name, value, fetched_at) VALUES (?, ?, ?)",
+            (name, json.dumps(value), time.time()))
+        conn.commit()
+
+
+def request_resource(cfg, name, request_cb, refresh=False):
+    """Return the value of given jira resource. Take it from the store if possible, otherwise
+    request it using given callback and store it"""
+    value = None if refresh else get_resource(cfg, name)
+
+    if value is None:
+        value = request_cb()
+        put_resource(cfg, name, value)
+
+    return value
+
+
+def make_field_list(cfg):
+    """Determine the list of issue fields kept in the store"""
+    if cfg["jira"]["fields"]["story points"] is None:
+        cfg["jira"]["fields"]["story points"] = _issue_module().detect_story_point_field_id(cfg)
+
+    if cfg["jira"]["fields"]["sprint"] is None:
+        cfg["jira"]["fields"]["sprint"] = _issue_module().detect_sprint_field_id(cfg)
+
+    return [
+        f for f in (
+            "summary", "assignee", "status", "resolutiondate", "updated", "issuetype",
+            cfg["jira"]["fields"]["story points"], cfg["jira"]["fields"]["sprint"])
+        if f is not None]
+
+
+def _extract_sprint_ids(value):
+    """Extract sprint ids from the sprint field value (a list of sprint objects or, in case of
+    older jira versions, a list of serialized sprint strings)"""
+    sprint_ids = []
+
+    for sprint in value or []:
+        if isinstance(sprint, dict):
+            sprint_ids.append(int(sprint["id"]))
+        else:
+            m = _SPRINT_ID_RE.search(str(sprint))
+            if m is not None:
+                sprint_ids.append(int(m.group("id")))
+
+    return sprint_ids
+
+
+def extract_tags(text):
+    """Extract the set of comment tags found in given text"""
+    tags = set()
+
+    for token in _TAG_TOKEN_RE.findall(text):
+        token = token.strip(_TAG_STRIP_CHARS)
+        if "/" in token:
+            tags.add(token)
+
+    return tags
+
+
+def _insert_comment_tags(conn, comment_id, issue_id, body):
+    conn.executemany(
+        "INSERT OR IGNORE INTO comment_tag (tag, comment_id, issue_id) VALUES (?, ?, ?)",
+        [(t, comment_id, issue_id) for t in extract_tags(body)])
+
+
+def upsert_comment(conn, issue_id, comment):
+    """Insert or replace given raw jira comment of the specified issue and update the comment
+    tag index"""
+    comment_id = int(comment["id"])
+    body = "\n".join(_issue_module().extract_comment_texts(comment))
+
+    with _STORE_LOCK:
+        conn.execute(
+            "INSERT OR REPLACE INTO comment (id, issue_id, body, updated) VALUES (?, ?, ?, ?)",
+            (comment_id, issue_id, body, comment.get("updated")))
+        conn.execute("DELETE FROM comment_tag WHERE comment_id = ?", (comment_id,))
+        _insert_comment_tags(conn, comment_id, issue_id, body)
+
+
+def delete_comment(conn, comment_id):
+    """Remove given comment from the store"""
+    with _STORE_LOCK:
+        conn.execute("DELETE FROM comment_tag WHERE comment_id = ?", (int(comment_id),))
+        conn.execute("DELETE FROM comment WHERE id = ?", (int(comment_id),))
+
+
+def upsert_issue(cfg, conn, issue, project_key, comments=None):
+    """Insert or replace given raw jira issue (as returned by the search API) together with its
+    field values and, if specified, the complete list of its raw comments"""
+    issue_id = int(issue["id"])
+    fields = issue["fields"]
+    sprint_field = cfg["jira"]["fields"]["sprint"]
+
+    with _STORE_LOCK:
+        conn.execute(
+            "INSERT OR REPLACE INTO issue (id, key, project, updated) VALUES (?, ?, ?, ?)",
+            (issue_id, issue["key"], project_key, fields.get("updated")))
+        conn.execute("DELETE FROM field_value WHERE issue_id = ?", (issue_id,))
+        conn.executemany(
+            "INSERT INTO field_value (issue_id, field_id, value) VALUES (?, ?, ?)",
+            [(issue_id, k, json.dumps(v)) for k, v in fields.items() if k != "comment"])
+
+        if sprint_field is not None and sprint_field in fields:
+            conn.execute("DELETE FROM issue_sprint WHERE issue_id = ?", (issue_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO issue_sprint (sprint_id, issue_id) VALUES (?, ?)",
+                [(s, issue_id) for s in _extract_sprint_ids(fields[sprint_field])])
+
+        if comments is not None:
+            conn.execute("DELETE FROM comment_tag WHERE issue_id = ?", (issue_id,))
+            conn.execute("DELETE FROM comment WHERE issue_id = ?", (issue_id,))
+            for comment in comments:
+                upsert_comment(conn, issue_id, comment)
+
+
+def delete_issue(conn, issue_id):
+    """Remove given issue and all its dependent data from the store"""
+    issue_id = int(issue_id)
+
+    with _STORE_LOCK:
+        for table, column in (
+                ("comment_tag", "issue_id"), ("comment", "issue_id"), ("issue_sprint", "issue_id"),
+                ("field_value", "issue_id"), ("issue", "id")):
+            conn.execute("DELETE FROM {0:s} WHERE {1:s} = ?".format(table, column), (issue_id,))
+
+
+def _delete_missing_issues(conn, project_key, issue_ids):
+    """Remove stored issues of given project which are not in given set of issue ids"""
+    with _STORE_LOCK:
+        stored_ids = [
+            i for (i,) in conn.execute(
+                "SELECT id FROM issue WHERE project = ?", (project_key,)).fetchall()]
+
+    for issue_id in stored_ids:
+        if issue_id not in issue_ids:
+            delete_issue(conn, issue_id)
+
+
+def _request_issue_comments(cfg, issue):
+    """Return the complete comment list of given raw issue. Request the remaining comments if
+    the search response contains only some of them"""
+    comment_field = issue["fields"].get("comment", {})
+    comments = comment_field.get("comments", [])
+
+    if comment_field.get("total", len(comments)) > len(comments):
+        comments = _issue_module().request_issue_comments(cfg, issue["key"], memo=False)
+
+    return comments
+
+
+def sync_project(cfg, full=False):
+    """Synchronize the current project (project.key) issues with the store. Request only issues
+    updated since the last synchronization unless the full synchronization is requested.
+    Return the number of stored issues
+
+    The incremental synchronization doesn't notice issues deleted or moved to another project, as
+    they are not returned by the search anymore. The full synchronization removes them"""
+    conn = connect(cfg)
+    project_key = cfg["project"]["key"]
+    started_at = time.time()
+    synced_at = get_synced_at(conn, project_key)
+
+    jql = 'project = "{0:s}"'.format(project_key)
+
+    if synced_at is not None and not full:
+        jql += ' AND updated >= "-{0:d}m"'.format(
+            int(started_at - synced_at) // 60 + _SYNC_MARGIN_MINUTES)
+
+    jql += " ORDER BY updated ASC"
+
+    workers = cfg["jira"]["request"]["workers"]
+    issues = cjm.request.search_issues(
+        cfg, jql, make_field_list(cfg) + ["comment"], workers=workers)
+
+    # The comments missing in the search results are requested concurrently:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        comment_lists = list(executor.map(lambda i: _request_issue_comments(cfg, i), issues))
+
+    for issue, comments in zip(issues, comment_lists):
+        upsert_issue(cfg, conn, issue, project_key, comments=comments)
+
+    if synced_at is None or full:
+        _delete_missing_issues(conn, project_key, {int(i["id"]) for i in issues})
+
+    with _STORE_LOCK:
+        conn.execute(
+            "INSERT OR REPLACE INTO sync (project, synced_at) VALUES (?, ?)",
+            (project_key, started_at))
+        conn.commit()
+
+    return len(issues)
+
+
+def update(cfg):
+    """Bring the current project data in the store up to date if the store is enabled. Skip the
+    synchronization if the previous one started less than store.sync interval seconds ago (e.g. the
+    store was just prefetched)"""
+    if not is_enabled(cfg) or cfg["project"]["key"] is None:
+        return
+
+    synced_at = get_synced_at(connect(cfg), cfg["project"]["key"])
+
+    if synced_at is None or time.time() - synced_at >= cfg["store"]["sync interval"]:
+        sync_project(cfg)
+
+
+def _load_issues(cfg, conn, where, params):
+    """Load issues matching given SQL condition and convert them using
+    cjm.issue.extract_issue_data"""
+    with _STORE_LOCK:
+        rows = conn.execute(
+            "SELECT issue.id, issue.key, field_value.field_id, field_value.value"
+            " FROM issue LEFT JOIN field_value ON field_value.issue_id = issue.id"
+            " WHERE {0:s} ORDER BY issue.id".format(where), params).fetchall()
+
+    raw_lut = {}
+
+    for issue_id, key, field_id, value in rows:
+        raw = raw_lut.setdefault(issue_id, {"id": issue_id, "key": key, "fields": {}})
+        if field_id is not None:
+            raw["fields"][field_id] = json.loads(value)
+
+    return [_issue_module().extract_issue_data(cfg, raw) for raw in raw_lut.values()]
+
+
+def query_issues_by_keys(cfg, conn, issue_keys):
+    """Return stored issues identified by one of given keys. The keys are queried in chunks, so
+    the number of bound variables stays within the SQLite limit"""
+    issue_keys = list(issue_keys)
+    issues = []
+
+    for i in range(0, len(issue_keys), _KEY_CHUNK_SIZE):
+        chunk = issue_keys[i:i + _KEY_CHUNK_SIZE]
+        issues += _load_issues(
+            cfg, conn, "issue.key IN ({0:s})".format(", ".join("?" * len(chunk))), chunk)
+
+    # Keep the issue id order of the single query across the chunks:
+    return sorted(issues, key=lambda i: i["id"])
+
+
+def query_issues_by_sprint(cfg, conn, sprint_id):
+    """Return stored issues associated with given sprint. Return None if there are none, as the
+    sprint index is empty when the sprint field was not known during the synchronization; the
+    issues have to be requested from jira then"""
+    issues = _load_issues(
+        cfg, conn,
+        "issue.id IN (SELECT issue_id FROM issue_sprint WHERE sprint_id = ?)", (int(sprint_id),))
+    return issues or None
+
+
+def query_issues_by_tag(cfg, conn, tag, prefix=False):
+    """Return stored issues of the current project with a comment carrying given tag or, if
+    prefix is set, any tag starting with given string"""
+    if prefix:
+        condition, params = "tag >= ? AND tag < ?", (tag, tag + _TAG_PREFIX_END)
+    else:
+        condition, params = "tag = ?", (tag,)
+
+    return _load_issues(
+        cfg, conn,
+        "issue.project = ? AND issue.id IN"
+        " (SELECT issue_id FROM comment_tag WHERE {0:s})".format(condition),
+        (cfg["project"]["key"],) + params)
+
+
+def query_issues_by_comment(cfg, conn, comment):
+    """Return stored issues of the current project with a comment containing given text
+
+    Texts being a single comment tag are looked up in the comment tag index. Other texts fall
+    back to a substring search over all the stored comments"""
+    if extract_tags(comment) == {comment}:
+        return query_issues_by_tag(cfg, conn, comment)
+
+    pattern = "%{0:s}%".format(re.sub(r"([\\%_])", r"\\\1", comment))
+    return _load_issues(
+        cfg, conn,
+        "issue.project = ? AND issue.id IN"
+        " (SELECT issue_id FROM comment WHERE body LIKE ? ESCAPE '\\')",
+        (cfg["project"]["key"], pattern))
+
+
+def query_issue_comment_texts(conn, issue_key):
+    """Return the paragraph texts of all the stored comments of given issue (one list per
+    comment). Return None if the issue is not stored"""
+    with _STORE_LOCK:
+        row = conn.execute("SELECT id FROM issue WHERE key = ?", (issue_key,)).fetchone()
+
+        if row is None:
+            return None
+
+        bodies = conn.execute(
+            "SELECT body FROM comment WHERE issue_id = ? ORDER BY id", (row[0],)).fetchall()
+
+    return [body.split("\n") for (body,) in bodies]
@@ -0,0 +1,134 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Incremental parsing of large json API responses
+
+The structure of the top level object is walked by the parser, its member values and the elements
+of the streamed array are decoded by the json module one at a time. A value spanning multiple body
+chunks is decoded again once the next chunk arrives, so at most one raw array element is kept in
+memory"""
+
+# Standard library imports
+import codecs
+import json
+import re
+
+_CHUNK_SIZE = 65536
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_DELIMITERS = ",:]} \t\n\r"
+
+
+class _Reader:
+    """Text buffer filled on demand from the response body chunks"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.complete = False
+
+    def fill(self):
+        """Append the next chunk to the buffer dropping its already parsed part. Raise ValueError
+        if there is no more data"""
+        if self.complete:
+            raise ValueError("Unexpected end of json data")
+
+        chunk = next(self.chunks, None)
+
+        if chunk is None:
+            self.complete = True
+            chunk = self.decoder.decode(b"", final=True)
+        else:
+            chunk = self.decoder.decode(chunk)
+
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Skip the whitespace and return the next character"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            self.fill()
+
+    def expect(self, characters):
+        """Consume the next character. Raise ValueError if it is not one of given ones"""
+        character = self.peek()
+
+        if character not in characters:
+            raise ValueError("Unexpected character in json data: '{0:s}'".format(character))
+
+        self.pos += 1
+
+        return character
+
+    def value(self):
+        """Consume and decode the next json value"""
+        self.peek()
+
+        while True:
+            # A value failing to decode or not followed by a delimiter (e.g. a number cut in the
+            #  middle) may continue in the next chunk:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except ValueError:
+                if self.complete:
+                    raise
+                end = None
+
+            if end is not None and (
+                    self.complete or (end < len(self.text) and self.text[end] in _DELIMITERS)):
+                break
+
+            self.fill()
+
+        self.pos = end
+
+        return value
+
+
+def iter_chunks(response):
+    """Iterate over the body chunks of a streamed (stream=True) response"""
+    return response.iter_content(chunk_size=_CHUNK_SIZE)
+
+
+def parse_object(chunks, array_key, item_cb):
+    """Parse json object from given body chunks. Elements of the array stored under given key are
+    converted with item_cb as soon as they are parsed and only the conversion results are kept.
+    Return the object. Raise ValueError if the data is not a valid json object"""
+    reader = _Reader(chunks)
+    result = {}
+
+    reader.expect("{")
+
+    if reader.peek() == "}":
+        return result
+
+    while True:
+        key = reader.value()
+
+        if not isinstance(key, str):
+            raise ValueError("Json object key expected")
+
+        reader.expect(":")
+
+        if key == array_key and reader.peek() == "[":
+            reader.expect("[")
+            items = result[key] = []
+
+            if reader.peek() != "]":
+                while True:
+                    items.append(item_cb(reader.value()))
+                    if reader.expect(",]") == "]":
+                        break
+            else:
+                reader.expect("]")
+        else:
+            result[key] = reader.value()
+
+        if reader.expect(",}") == "}":
+            return result
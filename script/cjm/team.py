@@ -12,6 +12,7 @@ import jsonschema
 # Project imports
 import cjm.schema
 import cjm.request
+import cjm.store
 
 
 def load_data(cfg, team_file):
@@ -22,21 +23,56 @@ def load_data(cfg, team_file):
     return data
 
 
+class Team:
+    """Team data (as returned by cjm.team.load_data) indexed for constant time person lookups
+
+    Build it once per team data file and share it between all the functions using the team"""
+
+    def __init__(self, team_data):
+        self.data = team_data
+        self.people = tuple(team_data["people"])
+        self.account_ids = frozenset(p["account id"] for p in self.people)
+        self.sorted_people = tuple(
+            sorted(self.people, key=lambda p: (p["last name"], p["first name"])))
+
+        self._by_account_id = {p["account id"]: p for p in self.people}
+        self._by_code = {p["code"]: p for p in self.people}
+        self._by_user_name = {p["user name"]: p for p in self.people if p.get("user name")}
+
+    def __contains__(self, account_id):
+        return account_id in self.account_ids
+
+    def __len__(self):
+        return len(self.people)
+
+    def person_by_account_id(self, account_id):
+        """Return the person with given jira account id or None if not found"""
+        return self._by_account_id.get(account_id)
+
+    def person_by_code(self, code):
+        """Return the person with given code or None if not found"""
+        return self._by_code.get(code)
+
+    def person_by_user_name(self, user_name):
+        """Return the person with given user name or None if not found"""
+        return self._by_user_name.get(user_name)
+
+
 # @param issues Any iterable with dict like items and at least an "assignee id" element in each
 #     of these items. For reference see output of the cjm.sprint.request_issues_by_sprint
 #     function.
-# @param team_data Team data structure as returned by cjm.team.load_data
-def filter_team_issues(cfg, issues, team_data):
+# @param team Team object (see cjm.team.Team)
+def filter_team_issues(cfg, issues, team):
     """Filter given issue list to exclude issues not assigned to team members
 
     There is an option to include unassigned issues
     """
     include_unassigned = cfg["issue"]["include unassigned"]
-    valid_account_id_list = (
-        [r["account id"] for r in team_data["people"]] +
-        ([None] if include_unassigned else []))
 
-    return [i for i in issues if i["assignee id"] in valid_account_id_list]
+    return [
+        i for i in issues
+        if i["assignee id"] in team.account_ids or (
+            include_unassigned and i["assignee id"] is None)]
 
 
 def format_full_name(person):
@@ -44,10 +80,38 @@ def format_full_name(person):
     return "{0:s}, {1:s}".format(person["last name"], person["first name"])
 
 
+def request_current_user(cfg, refresh=False):
+    """Request data of the current user. The data is taken from the local issue store if possible
+    (see cjm.store.request_resource)"""
+    def __request():
+        current_user_url = cjm.request.make_cj_gadget_url(cfg, "currentUser")
+        return cjm.request.make_cj_request(cfg, current_user_url).json()
+
+    return cjm.store.request_resource(
+        cfg, "currentUser/{0}".format(cfg["jira"]["user"]["name"]), __request,
+        refresh=refresh)
+
+
 def request_user_full_name(cfg):
     """Request full name of the current user"""
-    current_user_url = cjm.request.make_cj_gadget_url(cfg, "currentUser")
-    response = cjm.request.make_cj_request(cfg, current_user_url)
-    current_user_json = response.json()
+    return request_current_user(cfg)["fullName"]
+
+
+def request_users(cfg, refresh=False):
+    """Retrieve list of the current project (project.key) members. The list is taken from the local
+    issue store if possible (see cjm.store.request_resource)"""
+    user_data_url = cjm.request.make_cj_url(cfg, "user", "search", "query")
+    user_query = "is assignee of {0:s}".format(cfg["project"]["key"])
+
+    # The user search API has no token based pagination:
+    def __request_page(start_at, max_results):
+        return cjm.request.make_cj_request(
+            cfg, user_data_url,
+            {"query": user_query, "startAt": start_at, "maxResults": max_results}).json()
+
+    def __request():
+        return list(cjm.request.iterate_offset_pages(
+            __request_page, "values", cfg["jira"]["search"]["page size"]))
 
-    return current_user_json["fullName"]
+    return cjm.store.request_resource(
+        cfg, "users/{0:s}".format(cfg["project"]["key"]), __request, refresh=refresh)
@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Jira webhook event handling keeping the local issue store (cjm.store) up to date"""
+
+# Standard library imports
+import hashlib
+import hmac
+import time
+
+# Project imports
+import cjm.issue
+import cjm.store
+
+
+EVENT_ISSUE_CREATED = "jira:issue_created"
+EVENT_ISSUE_UPDATED = "jira:issue_updated"
+EVENT_ISSUE_DELETED = "jira:issue_deleted"
+EVENT_COMMENT_CREATED = "comment_created"
+EVENT_COMMENT_UPDATED = "comment_updated"
+EVENT_COMMENT_DELETED = "comment_deleted"
+
+SIGNATURE_HEADER = "X-Hub-Signature"
+_SIGNATURE_PREFIX = "sha256="
+
+
+def make_signature(secret, body):
+    """Compute the webhook signature header value of given request body"""
+    return _SIGNATURE_PREFIX + hmac.new(
+        secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    """Check if the signature header value (None if missing) matches given request body"""
+    return signature is not None and hmac.compare_digest(
+        make_signature(secret, body), signature)
+
+
+def _get_comments(issue):
+    """Return the complete comment list embedded in given raw issue or None if the list is missing
+    or incomplete"""
+    comment_field = issue["fields"].get("comment")
+
+    if comment_field is None:
+        return None
+
+    comments = comment_field.get("comments", [])
+
+    if comment_field.get("total", len(comments)) > len(comments):
+        return None
+
+    return comments
+
+
+def _get_project_key(issue):
+    """Return the project key of given raw issue. The comment event payloads may lack the project
+    field, so the key is derived from the issue key then"""
+    project = issue.get("fields", {}).get("project")
+    return issue["key"].rsplit("-", 1)[0] if project is None else project["key"]
+
+
+def _get_timestamp(event):
+    """Return the unix timestamp of given event (the receive time if not specified, never a time
+    in the future)"""
+    now = time.time()
+    timestamp = event.get("timestamp")
+    return now if timestamp is None else min(int(timestamp) / 1000, now)
+
+
+def apply_event(cfg, conn, event):
+    """Apply given webhook event (the decoded payload) to the store. Return a short event summary
+    (e.g. to be logged) or None if the event is not related to issues or comments
+
+    Issue data is checked by converting it with cjm.issue.extract_issue_data before it is stored,
+    so malformed payloads (KeyError, ValueError) don't reach the store. Comment tags are indexed
+    by cjm.store.upsert_comment
+
+    The event project is marked as synchronized at the event time (see cjm.store.mark_synced), so
+    the scripts keep using the store without polling jira. It is only valid if the events are
+    applied continuously since the last synchronization of the project, which is what the
+    receiver (see cjm-webhook-receiver.py) makes sure of"""
+    event_type = event.get("webhookEvent")
+    issue = event.get("issue")
+    comment = event.get("comment")
+
+    if event_type in (EVENT_ISSUE_CREATED, EVENT_ISSUE_UPDATED):
+        summary = cjm.issue.extract_issue_data(cfg, issue).to_dict()
+        cjm.store.upsert_issue(
+            cfg, conn, issue, issue["fields"]["project"]["key"], comments=_get_comments(issue))
+    elif event_type == EVENT_ISSUE_DELETED:
+        summary = {"id": int(issue["id"]), "key": issue["key"]}
+        cjm.store.delete_issue(conn, issue["id"])
+    elif event_type in (EVENT_COMMENT_CREATED, EVENT_COMMENT_UPDATED):
+        summary = {
+            "id": int(issue["id"]), "key": issue["key"], "comment id": int(comment["id"]),
+            "tags": sorted(cjm.store.extract_tags("\n".join(
+                cjm.issue.extract_comment_texts(comment))))}
+        cjm.store.upsert_comment(conn, int(issue["id"]), comment)
+    elif event_type == EVENT_COMMENT_DELETED:
+        summary = {"id": int(issue["id"]), "key": issue["key"], "comment id": int(comment["id"])}
+        cjm.store.delete_comment(conn, comment["id"])
+    else:
+        return None
+
+    cjm.store.mark_synced(conn, _get_project_key(issue), _get_timestamp(event))
+    cjm.store.commit(conn)
+
+    summary["event"] = event_type
+
+    return summary
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script analyzing the velocity, commitment and delivery trends of many sprints"""
+
+# Standard library imports
+import json
+import math
+import os
+import sys
+
+# Third party imports
+import tabulate
+
+# Project imports
+import cjm
+import cjm.analytics
+import cjm.capacity
+import cjm.cfg
+import cjm.codes
+import cjm.delivery
+import cjm.presentation
+import cjm.run
+import cjm.schema
+import cjm.sprint
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    default_window = 3
+
+    parser.add_argument(
+        "sprint_files", action="store", nargs="*", metavar="SPRINT_FILE",
+        help=(
+            "Path to the json sprint data file as generated by the {0:s} script and described by"
+            " the {1:s} schema. The capacity, commitment and delivery files it references are"
+            " looked up in its directory"
+            "".format(cjm.SM_CREATE_SPRINT_FILE, cjm.schema.make_subpath("sprint.json"))))
+    parser.add_argument(
+        "--sprint-list", action="store", metavar="PATH", dest="sprint_list_path",
+        help=(
+            "PATH to a text file listing the sprint data files to be analyzed (one path relative"
+            " to the list file directory per line, lines starting with '#' are ignored)"))
+    parser.add_argument(
+        "--window", action="store", type=int, metavar="N", dest="window",
+        default=default_window,
+        help=(
+            "Number of the last sprints the recent velocity is averaged over (default: {0:d})"
+            "".format(default_window)))
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, metavar="N", dest="jobs",
+        default=os.cpu_count(),
+        help="Number of sprints loaded in parallel (default: {0:d})".format(os.cpu_count()))
+
+    return parser.parse_args(args)
+
+
+def _number(value):
+    """Convert given float to a presentable number: None if NaN, an int if it has no fractional
+    part, the value rounded to two decimal places otherwise"""
+    if math.isnan(value):
+        return None
+    return cjm.capacity.normalize_day_count(round(value, 2))
+
+
+def _status(ratio, value, base, module):
+    """Determine the ratio status using the thresholds of given module (cjm.capacity for the
+    commitment ratios, cjm.delivery for the delivery ones)"""
+    if math.isnan(ratio):
+        return module.determine_alien_status(
+            (0 if math.isnan(value) else value) - (0 if math.isnan(base) else base))
+    return module.determine_ratio_status(ratio)
+
+
+def make_summary(table, trends):
+    """Make the json serializable summary of the trends"""
+    team = trends["team"]
+    people = trends["people"]
+
+    sprints = [
+        {
+            **sprint,
+            "capacity": _number(team["capacity"][i]),
+            "commitment": _number(team["commitment"][i]),
+            "committed": _number(team["committed"][i]),
+            "delivered": _number(team["delivered"][i]),
+            "commitment ratio": _number(team["commitment ratio"][i]),
+            "commitment status": _status(
+                team["commitment ratio"][i], team["commitment"][i], team["capacity"][i],
+                cjm.capacity),
+            "delivery ratio": _number(team["delivery ratio"][i]),
+            "delivery status": _status(
+                team["delivery ratio"][i], team["delivered"][i], team["committed"][i],
+                cjm.delivery),
+            "velocity average": _number(team["velocity average"][i])
+        }
+        for i, sprint in enumerate(table["sprints"])]
+
+    def __caption(index):
+        account_id = table["account ids"][index]
+        if account_id == cjm.analytics.UNASSIGNED_ID:
+            return "Unassigned"
+        return table["names"][index] or account_id
+
+    persons = sorted(
+        (
+            {
+                "account id": str(table["account ids"][i]),
+                "name": __caption(i),
+                "sprint count": int(people["sprint count"][i]),
+                "velocity": [_number(v) for v in people["velocity"][i]],
+                "mean velocity": _number(people["mean velocity"][i]),
+                "recent velocity": _number(people["recent velocity"][i]),
+                "velocity trend": _number(people["velocity trend"][i]),
+                "commitment ratio": _number(people["commitment ratio"][i]),
+                "commitment status": _status(
+                    people["commitment ratio"][i], people["commitment"][i], people["capacity"][i],
+                    cjm.capacity),
+                "delivery ratio": _number(people["delivery ratio"][i]),
+                "delivery status": _status(
+                    people["delivery ratio"][i], people["delivered"][i], people["committed"][i],
+                    cjm.delivery)
+            }
+            for i in range(len(table["account ids"]))),
+        key=lambda p: (p["account id"] == cjm.analytics.UNASSIGNED_ID, p["name"]))
+
+    return {
+        "sprints": sprints,
+        "people": persons,
+        "team": {
+            "velocity trend": _number(team["velocity trend"])
+        }
+    }
+
+
+def print_summary(summary):
+    """Print the sprint and person trend tables"""
+    cells = (
+        cjm.presentation.default_cell("name"),
+        cjm.presentation.default_cell("capacity"),
+        cjm.presentation.default_cell("commitment"),
+        cjm.presentation.ratio_cell("commitment ratio"),
+        cjm.presentation.status_cell("commitment status"),
+        cjm.presentation.default_cell("committed"),
+        cjm.presentation.default_cell("delivered"),
+        cjm.presentation.ratio_cell("delivery ratio"),
+        cjm.presentation.status_cell("delivery status"),
+        cjm.presentation.default_cell("velocity average"))
+
+    print(tabulate.tabulate(
+        [cjm.presentation.format_row(cjm.presentation.IMPORTANCE_CODES.NORMAL, cells, s)
+         for s in summary["sprints"]],
+        headers=[
+            "Sprint", "Capacity", "Commitment", "Com/Cap Ratio", "Com Status", "Committed",
+            "Delivered", "Del/Com Ratio", "Del Status", "Velocity Avg."],
+        tablefmt="orgtbl"))
+    print()
+
+    cells = (
+        cjm.presentation.default_cell("name"),
+        cjm.presentation.default_cell("sprint count"),
+        cjm.presentation.default_cell("mean velocity"),
+        cjm.presentation.default_cell("recent velocity"),
+        cjm.presentation.default_cell("velocity trend"),
+        cjm.presentation.ratio_cell("commitment ratio"),
+        cjm.presentation.status_cell("commitment status"),
+        cjm.presentation.ratio_cell("delivery ratio"),
+        cjm.presentation.status_cell("delivery status"))
+
+    print(tabulate.tabulate(
+        [cjm.presentation.format_row(
+            cjm.presentation.IMPORTANCE_CODES.NORMAL if p["sprint count"]
+            else cjm.presentation.IMPORTANCE_CODES.LOW, cells, p)
+         for p in summary["people"]] +
+        [cjm.presentation.format_row(
+            cjm.presentation.IMPORTANCE_CODES.HIGH, cells[:5],
+            {"name": "Team", "sprint count": len(summary["sprints"]), "mean velocity": None,
+             "recent velocity": None, "velocity trend": summary["team"]["velocity trend"]})],
+        headers=[
+            "Full Name", "Sprints", "Mean Velocity", "Recent Velocity", "Trend",
+            "Com/Cap Ratio", "Com Status", "Del/Com Ratio", "Del Status"],
+        tablefmt="orgtbl"))
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    sprint_paths = list(options.sprint_files)
+
+    if options.sprint_list_path is not None:
+        sprint_paths += cjm.sprint.load_sprint_list(options.sprint_list_path)
+
+    if not sprint_paths:
+        sys.stderr.write(
+            "ERROR: No sprint data files specified. Use the positional arguments or the"
+            " '--sprint-list' option to specify them\n")
+        return cjm.codes.INVALID_ARGUMENT_ERROR
+
+    records = cjm.analytics.load_sprint_records(
+        cfg, [os.path.abspath(p) for p in sprint_paths], options.jobs)
+    table = cjm.analytics.combine_sprint_records(records)
+    summary = make_summary(table, cjm.analytics.compute_trends(table, max(options.window, 1)))
+
+    if options.json_output:
+        def __serialize(obj):
+            return obj.name
+
+        print(json.dumps(summary, indent=4, sort_keys=False, default=__serialize))
+    else:
+        print_summary(summary)
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
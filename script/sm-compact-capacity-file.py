@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script converting the personal holiday date lists of a capacity file to absence
+intervals"""
+
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
+# Standard library imports
+import json
+import sys
+
+# Project imports
+import cjm
+import cjm.capacity
+import cjm.cfg
+import cjm.codes
+import cjm.data
+import cjm.run
+import cjm.schema
+import cjm.sprint
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    parser.add_argument(
+        "sprint_file", action="store",
+        help=(
+            "Path to the json sprint data file as generated by the {0:s} script and described by"
+            " the {1:s} schema"
+            "".format(cjm.SM_CREATE_SPRINT_FILE, cjm.schema.make_subpath("sprint.json"))))
+
+    return parser.parse_args(args)
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    # Load sprint data:
+
+    sprint_data = cjm.data.load(cfg, options.sprint_file, "sprint.json")
+
+    cfg["sprint"]["id"] = sprint_data.get("id")
+    cfg["project"]["key"] = sprint_data["project"]["key"]
+
+    if cfg["sprint"]["id"] is None:
+        sys.stderr.write(
+            "ERROR: The sprint id is not specified by the sprint data file ('{0:s}')\n"
+            "".format(options.sprint_file))
+        return cjm.codes.CONFIGURATION_ERROR
+
+    cjm.sprint.apply_data_file_paths(cfg, sprint_data)
+
+    # Load and convert capacity data:
+
+    capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
+
+    for person in capacity_data["people"]:
+        person["personal holidays"] = cjm.capacity.compact_absences(person["personal holidays"])
+
+    cjm.schema.validate(cfg, capacity_data, "capacity.json")
+
+    print(json.dumps(capacity_data, indent=4, sort_keys=False))
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
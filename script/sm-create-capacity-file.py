@@ -6,29 +6,35 @@
 
 """Command line script creating sprint capacity report file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
-import datetime
 import json
 import sys
 
 # Third party imports
-import dateutil.parser
 import jsonschema
 import tabulate
-import holidays
 
 # Project imports
 import cjm.cfg
 import cjm.codes
+import cjm.dates
+import cjm.holiday
 import cjm.run
 import cjm.schema
 import cjm.sprint
 import cjm.team
 
 
-def parse_options(args):
+def parse_options(args, defaults):
     """Parse command line options"""
-    defaults = cjm.cfg.load_defaults()
     parser = cjm.cfg.make_common_parser(defaults)
 
     default_commitment_prefix = ""  # defaults.get("project", {}).get("key")
@@ -50,9 +56,9 @@ def parse_options(args):
     return parser.parse_args(args)
 
 
-def main(options):
+def main(options, defaults):
     """Entry function"""
-    cfg = cjm.cfg.apply_options(cjm.cfg.init_defaults(), options)
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
 
     # Load sprint data:
 
@@ -71,30 +77,21 @@ def main(options):
 
     # Load team data:
 
-    team_data = cjm.data.load(cfg, cfg["path"]["team"], "team.json")
-
-    def __holidays_in_sprint():
-        sprint_holidays = []
-        sprint_start_date = dateutil.parser.parse(sprint_data["start date"]).date()
-        sprint_end_date = dateutil.parser.parse(sprint_data["end date"]).date()
-        sprint_start_date = sprint_start_date - datetime.timedelta(days=1)
-        sprint_end_date = sprint_end_date + datetime.timedelta(days=1)
+    team = cjm.team.Team(cjm.data.load(cfg, cfg["path"]["team"], "team.json"))
 
-        sprint_year = range(sprint_start_date.year, sprint_end_date.year+1)
+    sprint_start_date = cjm.dates.parse_date(sprint_data["start date"])
+    sprint_end_date = cjm.dates.parse_date(sprint_data["end date"])
 
-        def __is_weekend(date):
-            return date.weekday() >= 5
+    def __holidays_in_sprint(calendar_code):
+        return [
+            d.strftime("%Y-%m-%d") for d in cjm.holiday.find_holidays(
+                cfg, calendar_code, sprint_start_date, sprint_end_date)]
 
-        for date, _ in sorted(holidays.PL(years=sprint_year).items()):
-            if sprint_end_date > date > sprint_start_date and not __is_weekend(date):
-                sprint_holidays.append(date)
+    default_calendar_code = cfg["calendar"]["holidays"]["default"]
+    holidays_str = __holidays_in_sprint(default_calendar_code)
 
-        return sprint_holidays
-
-    holidays_str = [d.strftime("%Y-%m-%d") for d in __holidays_in_sprint()]
-
-    people = team_data["people"]
-    for p in team_data["people"]:
+    people = list(team.people)
+    for p in people:
         p["personal holidays"] = []
 
     capacity_json = {
@@ -103,6 +100,14 @@ def main(options):
         "additional holidays": []
     }
 
+    # The people working in other countries than the rest of the team get the holidays of their
+    #  own calendars instead of the national ones:
+    calendar_codes = sorted(
+        {cjm.holiday.person_code(cfg, p) for p in people} - {default_calendar_code})
+
+    if calendar_codes:
+        capacity_json["calendars"] = {c: __holidays_in_sprint(c) for c in calendar_codes}
+
     capacity_schema = cjm.schema.load(cfg, "capacity.json")
     jsonschema.validate(capacity_json, capacity_schema)
 
@@ -117,8 +122,8 @@ def main(options):
         print(
             tabulate.tabulate(
                 [(p["account id"], p["first name"]+" "+p["last name"], p["daily capacity"])
-                 for p in team_data["people"]],
+                 for p in people],
                 headers=["Account ID", "Name", "Daily capacity"], tablefmt="orgtbl"))
 
 if __name__ == "__main__":
-    cjm.run.run(main, parse_options(sys.argv[1:]))
+    cjm.run.run_2(main, parse_options)
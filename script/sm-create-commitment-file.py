@@ -6,8 +6,17 @@
 
 """Command line script creating sprint commitment report file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import json
+import os
 import re
 import sys
 
@@ -17,6 +26,7 @@ import tabulate
 
 # Project imports
 import cjm
+import cjm.analytics
 import cjm.capacity
 import cjm.commitment
 import cjm.cfg
@@ -27,7 +37,9 @@ import cjm.presentation
 import cjm.request
 import cjm.run
 import cjm.schema
+import cjm.snapshot
 import cjm.sprint
+import cjm.store
 import cjm.team
 
 
@@ -35,6 +47,8 @@ def parse_options(args, defaults):
     """Parse command line options"""
     parser = cjm.cfg.make_common_parser(defaults)
 
+    default_forecast_runs = 10000
+
     parser.add_argument(
         "sprint_file", action="store",
         help=(
@@ -63,34 +77,47 @@ def parse_options(args, defaults):
     parser.add_argument(
         "-s", "--summary", action="store_true", dest="show_summary", default=False,
         help="Show the commitment summary instead of the detailed issue table")
+    parser.add_argument(
+        "--forecast", action="store", metavar="SPRINT_LIST", dest="forecast_list_path",
+        help=(
+            "Add the delivery forecast (P50 and P85 delivered story points) to the commitment"
+            " summary. It is simulated using the past delivery ratios of the people taken from"
+            " the delivery files of the sprints listed in the SPRINT_LIST file (one sprint data"
+            " file path relative to the list file directory per line)"))
+    parser.add_argument(
+        "--forecast-runs", action="store", type=int, metavar="N", dest="forecast_runs",
+        default=default_forecast_runs,
+        help=(
+            "Number of the delivery forecast simulation runs (default: {0:d})"
+            "".format(default_forecast_runs)))
+    parser.add_argument(
+        "--snapshot", action="store_true", dest="record_snapshot",
+        help=(
+            "Record the commitment data together with the sprint, team and capacity data in the"
+            " snapshot store (see the --snapshot-dir option)"))
 
     return parser.parse_args(args)
 
 
-def _process_sprint_issues(cfg, team_data):
+def _process_sprint_issues(cfg, team):
     issues_all = cjm.sprint.request_issues_by_sprint(cfg)
-    issues_team = cjm.team.filter_team_issues(cfg, issues_all, team_data)
+    issues_team = cjm.team.filter_team_issues(cfg, issues_all, team)
 
-    for issue in issues_team:
-        issue["by sprint"] = True
-        issue["by comment"] = False
+    return dict(
+        (i["id"], i.evolve({"by sprint": True, "by comment": False})) for i in issues_team)
 
-    return dict((i["id"], i) for i in issues_team)
 
-
-def _process_commented_issues(cfg, sprint_data, team_data, issue_lut, comment_postfix):
+def _process_commented_issues(cfg, sprint_data, team, issue_lut, comment_postfix):
     issues_all = cjm.sprint.request_issues_by_comment(
         cfg, "{0:s}/{1:s}".format(sprint_data["comment prefix"], comment_postfix))
-    issues_team = cjm.team.filter_team_issues(cfg, issues_all, team_data)
+    issues_team = cjm.team.filter_team_issues(cfg, issues_all, team)
 
     for issue in issues_team:
         issue_id = issue["id"]
         if issue_id in issue_lut:
-            issue_lut[issue_id]["by comment"] = True
+            issue_lut[issue_id] = issue_lut[issue_id].evolve({"by comment": True})
         else:
-            issue_lut[issue_id] = issue
-            issue_lut[issue_id]["by sprint"] = False
-            issue_lut[issue_id]["by comment"] = True
+            issue_lut[issue_id] = issue.evolve({"by sprint": False, "by comment": True})
 
     return issue_lut
 
@@ -133,11 +160,28 @@ def main(options, defaults):
             "".format(options.sprint_file))
         return cjm.codes.CONFIGURATION_ERROR
 
+    if options.forecast_list_path is not None and (
+            not options.show_summary or options.json_output or options.forecast_runs < 1):
+        sys.stderr.write(
+            "ERROR: The '--forecast' option requires the '--summary' option and a positive"
+            " number of the forecast runs\n")
+        return cjm.codes.INVALID_ARGUMENT_ERROR
+
+    # Load the past sprint records the delivery forecast is based on:
+
+    history = _load_history(cfg, options.forecast_list_path)
+
     cjm.sprint.apply_data_file_paths(cfg, sprint_data)
 
+    if options.record_snapshot and not cjm.snapshot.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The snapshot store directory is not specified. Use the '--snapshot-dir' CLI"
+            " option or the defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
     # Load other data:
 
-    team_data = cjm.data.load(cfg, cfg["path"]["team"], "team.json")
+    team = cjm.team.Team(cjm.data.load(cfg, cfg["path"]["team"], "team.json"))
     capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
 
     # Determine the story points field id:
@@ -145,14 +189,18 @@ def main(options, defaults):
     if cfg["jira"]["fields"]["story points"] is None:
         cfg["jira"]["fields"]["story points"] = cjm.issue.detect_story_point_field_id(cfg)
 
+    # Bring the local issue store up to date (if enabled):
+
+    cjm.store.update(cfg)
+
     # Retrieve issues assigned to the sprint:
 
-    issue_lut = _process_sprint_issues(cfg, team_data)
+    issue_lut = _process_sprint_issues(cfg, team)
 
     # Retrieve issues with the commitment comment added:
 
-    issue_lut = _process_commented_issues(cfg, sprint_data, team_data, issue_lut, "Committed")
-    issue_lut = _process_commented_issues(cfg, sprint_data, team_data, issue_lut, "Extended")
+    issue_lut = _process_commented_issues(cfg, sprint_data, team, issue_lut, "Committed")
+    issue_lut = _process_commented_issues(cfg, sprint_data, team, issue_lut, "Extended")
 
     issues = [issue_lut[k] for k in sorted(issue_lut.keys())]
 
@@ -168,38 +216,51 @@ def main(options, defaults):
     warnings = {}
     issues = _process_delivered_issues(cfg, sprint_data, issues, warnings)
 
-    for issue in issues:
-        if issue["story points"] is not None:
-            issue["story points"] = int(issue["story points"])
+    issues = [
+        i if i["story points"] is None else i.evolve({"story points": int(i["story points"])})
+        for i in issues]
 
     total_sp = sum(
         [i["story points"] for i in issues if i["story points"] is not None])
-    commitment = {"total": {"committed": total_sp}, "issues": list(issues)}
+    commitment = {"total": {"committed": total_sp}, "issues": [i.to_dict() for i in issues]}
 
     commitment_schema = cjm.schema.load(cfg, "commitment.json")
     jsonschema.validate(commitment, commitment_schema)
 
+    snapshot_entry = None
+
+    if options.record_snapshot:
+        snapshot_entry = cjm.snapshot.record(
+            cfg, cjm.snapshot.SNAPSHOT_KIND_COMMITMENT, sprint_data, {
+                "team": team.data, "capacity": capacity_data, "commitment": commitment})
+
     if options.json_output:
         print(json.dumps(commitment, indent=4, sort_keys=False))
     else:
         if options.show_summary:
-            print_summary(cfg, team_data, sprint_data, capacity_data, commitment)
+            print_summary(
+                cfg, team, cjm.capacity.process_person_capacity_list(sprint_data, capacity_data),
+                commitment,
+                None if history is None
+                else _forecast_delivery(commitment, history, options.forecast_runs))
         else:
-            print_issue_list(commitment, team_data)
+            print_issue_list(commitment, team)
 
     cjm.presentation.print_data_warnings(warnings)
 
+    if snapshot_entry is not None and not options.json_output:
+        print("\nSnapshot recorded: {0:s} ({1:s} {2:s})".format(
+            snapshot_entry["id"], snapshot_entry["project"], snapshot_entry["period"]))
+
     return cjm.codes.NO_ERROR
 
 
-def print_issue_list(commitment_data, team_data):
+def print_issue_list(commitment_data, team):
     """Print the detailed issue status table"""
-    person_lut = dict((p["account id"], p) for p in team_data["people"])
-
     def __fmt_assignee(issue):
         if issue["assignee id"] is None:
             return ""
-        return cjm.team.format_full_name(person_lut[issue["assignee id"]])
+        return cjm.team.format_full_name(team.person_by_account_id(issue["assignee id"]))
 
     print(tabulate.tabulate(
         [(i["id"], i["key"], i["summary"], __fmt_assignee(i), i["story points"],
@@ -211,29 +272,79 @@ def print_issue_list(commitment_data, team_data):
         tablefmt="orgtbl"))
 
 
-def print_summary(cfg, team_data, sprint_data, capacity_data, commitment_data):
-    """Print the report summary table"""
-    person_capacity_list = cjm.capacity.process_person_capacity_list(sprint_data, capacity_data)
-    person_capacity_lut = cjm.capacity.make_person_capacity_lut(person_capacity_list)
-    total_capacity = sum(p["sprint capacity"] for p in person_capacity_list)
-
-    assigned_commitment = cjm.commitment.calc_total(
-        cjm.issue.assigned_issues(commitment_data["issues"]))
-    unassigned_commitment = cjm.commitment.calc_total(
-        cjm.issue.unassigned_issues(commitment_data["issues"]))
-
+def _load_history(cfg, sprint_list_path):
+    """Load the past sprint records the delivery forecast is based on from the sprint data files
+    listed by given file. Return None if no list file is given"""
+    if sprint_list_path is None:
+        return None
+
+    return cjm.analytics.combine_sprint_records(cjm.analytics.load_sprint_records(
+        cfg, [os.path.abspath(p) for p in cjm.sprint.load_sprint_list(sprint_list_path)]))
+
+
+def _forecast_delivery(commitment_data, history, runs):
+    """Forecast the delivered story points of every assignee of the committed issues (None means
+    the unassigned issues) and of the team. Return a dict with the "people" dict (account id ->
+    row values), the "team" row values and the "no delivery" row values of the people without
+    committed issues"""
+    def __row(values):
+        return {
+            "p50 delivery": cjm.capacity.normalize_day_count(round(values[0], 1)),
+            "p85 delivery": cjm.capacity.normalize_day_count(round(values[1], 1))
+        }
+
+    issue_table = cjm.issue.IssueTable(commitment_data["issues"])
+    account_ids = issue_table.assignee_ids()
+    forecast = cjm.analytics.forecast_delivery(
+        cjm.analytics.delivery_ratio_samples(history, account_ids),
+        [issue_table.person_total("story points", a) for a in account_ids],
+        percentiles=(50, 15), runs=runs)
+
+    return {
+        "people": {a: __row(v) for a, v in zip(account_ids, forecast["people"].tolist())},
+        "team": __row(forecast["team"].tolist()),
+        "no delivery": __row((0, 0))
+    }
+
+
+def _make_summary_columns(with_forecast):
+    """Return the cells and headers of the summary table columns, with the delivery forecast ones
+    if requested"""
     cells = (
         cjm.presentation.default_cell("caption"),
         cjm.presentation.default_cell("commitment"),
         cjm.presentation.default_cell("capacity"),
         cjm.presentation.ratio_cell("commitment ratio"),
         cjm.presentation.status_cell("commitment status"))
+    headers = ["Full Name", "Commitment", "Capacity", "Com/Cap Ratio", "Status"]
+
+    if with_forecast:
+        cells += (
+            cjm.presentation.default_cell("p50 delivery"),
+            cjm.presentation.default_cell("p85 delivery"))
+        headers += ["P50 Delivery", "P85 Delivery"]
+
+    return cells, headers
+
+
+def print_summary(cfg, team, person_capacity_list, commitment_data, forecast=None):
+    """Print the report summary table. The delivery forecast columns are added if forecast (as
+    returned by _forecast_delivery) is given"""
+    person_capacity_lut = cjm.capacity.make_person_capacity_lut(person_capacity_list)
+    total_capacity = cjm.capacity.normalize_day_count(
+        sum(p["sprint capacity"] for p in person_capacity_list))
+
+    issue_table = cjm.issue.IssueTable(commitment_data["issues"])
+
+    cells, headers = _make_summary_columns(forecast is not None)
+
+    if forecast is None:
+        forecast = {"people": {}, "team": {}, "no delivery": {}}
 
     def __make_person_row(person_data):
         capacity = (
             person_capacity_lut.get(person_data["account id"], {}).get("sprint capacity", 0))
-        commitment = cjm.commitment.calc_total(
-            cjm.issue.person_issues(commitment_data["issues"], person_data))
+        commitment = issue_table.person_total("story points", person_data["account id"])
         summary = cjm.capacity.determine_summary(commitment, capacity)
 
         if summary["capacity"] or summary["commitment"]:
@@ -243,12 +354,16 @@ def print_summary(cfg, team_data, sprint_data, capacity_data, commitment_data):
 
         return cjm.presentation.format_row(
             importance_code, cells,
-            {**summary, "caption": cjm.team.format_full_name(person_data)})
+            {**summary,
+             **forecast["people"].get(person_data["account id"], forecast["no delivery"]),
+             "caption": cjm.team.format_full_name(person_data)})
 
 
     def __make_unassigned_row():
-        capacity = total_capacity - assigned_commitment
-        summary = cjm.capacity.determine_summary(unassigned_commitment, capacity)
+        capacity = cjm.capacity.normalize_day_count(
+            total_capacity - issue_table.assigned_total("story points"))
+        summary = cjm.capacity.determine_summary(
+            issue_table.unassigned_total("story points"), capacity)
 
         if summary["commitment"]:
             importance_code = cjm.presentation.IMPORTANCE_CODES.NORMAL
@@ -256,24 +371,23 @@ def print_summary(cfg, team_data, sprint_data, capacity_data, commitment_data):
             importance_code = cjm.presentation.IMPORTANCE_CODES.LOW
 
         return cjm.presentation.format_row(
-            importance_code, cells, {**summary, "caption": "Unasigned"})
+            importance_code, cells,
+            {**summary, **forecast["people"].get(None, forecast["no delivery"]),
+             "caption": "Unasigned"})
 
     def __make_total_row():
-        commitment = assigned_commitment + unassigned_commitment
+        commitment = cjm.commitment.calc_total(issue_table)
         summary = cjm.capacity.determine_summary(commitment, total_capacity)
 
         return cjm.presentation.format_row(
             cjm.presentation.IMPORTANCE_CODES.HIGH, cells,
-            {**summary, "caption": "Team Summary"})
-
-    def __sort_cb(person):
-        return (person["last name"], person["first name"])
+            {**summary, **forecast["team"], "caption": "Team Summary"})
 
     print(tabulate.tabulate(
-        [__make_person_row(p) for p in sorted(team_data["people"], key=__sort_cb)] +
+        [__make_person_row(p) for p in team.sorted_people] +
         ([__make_unassigned_row()] if cfg["issue"]["include unassigned"] else []) +
         [__make_total_row()],
-        headers=["Full Name", "Commitment", "Capacity", "Com/Cap Ratio", "Status"],
+        headers=headers,
         tablefmt="orgtbl"))
 
 
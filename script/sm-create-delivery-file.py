@@ -6,8 +6,15 @@
 
 """Command line script creating sprint delivery report file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
-import copy
 import decimal
 import json
 import re
@@ -17,7 +24,6 @@ import datetime
 # Third party imports
 import jsonschema
 import tabulate
-import dateutil.parser
 
 # Project imports
 import cjm
@@ -26,12 +32,15 @@ import cjm.cfg
 import cjm.codes
 import cjm.commitment
 import cjm.data
+import cjm.dates
 import cjm.delivery
 import cjm.issue
 import cjm.presentation
 import cjm.run
 import cjm.schema
+import cjm.snapshot
 import cjm.sprint
+import cjm.store
 import cjm.team
 
 
@@ -57,6 +66,11 @@ def parse_options(args):
     parser.add_argument(
         "-s", "--summary", action="store_true", dest="show_summary", default=False,
         help="Show the delivery summary instead of the detailed issue table")
+    parser.add_argument(
+        "--snapshot", action="store_true", dest="record_snapshot",
+        help=(
+            "Record the delivery data together with the sprint, team and capacity data in the"
+            " snapshot store (see the --snapshot-dir option)"))
     return parser.parse_args(args)
 
 
@@ -110,16 +124,14 @@ def _make_augment_issue_cb(cfg, extended, sprint_data, warnings):
                 return sp_committed
 
     def __augment_issue_cb(issue):
-        issue = copy.copy(issue)
         points = issue.get("story points")
         points = 0 if points is None else int(points)
-        issue["story points"] = points
-        issue["dropped"] = False
-        issue["extended"] = extended
-        issue["committed story points"] = (
-            __retrieve_ext_committed_sps(issue) if extended else points)
-        issue["delivered story points"] = -1
-        return issue
+        issue = issue.evolve({"story points": points})
+        return issue.evolve({
+            "dropped": False,
+            "extended": extended,
+            "committed story points": __retrieve_ext_committed_sps(issue) if extended else points,
+            "delivered story points": -1})
 
     return __augment_issue_cb
 
@@ -172,24 +184,24 @@ def _verify_committed_issues(cfg, sprint_data, issues_com, commitment_data, warn
                         cjm.presentation.color_issue_comment(confirm_comment)))
 
 
-def _verify_assignees(issues, person_lut, warnings):
+def _verify_assignees(issues, team, warnings):
     for issue in issues:
         if issue["assignee id"] is None:
             cjm.data.add_warning(
                 warnings, issue["key"],
                 "Issue unassigned")
-        elif issue["assignee id"] not in person_lut:
+        elif issue["assignee id"] not in team:
             cjm.data.add_warning(
                 warnings, issue["key"],
                 "Issue assigned to an unknown account ({0:s})"
                 "".format(cjm.presentation.color_emph(issue["assignee id"])))
 
 
-def _retrieve_extension_issues(cfg, sprint_data, team_data, warnings):
+def _retrieve_extension_issues(cfg, sprint_data, team, warnings):
     issues = cjm.sprint.request_issues_by_comment(
         cfg, "{0:s}/Extended".format(sprint_data["comment prefix"]))
     augment_cb = _make_augment_issue_cb(cfg, True, sprint_data, warnings)
-    return [augment_cb(i) for i in cjm.team.filter_team_issues(cfg, issues, team_data)]
+    return [augment_cb(i) for i in cjm.team.filter_team_issues(cfg, issues, team)]
 
 
 def _join_issue_lists(issues_com, issues_ext, warnings):
@@ -215,19 +227,18 @@ def _process_dropped_issues(cfg, sprint_data, all_issues, warnings):
     issues_drp = cjm.sprint.request_issues_by_comment(
         cfg, "{0:s}/Dropped".format(sprint_data["comment prefix"]))
 
-    issue_lut = {i["id"]: i for i in all_issues}
+    issue_ids = {i["id"] for i in all_issues}
+    dropped_ids = set()
 
     for dropped_issue in issues_drp:
-        issue = issue_lut.get(dropped_issue["id"])
-
-        if issue is None:
+        if dropped_issue["id"] not in issue_ids:
             cjm.data.add_warning(
                 warnings, dropped_issue["key"],
                 "Issue has the dropped comment but no corresponding committed or extended comment")
         else:
-            issue["dropped"] = True
+            dropped_ids.add(dropped_issue["id"])
 
-    return all_issues
+    return [i.evolve({"dropped": True}) if i["id"] in dropped_ids else i for i in all_issues]
 
 
 def _process_delivered_issues(cfg, sprint_data, all_issues):
@@ -245,7 +256,7 @@ def _process_delivered_issues(cfg, sprint_data, all_issues):
         delivered_ids = []
 
     sprint_end_date = (
-        dateutil.parser.parse(sprint_data["end date"]).date() + datetime.timedelta(days=1))
+        cjm.dates.parse_date(sprint_data["end date"]) + datetime.timedelta(days=1))
 
     def __issue_done(issue):
         if issue["id"] in delivered_ids:
@@ -254,26 +265,23 @@ def _process_delivered_issues(cfg, sprint_data, all_issues):
         if issue["status"] != "Done" or issue["resolution date"] is None:
             return False
 
-        issue_resolve_date = dateutil.parser.parse(issue["resolution date"]).date()
+        issue_resolve_date = cjm.dates.parse_date(issue["resolution date"])
         return issue_resolve_date < sprint_end_date
 
-    return [{**i, "delivered": __issue_done(i)} for i in all_issues]
+    return [i.evolve({"delivered": __issue_done(i)}) for i in all_issues]
 
 
 def _make_delivery_data(all_issues):
-    for issue in all_issues:
+    def __outcome(issue):
         if issue["dropped"]:
-            issue["committed story points"] = 0
-            issue["delivered story points"] = 0
-            issue["outcome"] = "drop"
-        elif issue["delivered"]:
-            issue["delivered story points"] = issue["story points"]
-            issue["outcome"] = "done"
-        else:
-            issue["delivered story points"] = 0
-            issue["outcome"] = "open"
+            return {"committed story points": 0, "delivered story points": 0, "outcome": "drop"}
+        if issue["delivered"]:
+            return {"delivered story points": issue["story points"], "outcome": "done"}
+        return {"delivered story points": 0, "outcome": "open"}
 
-        issue["income"] = "extend" if issue["extended"] else "commit"
+    all_issues = [
+        i.evolve({**__outcome(i), "income": "extend" if i["extended"] else "commit"})
+        for i in all_issues]
 
     total_committed = sum([i["committed story points"] for i in all_issues])
     total_delivered = sum([i["delivered story points"] for i in all_issues if i["delivered"]])
@@ -291,7 +299,7 @@ def _make_delivery_data(all_issues):
             "delivered": total_delivered
         },
         "ratio": ratio_value,
-        "issues": sorted(all_issues, key=lambda i: i["id"])
+        "issues": [i.to_dict() for i in sorted(all_issues, key=lambda i: i["id"])]
     }
 
 
@@ -316,9 +324,15 @@ def main(options):
 
     cjm.sprint.apply_data_file_paths(cfg, sprint_data)
 
+    if options.record_snapshot and not cjm.snapshot.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The snapshot store directory is not specified. Use the '--snapshot-dir' CLI"
+            " option or the defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
     # Load other data:
 
-    team_data = cjm.data.load(cfg, cfg["path"]["team"], "team.json")
+    team = cjm.team.Team(cjm.data.load(cfg, cfg["path"]["team"], "team.json"))
     capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
     commitment_data = cjm.data.load(cfg, cfg["path"]["commitment"], "commitment.json")
 
@@ -327,6 +341,10 @@ def main(options):
     if cfg["jira"]["fields"]["story points"] is None:
         cfg["jira"]["fields"]["story points"] = cjm.issue.detect_story_point_field_id(cfg)
 
+    # Bring the local issue store up to date (if enabled):
+
+    cjm.store.update(cfg)
+
     # Request all committed issues:
 
     warnings = {}
@@ -335,12 +353,11 @@ def main(options):
 
     # Request all extension issues and determine their commitment story points:
 
-    issues_ext = _retrieve_extension_issues(cfg, sprint_data, team_data, warnings)
+    issues_ext = _retrieve_extension_issues(cfg, sprint_data, team, warnings)
 
     issues = _join_issue_lists(issues_com, issues_ext, warnings)
 
-    person_lut = dict((p["account id"], p) for p in team_data["people"])
-    _verify_assignees(issues, person_lut, warnings)
+    _verify_assignees(issues, team, warnings)
 
     # Request dropped issues and change story point value to 0
 
@@ -354,30 +371,40 @@ def main(options):
     delivery_schema = cjm.schema.load(cfg, "delivery.json")
     jsonschema.validate(delivery_data, delivery_schema)
 
+    snapshot_entry = None
+
+    if options.record_snapshot:
+        snapshot_entry = cjm.snapshot.record(
+            cfg, cjm.snapshot.SNAPSHOT_KIND_DELIVERY, sprint_data, {
+                "team": team.data, "capacity": capacity_data, "commitment": commitment_data,
+                "delivery": delivery_data})
+
     if options.json_output:
         print(json.dumps(delivery_data, indent=4, sort_keys=False))
     else:
         if options.show_summary:
-            print_summary(delivery_data, team_data, sprint_data, capacity_data)
+            print_summary(delivery_data, team, sprint_data, capacity_data)
         else:
-            print_issue_list(delivery_data, person_lut)
+            print_issue_list(delivery_data, team)
 
     cjm.presentation.print_data_warnings(warnings)
 
+    if snapshot_entry is not None and not options.json_output:
+        print("\nSnapshot recorded: {0:s} ({1:s} {2:s})".format(
+            snapshot_entry["id"], snapshot_entry["project"], snapshot_entry["period"]))
+
     return cjm.codes.NO_ERROR
 
 
-def print_issue_list(delivery, person_lut):
+def print_issue_list(delivery, team):
     """Print the detailed issue status table"""
     def __fmt_assignee(issue):
         if issue["assignee id"] is None:
             return ""
-        elif issue["assignee id"] not in person_lut:
+        elif issue["assignee id"] not in team:
             return issue["assignee id"]
         else:
-            return "{0:s}, {1:s}".format(
-                person_lut[issue["assignee id"]]["last name"],
-                person_lut[issue["assignee id"]]["first name"])
+            return cjm.team.format_full_name(team.person_by_account_id(issue["assignee id"]))
 
     print(tabulate.tabulate(
         [(i["id"], i["key"], i["summary"], __fmt_assignee(i),
@@ -389,25 +416,20 @@ def print_issue_list(delivery, person_lut):
         tablefmt="orgtbl"))
 
 
-def calc_total(issues, field_key):
-    """Calculate sum of given fields"""
-    return sum([int(i[field_key]) for i in issues])
-
-
-def print_summary(delivery_data, team_data, sprint_data, capacity_data):
+def print_summary(delivery_data, team, sprint_data, capacity_data):
     """Print the report summary table"""
     # pylint: disable=too-many-locals
     person_capacity_list = cjm.capacity.process_person_capacity_list(sprint_data, capacity_data)
     person_capacity_lut = cjm.capacity.make_person_capacity_lut(person_capacity_list)
-    total_capacity = sum(p["sprint capacity"] for p in person_capacity_list)
+    total_capacity = cjm.capacity.normalize_day_count(
+        sum(p["sprint capacity"] for p in person_capacity_list))
     total_committed = delivery_data["total"]["committed"]
     total_delivered = delivery_data["total"]["delivered"]
 
-    unassigned_issues = cjm.issue.unassigned_issues(delivery_data["issues"])
-    assigned_issues = cjm.issue.assigned_issues(delivery_data["issues"])
+    issue_table = cjm.issue.IssueTable(delivery_data["issues"])
 
-    assigned_committed = calc_total(assigned_issues, "committed story points")
-    unassigned_committed = calc_total(unassigned_issues, "committed story points")
+    assigned_committed = issue_table.assigned_total("committed story points")
+    unassigned_committed = issue_table.unassigned_total("committed story points")
 
     cells = (
         cjm.presentation.default_cell("caption"),
@@ -422,12 +444,9 @@ def print_summary(delivery_data, team_data, sprint_data, capacity_data):
     def __make_person_row(person_data):
         capacity = (
             person_capacity_lut.get(person_data["account id"], {}).get("sprint capacity", 0))
-        commitment = calc_total(
-            cjm.issue.person_issues(delivery_data["issues"], person_data),
-            "committed story points")
-        delivery = calc_total(
-            cjm.issue.person_issues(delivery_data["issues"], person_data),
-            "delivered story points")
+        commitment = issue_table.person_total(
+            "committed story points", person_data["account id"])
+        delivery = issue_table.person_total("delivered story points", person_data["account id"])
         commitment_summary = cjm.capacity.determine_summary(commitment, capacity)
         delivery_summary = cjm.delivery.determine_summary(delivery, commitment)
 
@@ -442,10 +461,10 @@ def print_summary(delivery_data, team_data, sprint_data, capacity_data):
              "caption": cjm.team.format_full_name(person_data)})
 
     def __make_unassigned_row():
-        capacity = total_capacity - assigned_committed
+        capacity = cjm.capacity.normalize_day_count(total_capacity - assigned_committed)
         commitment_summary = cjm.capacity.determine_summary(unassigned_committed, capacity)
         commitment = unassigned_committed
-        delivery = calc_total(unassigned_issues, "delivered story points")
+        delivery = issue_table.unassigned_total("delivered story points")
         delivery_summary = cjm.delivery.determine_summary(delivery, commitment)
 
         if delivery_summary["commitment"]:
@@ -465,11 +484,8 @@ def print_summary(delivery_data, team_data, sprint_data, capacity_data):
             cjm.presentation.IMPORTANCE_CODES.HIGH, cells,
             {**commitment_summary, **delivery_summary, "caption": "Team Summary"})
 
-    def __sort_cb(person):
-        return (person["last name"], person["first name"])
-
     print(tabulate.tabulate(
-        [__make_person_row(p) for p in sorted(team_data["people"], key=__sort_cb)] +
+        [__make_person_row(p) for p in team.sorted_people] +
         [__make_unassigned_row()] +
         [__make_total_row()],
         headers=[
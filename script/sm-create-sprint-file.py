@@ -6,6 +6,14 @@
 
 """Command line script creating sprint definition file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 import datetime
@@ -20,7 +28,7 @@ import cjm
 import cjm.cfg
 import cjm.codes
 import cjm.data
-import cjm.request
+import cjm.project
 import cjm.run
 import cjm.schema
 import cjm.sprint
@@ -124,9 +132,7 @@ def main(options, defaults):
             " file to specify it".format(_PROJECT_KEY_ARG_NAME))
         return cjm.codes.CONFIGURATION_ERROR
 
-    project_data_url = cjm.request.make_cj_url(cfg, "project", cfg["project"]["key"])
-    response = cjm.request.make_cj_request(cfg, project_data_url)
-    project_json = response.json()
+    project_json = cjm.project.request_project_by_key(cfg, cfg["project"]["key"])
 
     start_date = determine_start_date(options)
     end_date = start_date + datetime.timedelta(days=options.length-1)
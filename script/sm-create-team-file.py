@@ -6,6 +6,14 @@
 
 """Create team file basing on specified project members"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 import json
@@ -17,36 +25,13 @@ import jsonschema
 import cjm
 import cjm.cfg
 import cjm.codes
-import cjm.request
 import cjm.run
 import cjm.schema
+import cjm.team
 
 _PROJECT_KEY_ARG_NAME = "--project-key"
 _DEFAULT_DAILY_CAPACITY = 2
 
-def request_users(cfg):
-    """Retrieve list of project members"""
-    users = []
-
-    user_data_url = cjm.request.make_cj_url(cfg, "user", "search", "query")
-    user_query = "is assignee of {0:s}".format(cfg["project"]["key"])
-
-    start_at = 0
-    max_results = 50
-
-    while True:
-        response = cjm.request.make_cj_request(
-            cfg, user_data_url,
-            {"query": user_query, "startAt": start_at, "maxResults": max_results})
-        response_json = response.json()
-        users += response_json["values"]
-        start_at += max_results
-
-        if start_at >= response_json["total"]:
-            break
-
-    return users
-
 
 def main(options, defaults):
     """Entry function"""
@@ -59,7 +44,7 @@ def main(options, defaults):
             " file to specify it".format(_PROJECT_KEY_ARG_NAME))
         return cjm.codes.CONFIGURATION_ERROR
 
-    users_active = [u for u in request_users(cfg) if u["active"]]
+    users_active = [u for u in cjm.team.request_users(cfg) if u["active"]]
     users = []
 
     for user in users_active:
@@ -6,14 +6,20 @@
 
 """Command line script generating capacity report odt file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import datetime
 
 # Third party imports
-import dateutil.parser
 import odf.dc
 import odf.draw
-import odf.opendocument
 import odf.style
 import odf.table
 import odf.text
@@ -26,13 +32,13 @@ import cjm.cfg
 import cjm.codes
 import cjm.commitment
 import cjm.data
+import cjm.dates
 import cjm.delivery
 import cjm.report
 import cjm.request
 import cjm.run
 import cjm.schema
 import cjm.sprint
-import cjm.team
 
 
 def parse_options(args, defaults):
@@ -57,7 +63,7 @@ def append_head_table(cfg, doc, sprint_data, team_capacity):
         ("Sprint Weeks", cjm.report.make_sprint_period_val(cfg)),
         ("Sprint Duration", cjm.report.make_sprint_duration_val(sprint_data)),
         ("Sprint Workdays", cjm.report.make_sprint_workdays_val(team_capacity)),
-        ("Report Author", cjm.team.request_user_full_name(cfg)),
+        ("Report Author", cjm.report.make_report_author_val(cfg)),
         ("Report Date", cjm.report.make_current_date_cell_val_cb()))
 
     cjm.report.append_head_table(doc, rows)
@@ -94,7 +100,7 @@ def append_capacity_table(doc, sprint_data, people):
             cjm.report.make_value_cell_props()))
 
     def __make_row(person_idx, person):
-        capacity_formula = "<C{0:d}>*{1:d}".format(person_idx+1, person["daily capacity"])
+        capacity_formula = "<C{0:d}>*{1:g}".format(person_idx+1, person["daily capacity"])
 
         return cjm.report.add_elements(
             odf.table.TableRow(stylename=doc.getStyleByName("Table.People.y")),
@@ -112,7 +118,7 @@ def append_capacity_table(doc, sprint_data, people):
                 odf.table.TableCell(stylename=doc.getStyleByName("Table.People.x.y")),
                 odf.text.P(
                     stylename=doc.getStyleByName("Mobica Table Cell Right"),
-                    text="{0:d}".format(person["sprint workday count"]))),
+                    text="{0:g}".format(person["sprint workday count"]))),
             cjm.report.add_elements(
                 odf.table.TableCell(
                     stylename=doc.getStyleByName("Table.People.x.y"),
@@ -183,21 +189,21 @@ def append_capacity_table(doc, sprint_data, people):
                     odf.text.P(
                         stylename=doc.getStyleByName("Mobica Table Header Right"))))))
 
-def create_weekly_table(cfg, doc, week_date, people):
+def create_weekly_table(cfg, doc, week_date, team_capacity, people):
     """Create single week absence table element"""
 
     monday = cjm.sprint.get_monday(cfg, week_date)
 
     def __make_person_date_cell(person, date):
+        absent = cjm.capacity.is_absent(team_capacity, person, date)
+
         return cjm.report.add_elements(
             odf.table.TableCell(stylename=doc.getStyleByName(
-                "Table.Weekly.x.y.r" if date in person["holidays"]
-                else "Table.Weekly.x.y.g")),
+                "Table.Weekly.x.y.r" if absent else "Table.Weekly.x.y.g")),
             odf.text.P(
-                text=("✘" if date in person["holidays"] else "✔"),
+                text=("✘" if absent else "✔"),
                 stylename=doc.getStyleByName(
-                    "Mobica Table Cell Red" if date in person["holidays"]
-                    else "Mobica Table Cell Green")))
+                    "Mobica Table Cell Red" if absent else "Mobica Table Cell Green")))
 
     def __make_row(person):
         return cjm.report.add_elements(
@@ -271,7 +277,7 @@ def make_red_cell_props():
     return tcp
 
 
-def append_weekly_section(cfg, doc, people):
+def append_weekly_section(cfg, doc, team_capacity, people):
     """Add weekly absence view section"""
 
     cjm.report.add_elements(
@@ -338,7 +344,7 @@ def append_weekly_section(cfg, doc, people):
         *[create_weekly_table(
             cfg, doc,
             cfg["sprint"]["start date"] + datetime.timedelta(days=7*week_delta),
-            people)
+            team_capacity, people)
           for week_delta in range(weeks_cnt)])
 
 
@@ -346,20 +352,19 @@ def generate_odt_document(cfg, sprint_data, capacity_data):
     """Main function generating the delivery report document"""
     print("Report template: {0:s}".format(cfg["path"]["report template"]))
 
-    doc = odf.opendocument.load(cfg["path"]["report template"])
+    doc = cjm.report.load_template(cfg)
     doc.text.childNodes = []
 
     team_capacity = cjm.capacity.process_team_capacity(sprint_data, capacity_data)
     people = sorted(
-        [cjm.capacity.process_person_capacity(team_capacity, p)
-         for p in capacity_data["people"]
+        [p for p in cjm.capacity.process_person_capacity_list(sprint_data, capacity_data)
          if p["daily capacity"] > 0],
         key=lambda p: (p["last name"], p["first name"]))
 
     cjm.report.append_doc_title(cfg, doc, sprint_data, "Capacity")
     append_head_table(cfg, doc, sprint_data, team_capacity)
     append_capacity_table(doc, sprint_data, people)
-    append_weekly_section(cfg, doc, people)
+    append_weekly_section(cfg, doc, team_capacity, people)
 
     doc.save(cfg["path"]["output"])
 
@@ -373,12 +378,14 @@ def main(options, defaults):
 
     sprint_data = cjm.data.load(cfg, options.sprint_file, "sprint.json")
 
-    cfg["sprint"]["start date"] = dateutil.parser.parse(sprint_data["start date"]).date()
-    cfg["sprint"]["end date"] = dateutil.parser.parse(sprint_data["end date"]).date()
+    cfg["sprint"]["start date"] = cjm.dates.parse_date(sprint_data["start date"])
+    cfg["sprint"]["end date"] = cjm.dates.parse_date(sprint_data["end date"])
 
     cjm.sprint.apply_data_file_paths(cfg, sprint_data)
 
-    capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
+    snapshot = cjm.report.load_snapshot(cfg, options, sprint_data)
+
+    capacity_data = cjm.report.load_data(cfg, snapshot, "capacity")
 
     generate_odt_document(cfg, sprint_data, capacity_data)
 
@@ -6,11 +6,17 @@
 
 """Command line script generating commitment report odt file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Third party imports
-import dateutil.parser
 import odf.dc
 import odf.draw
-import odf.opendocument
 import odf.style
 import odf.table
 import odf.text
@@ -22,12 +28,13 @@ import cjm.cfg
 import cjm.codes
 import cjm.commitment
 import cjm.data
+import cjm.dates
 import cjm.report
 import cjm.request
 import cjm.run
 import cjm.schema
+import cjm.snapshot
 import cjm.sprint
-import cjm.team
 
 
 def parse_options(args, defaults):
@@ -52,7 +59,7 @@ def append_head_table(cfg, doc, sprint_data, team_capacity):
         ("Sprint Weeks", cjm.report.make_sprint_period_val(cfg)),
         ("Sprint Duration", cjm.report.make_sprint_duration_val(sprint_data)),
         ("Sprint Workdays", cjm.report.make_sprint_workdays_val(team_capacity)),
-        ("Report Author", cjm.team.request_user_full_name(cfg)),
+        ("Report Author", cjm.report.make_report_author_val(cfg)),
         ("Report Date", cjm.report.make_current_date_cell_val_cb()))
 
     cjm.report.append_head_table(doc, rows)
@@ -65,7 +72,7 @@ def append_summary_section(doc, capacity_data, team_capacity, commitment_data):
         "The total number of committed story points is {0:d}."
         "".format(commitment_data["total"]["committed"]))
     capacity_text = (
-        "The sprint capacity is {0:d} story points."
+        "The sprint capacity is {0:g} story points."
         "".format(_calc_team_capacity(capacity_data, team_capacity)))
 
     cjm.report.add_elements(
@@ -186,7 +193,7 @@ def generate_odt_document(cfg, capacity_data, commitment_data, sprint_data):
     """Main function generating the commitment report document"""
     print("Report template: {0:s}".format(cfg["path"]["report template"]))
 
-    doc = odf.opendocument.load(cfg["path"]["report template"])
+    doc = cjm.report.load_template(cfg)
     doc.text.childNodes = []
 
     team_capacity = cjm.capacity.process_team_capacity(sprint_data, capacity_data)
@@ -202,9 +209,9 @@ def generate_odt_document(cfg, capacity_data, commitment_data, sprint_data):
 
 
 def _calc_team_capacity(capacity_data, team_capacity):
-    return sum(
-        cjm.capacity.process_person_capacity(team_capacity, p)["sprint capacity"]
-        for p in capacity_data["people"])
+    return cjm.capacity.normalize_day_count(sum(
+        p["sprint capacity"]
+        for p in cjm.capacity.process_people_capacity(team_capacity, capacity_data["people"])))
 
 
 def main(options, defaults):
@@ -214,13 +221,16 @@ def main(options, defaults):
 
     sprint_data = cjm.data.load(cfg, options.sprint_file, "sprint.json")
 
-    cfg["sprint"]["start date"] = dateutil.parser.parse(sprint_data["start date"]).date()
-    cfg["sprint"]["end date"] = dateutil.parser.parse(sprint_data["end date"]).date()
+    cfg["sprint"]["start date"] = cjm.dates.parse_date(sprint_data["start date"])
+    cfg["sprint"]["end date"] = cjm.dates.parse_date(sprint_data["end date"])
 
     cjm.sprint.apply_data_file_paths(cfg, sprint_data)
 
-    capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
-    commitment_data = cjm.data.load(cfg, cfg["path"]["commitment"], "commitment.json")
+    snapshot = cjm.report.load_snapshot(
+        cfg, options, sprint_data, cjm.snapshot.SNAPSHOT_KIND_COMMITMENT)
+
+    capacity_data = cjm.report.load_data(cfg, snapshot, "capacity")
+    commitment_data = cjm.report.load_data(cfg, snapshot, "commitment")
 
     generate_odt_document(cfg, capacity_data, commitment_data, sprint_data)
 
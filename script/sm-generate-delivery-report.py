@@ -6,11 +6,17 @@
 
 """Command line script generating delivery report odt file"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Third party imports
-import dateutil.parser
 import odf.dc
 import odf.draw
-import odf.opendocument
 import odf.style
 import odf.table
 import odf.text
@@ -22,13 +28,14 @@ import cjm.cfg
 import cjm.codes
 import cjm.commitment
 import cjm.data
+import cjm.dates
 import cjm.delivery
 import cjm.report
 import cjm.request
 import cjm.run
 import cjm.schema
+import cjm.snapshot
 import cjm.sprint
-import cjm.team
 
 
 def parse_options(args, defaults):
@@ -66,7 +73,7 @@ def append_head_table(cfg, doc, sprint_data, delivery_summary, team_capacity):
         ("Sprint Duration", cjm.report.make_sprint_duration_val(sprint_data)),
         ("Sprint Workdays", cjm.report.make_sprint_workdays_val(team_capacity)),
         ("Delivery Ratio", __delivery_ratio_cell_val_cb),
-        ("Report Author", cjm.team.request_user_full_name(cfg)),
+        ("Report Author", cjm.report.make_report_author_val(cfg)),
         ("Report Date", cjm.report.make_current_date_cell_val_cb()))
 
     cjm.report.append_head_table(doc, rows)
@@ -273,7 +280,7 @@ def generate_odt_document(cfg, sprint_data, capacity_data, commitment_data, deli
     """Main function generating the delivery report document"""
     print("Report template: {0:s}".format(cfg["path"]["report template"]))
 
-    doc = odf.opendocument.load(cfg["path"]["report template"])
+    doc = cjm.report.load_template(cfg)
     doc.text.childNodes = []
 
     total_committed = delivery_data["total"]["committed"]
@@ -301,14 +308,17 @@ def main(options, defaults):
 
     sprint_data = cjm.data.load(cfg, options.sprint_file, "sprint.json")
 
-    cfg["sprint"]["start date"] = dateutil.parser.parse(sprint_data["start date"]).date()
-    cfg["sprint"]["end date"] = dateutil.parser.parse(sprint_data["end date"]).date()
+    cfg["sprint"]["start date"] = cjm.dates.parse_date(sprint_data["start date"])
+    cfg["sprint"]["end date"] = cjm.dates.parse_date(sprint_data["end date"])
 
     cjm.sprint.apply_data_file_paths(cfg, sprint_data)
 
-    capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
-    commitment_data = cjm.data.load(cfg, cfg["path"]["commitment"], "commitment.json")
-    delivery_data = cjm.data.load(cfg, cfg["path"]["delivery"], "delivery.json")
+    snapshot = cjm.report.load_snapshot(
+        cfg, options, sprint_data, cjm.snapshot.SNAPSHOT_KIND_DELIVERY)
+
+    capacity_data = cjm.report.load_data(cfg, snapshot, "capacity")
+    commitment_data = cjm.report.load_data(cfg, snapshot, "commitment")
+    delivery_data = cjm.report.load_data(cfg, snapshot, "delivery")
 
     generate_odt_document(cfg, sprint_data, capacity_data, commitment_data, delivery_data)
 
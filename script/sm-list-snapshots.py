@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script listing sprint data snapshots recorded in the snapshot store"""
+
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
+# Standard library imports
+import json
+import sys
+
+# Third party imports
+import tabulate
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.codes
+import cjm.run
+import cjm.snapshot
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    parser.add_argument(
+        "--project-key", action="store", metavar="KEY", dest="project_key",
+        help="List only snapshots of the project identified by given KEY")
+    parser.add_argument(
+        "--period", action="store", metavar="NAME", dest="period",
+        help="List only snapshots of given sprint period (e.g. 2021-WW10-WW11)")
+    parser.add_argument(
+        "--kind", action="store", dest="kind",
+        choices=(cjm.snapshot.SNAPSHOT_KIND_COMMITMENT, cjm.snapshot.SNAPSHOT_KIND_DELIVERY),
+        help="List only snapshots of given kind")
+
+    return parser.parse_args(args)
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    if not cjm.snapshot.is_enabled(cfg):
+        sys.stderr.write(
+            "ERROR: The snapshot store directory is not specified. Use the '--snapshot-dir' CLI"
+            " option or the defaults file to specify it\n")
+        return cjm.codes.CONFIGURATION_ERROR
+
+    snapshots = cjm.snapshot.list_snapshots(
+        cfg, project_key=options.project_key, period=options.period, kind=options.kind)
+
+    if options.json_output:
+        print(json.dumps(snapshots, indent=4, sort_keys=False))
+    else:
+        print(tabulate.tabulate(
+            [(s["id"][:12], s["project"], s["period"], s["kind"], s["created"])
+             for s in snapshots],
+            headers=["Id", "Project", "Period", "Kind", "Created"], tablefmt="orgtbl"))
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
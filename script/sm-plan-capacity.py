@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script planning the team capacity of all the sprints in given time range"""
+
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
+# Standard library imports
+import csv
+import datetime
+import json
+import sys
+
+# Third party imports
+import tabulate
+
+# Project imports
+import cjm
+import cjm.capacity
+import cjm.cfg
+import cjm.codes
+import cjm.data
+import cjm.dates
+import cjm.holiday
+import cjm.run
+import cjm.schema
+import cjm.sprint
+import cjm.team
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    default_length = 14
+
+    def __date(value):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+    parser.add_argument(
+        "--start", action="store", metavar="DATE", dest="start_date", type=__date, required=True,
+        help="The first day of the first sprint is the DATE (yyyy-mm-dd)")
+    parser.add_argument(
+        "--end", action="store", metavar="DATE", dest="end_date", type=__date, required=True,
+        help="The last sprint starts on or before the DATE (yyyy-mm-dd)")
+    parser.add_argument(
+        "--length", action="store", metavar="DAYS", dest="length", type=int,
+        default=default_length,
+        help="The sprint length in DAYS (default: {0:d})".format(default_length))
+    parser.add_argument(
+        "--csv-output", action="store_true", dest="csv_output",
+        help="Print the results as CSV")
+
+    parser.add_argument(
+        "team_file", action="store",
+        help=(
+            "Path to the json team data file as generated by the {0:s} script and described by"
+            " the {1:s} schema. The personal holidays and the additional holidays are taken from"
+            " the capacity file if it is specified"
+            "".format(cjm.SM_CREATE_TEAM_FILE, cjm.schema.make_subpath("team.json"))))
+
+    return parser.parse_args(args)
+
+
+def make_sprint_periods(start_date, end_date, length):
+    """Make the start and end date tuples of the consecutive sprints starting in given range"""
+    return [
+        (d, d + datetime.timedelta(days=length-1))
+        for d in (
+            start_date + datetime.timedelta(days=length*i)
+            for i in range((end_date - start_date).days // length + 1))]
+
+
+def make_people_plan(cfg, periods, people, additional_holidays):
+    """Make the personal workday count and capacity plan of given people over given sprint periods
+    (as returned by make_sprint_periods). The holidays of every calendar used by the people are
+    looked up over the whole planning horizon"""
+    calendar_holidays = {
+        c: cjm.holiday.find_holidays(cfg, c, periods[0][0], periods[-1][1])
+        for c in {cjm.holiday.person_code(cfg, p) for p in people}}
+    shared_holidays = [
+        sorted(calendar_holidays[cjm.holiday.person_code(cfg, p)] + additional_holidays)
+        for p in people]
+
+    workday_counts = cjm.capacity.plan_people_capacity(periods, people, shared_holidays)
+
+    return [
+        {
+            "account id": p["account id"],
+            "last name": p["last name"],
+            "first name": p["first name"],
+            "daily capacity": p["daily capacity"],
+            "workday counts": [cjm.capacity.normalize_day_count(c) for c in w],
+            "capacities": [
+                cjm.capacity.normalize_day_count(c * p["daily capacity"]) for c in w]
+        }
+        for p, w in zip(people, workday_counts.tolist())]
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    if options.length < 1 or options.end_date < options.start_date:
+        sys.stderr.write("ERROR: The planning time range or the sprint length is invalid\n")
+        return cjm.codes.INVALID_ARGUMENT_ERROR
+
+    periods = make_sprint_periods(options.start_date, options.end_date, options.length)
+
+    # Load team and capacity data:
+
+    team = cjm.team.Team(cjm.data.load(cfg, options.team_file, "team.json"))
+
+    if cfg["path"]["capacity"] is not None:
+        capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
+    else:
+        capacity_data = {"people": [], "additional holidays": []}
+
+    personal_holidays = {p["account id"]: p["personal holidays"] for p in capacity_data["people"]}
+    people = [
+        dict(p, **{"personal holidays": personal_holidays.get(p["account id"], [])})
+        for p in team.sorted_people]
+
+    additional_holidays = [cjm.dates.parse_date(d) for d in capacity_data["additional holidays"]]
+
+    sprints = [
+        {
+            "name": cjm.sprint.generate_sprint_period_name(cfg, s, e),
+            "start date": s.isoformat(),
+            "end date": e.isoformat()
+        }
+        for s, e in periods]
+    plan = make_people_plan(cfg, periods, people, additional_holidays)
+
+    if options.json_output:
+        print(json.dumps({"sprints": sprints, "people": plan}, indent=4, sort_keys=False))
+    elif options.csv_output:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["Last Name", "First Name", "Account ID"] + [s["name"] for s in sprints])
+        for person in plan:
+            writer.writerow(
+                [person["last name"], person["first name"], person["account id"]] +
+                person["capacities"])
+    else:
+        print(
+            tabulate.tabulate(
+                [[p["last name"], p["first name"]] + p["capacities"] for p in plan] +
+                [["Total", ""] + [
+                    cjm.capacity.normalize_day_count(sum(c)) for c in zip(
+                        *[p["capacities"] for p in plan])]],
+                headers=["Last Name", "First Name"] + [s["name"] for s in sprints],
+                tablefmt="orgtbl"))
+
+    return cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)
@@ -6,6 +6,14 @@
 
 """Print capacity summary"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 
@@ -60,10 +68,8 @@ def main(options):
     # Load other data:
 
     capacity_data = cjm.data.load(cfg, cfg["path"]["capacity"], "capacity.json")
-    team_capacity = cjm.capacity.process_team_capacity(sprint_data, capacity_data)
-
     people = sorted(
-        [cjm.capacity.process_person_capacity(team_capacity, p) for p in capacity_data["people"]],
+        cjm.capacity.process_person_capacity_list(sprint_data, capacity_data),
         key=lambda p: (p["last name"], p["first name"]))
 
     print(
@@ -6,6 +6,14 @@
 
 """Push comments indicating that given issues are committed"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 
@@ -16,11 +24,14 @@ import tabulate
 import cjm.cfg
 import cjm.data
 import cjm.issue
+import cjm.presentation
 import cjm.schema
 import cjm.codes
 import cjm.sprint
+import cjm.store
 import cjm.commitment
 import cjm.request
+import cjm.run
 
 
 _COMMITMENT_PREFIX_ARG_NAME = "--prefix"
@@ -77,6 +88,8 @@ def main(options, defaults):
 
     commitment_data = cjm.data.load(cfg, cfg["path"]["commitment"], "commitment.json")
 
+    cjm.store.update(cfg)
+
     comment_to_be_added = sprint_data["comment prefix"] + "/Committed"
 
     # Retrieve all issues with the commitment comment added:
@@ -96,15 +109,15 @@ def main(options, defaults):
             headers=["Id", "Key", "Summary", "Comment to be added"], tablefmt="orgtbl"))
         return cjm.codes.NO_ERROR
 
-    for issue in commitment_issues:
-        if issue["id"] in ids_issues_without_comments:
-            comment_url = cjm.request.make_cj_url(cfg, "issue", str(issue["id"]), "comment")
-            body = cjm.issue.make_comment_body(comment_to_be_added)
-
-            if options.verbose:
-                print(f"Posting '{comment_to_be_added}' to issue {issue['key']}")
+    results = cjm.issue.request_comments_create_bulk(
+        cfg,
+        [(i, comment_to_be_added) for i in commitment_issues
+         if i["id"] in ids_issues_without_comments],
+        verbose=options.verbose)
+    cjm.presentation.print_comment_results(results)
 
-            cjm.request.make_cj_post_request(cfg, comment_url, body)
+    if any(r["result"] == cjm.issue.COMMENT_RESULT_FAILED for r in results):
+        return cjm.codes.REQUEST_ERROR
 
     return cjm.codes.NO_ERROR
 
@@ -6,6 +6,14 @@
 
 """Push comments indicating delivery status of committed issues"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
 import sys
 
@@ -19,16 +27,17 @@ import cjm.commitment
 import cjm.data
 import cjm.delivery
 import cjm.issue
+import cjm.presentation
 import cjm.request
 import cjm.run
 import cjm.schema
 import cjm.sprint
+import cjm.store
 
 _COMMITMENT_PREFIX_ARG_NAME = "--prefix"
 
-def parse_options(args):
+def parse_options(args, defaults):
     """Parse command line options"""
-    defaults = cjm.cfg.load_defaults()
     parser = cjm.cfg.make_common_parser(defaults)
 
     default_commitment_prefix = ""  # defaults.get("project", {}).get("key")
@@ -67,9 +76,9 @@ def get_issues_for_comments(cfg, sprint_data, comments_list):
 
     return issues_with_closing_tag
 
-def main(options):
+def main(options, defaults):
     """Entry function"""
-    cfg = cjm.cfg.apply_options(cjm.cfg.init_defaults(), options)
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
 
     # Load sprint data:
 
@@ -90,6 +99,8 @@ def main(options):
 
     delivery_data = cjm.data.load(cfg, cfg["path"]["delivery"], "delivery.json")
 
+    cjm.store.update(cfg)
+
     issues_with_openning_comment = get_issues_for_comments(
         cfg, sprint_data, ["Committed", "Extended"])
 
@@ -111,14 +122,6 @@ def main(options):
     no_closing_comment_done = [i for i in no_closing_comment if i["outcome"] == "done"]
     no_closing_comment_not_done = [i for i in no_closing_comment if i["outcome"] != "done"]
 
-    def __post_comment(issue, comment):
-        comment_url = cjm.request.make_cj_url(cfg, "issue", str(issue["id"]), "comment")
-
-        if options.verbose:
-            print(f"Posting {comment} to from issue {issue['key']}  to url address {comment_url}")
-
-        cjm.request.make_cj_post_request(cfg, comment_url, cjm.issue.make_comment_body(comment))
-
     delivery_comment = sprint_data["comment prefix"] + "/Delivered"
     not_delivery_comment = sprint_data["comment prefix"] + "/NotDelivered"
 
@@ -132,12 +135,17 @@ def main(options):
             [(p["id"], p["key"], p["summary"]) for p in no_closing_comment_not_done],
             headers=["Id", "Key", "Summary"], tablefmt="orgtbl"))
     else:
-        for i in no_closing_comment_done:
-            __post_comment(i, delivery_comment)
-        for i in no_closing_comment_not_done:
-            __post_comment(i, not_delivery_comment)
+        results = cjm.issue.request_comments_create_bulk(
+            cfg,
+            [(i, delivery_comment) for i in no_closing_comment_done] +
+            [(i, not_delivery_comment) for i in no_closing_comment_not_done],
+            verbose=options.verbose)
+        cjm.presentation.print_comment_results(results)
+
+        if any(r["result"] == cjm.issue.COMMENT_RESULT_FAILED for r in results):
+            return cjm.codes.REQUEST_ERROR
 
     return cjm.codes.NO_ERROR
 
 if __name__ == "__main__":
-    cjm.run.run(main, parse_options(sys.argv[1:]))
+    cjm.run.run_2(main, parse_options)
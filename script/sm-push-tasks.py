@@ -6,17 +6,28 @@
 
 """Command line script pushing task list into jira"""
 
+# Delegate the run to the cjm service (see cjm-service.py) if it is available. It is done before
+#  the remaining imports, so the delegated runs don't pay for them:
+import cjm.client
+if __name__ == "__main__":
+    cjm.client.delegate(__file__)
+
+# pylint: disable=wrong-import-position,wrong-import-order,ungrouped-imports
+
 # Standard library imports
+import os.path
 import sys
 
 # Project imports
 import cjm.cfg
 import cjm.data
 import cjm.issue
+import cjm.journal
 import cjm.project
 import cjm.run
 import cjm.schema
 import cjm.sprint
+import cjm.store
 
 
 def parse_options(args):
@@ -52,9 +63,21 @@ def parse_options(args):
         "--dry-run", action="store_true", dest="dry_run",
         help="Print what's going to happen, only. Do not push commitment comments to jira")
 
+    parser.add_argument(
+        "--journal-dir", action="store", metavar="PATH", dest="journal_dir",
+        help=(
+            "Directory PATH of the push journal used to resume interrupted pushes (default: the"
+            " tasks file directory)"))
+
     return parser.parse_args(args)
 
 
+_JOURNAL_STEP_CREATED = "created"
+_JOURNAL_STEP_COMMENTED = "commented"
+_JOURNAL_STEP_EPIC_UPDATED = "epic updated"
+_JOURNAL_STEP_LINKED = "linked"
+
+
 def _process_issue_types(cfg, issues):
     """Iterate through given issues and determine their jira type ids"""
     issue_types = cjm.issue.request_issue_types(cfg)
@@ -185,7 +208,33 @@ def _request_issue_by_tracking_id(cfg, tracking_id):
         return found_issues[0]
 
 
-def _create_issues(cfg, tasks_data, issues):
+def _load_journal(journal_path):
+    """Load the push journal and summarize steps already completed by the previous runs"""
+    journal = {
+        "path": journal_path,
+        _JOURNAL_STEP_CREATED: {},
+        _JOURNAL_STEP_COMMENTED: {},
+        _JOURNAL_STEP_EPIC_UPDATED: {},
+        _JOURNAL_STEP_LINKED: set()
+    }
+
+    for entry in cjm.journal.load_entries(journal_path):
+        step = entry.get("step")
+
+        if step in (_JOURNAL_STEP_CREATED, _JOURNAL_STEP_COMMENTED, _JOURNAL_STEP_EPIC_UPDATED):
+            journal[step][entry["idx"]] = entry["key"]
+        elif step == _JOURNAL_STEP_LINKED:
+            journal[step].add((entry["inward"], entry["outward"], entry["type"]))
+
+    return journal
+
+
+def _record_step(journal, step, **entry):
+    """Append a completed push step to the journal"""
+    cjm.journal.append_entry(journal["path"], {"step": step, **entry})
+
+
+def _create_issues(cfg, tasks_data, issues, journal):
     """Create given issues"""
     for issue in issues:
         if issue["actual"] is None:
@@ -193,18 +242,61 @@ def _create_issues(cfg, tasks_data, issues):
             issue["actual"] = new_issue
             issue["key"] = new_issue["key"]
             issue["has_tracking_comment"] = False
+            _record_step(journal, _JOURNAL_STEP_CREATED, idx=issue["idx"], key=issue["key"])
             sys.stdout.write("Created issue: {0:s}\n".format(issue["key"]))
 
         if not issue["has_tracking_comment"]:
             comment_json = cjm.issue.make_comment_body(_make_tracking_id(tasks_data, issue))
             cjm.issue.request_comment_create(cfg, issue["key"], comment_json)
+            issue["has_tracking_comment"] = True
+            _record_step(journal, _JOURNAL_STEP_COMMENTED, idx=issue["idx"], key=issue["key"])
             sys.stdout.write("Created tracking comment for issue {0:s}\n".format(issue["key"]))
 
 
-def _process_jira_state(cfg, tasks_data, issues):
+def _discard_journaled_issue(journal, idx, key):
+    """Forget the steps the previous runs completed for an issue which no longer exists, so they
+    are done again for the issue created in its place"""
+    for step in (_JOURNAL_STEP_CREATED, _JOURNAL_STEP_COMMENTED, _JOURNAL_STEP_EPIC_UPDATED):
+        if journal[step].get(idx) == key:
+            del journal[step][idx]
+
+    journal[_JOURNAL_STEP_LINKED] = {
+        l for l in journal[_JOURNAL_STEP_LINKED] if key not in (l[0], l[1])}
+
+
+def _process_jira_state(cfg, tasks_data, issues, journal):
     """Determine which of given issues have to be created and which of them are missing
-    the tracking comment"""
+    the tracking comment
+
+    Issues recorded in the journal as already created are only verified with a single batch query
+    instead of the tracking comment search. The search is still made for the journaled issues
+    missing the tracking comment, as the previous run could have been interrupted right after
+    posting it"""
+    journaled_keys = dict(journal[_JOURNAL_STEP_CREATED])
+    journaled_keys.update(journal[_JOURNAL_STEP_COMMENTED])
+    verified_lut = {
+        i["key"]: i for i in cjm.issue.request_issues_by_keys(
+            cfg, sorted(set(journaled_keys.values())))}
+
     for issue in issues:
+        journaled_key = journaled_keys.get(issue["idx"])
+
+        if journaled_key is not None and journaled_key not in verified_lut:
+            sys.stderr.write(
+                "WARNING: Issue {0:s} recorded in the push journal no longer exists\n"
+                "".format(journaled_key))
+            _discard_journaled_issue(journal, issue["idx"], journaled_key)
+        elif journaled_key is not None and issue.get("key", journaled_key) == journaled_key:
+            issue["actual"] = verified_lut[journaled_key]
+            issue["key"] = journaled_key
+            issue["has_tracking_comment"] = issue["idx"] in journal[_JOURNAL_STEP_COMMENTED]
+            if not issue["has_tracking_comment"]:
+                tracked_issue = _request_issue_by_tracking_id(
+                    cfg, _make_tracking_id(tasks_data, issue))
+                issue["has_tracking_comment"] = (
+                    tracked_issue is not None and tracked_issue["key"] == journaled_key)
+            continue
+
         tracking_id = _make_tracking_id(tasks_data, issue)
         tracked_issue = _request_issue_by_tracking_id(cfg, tracking_id)
         key = issue.get("key")
@@ -230,9 +322,30 @@ def _process_epic_links(issues):
             issue["epic"]["link"]["key"] = issue_by_local_id[epic_idx]["key"]
 
 
-def _update_epics(cfg, issues):
+def _update_epics(cfg, issues, journal):
+    """Update name and color of given epics unless already done by one of the previous runs (for
+    the same epic, not the one it was re-created in place of)"""
     for issue in issues:
+        if journal[_JOURNAL_STEP_EPIC_UPDATED].get(issue["idx"]) == issue["key"]:
+            continue
+
         cjm.issue.request_epic_update(cfg, issue)
+        _record_step(journal, _JOURNAL_STEP_EPIC_UPDATED, idx=issue["idx"], key=issue["key"])
+
+
+def _create_links(cfg, links, journal):
+    """Create given issue links unless already done by one of the previous runs"""
+    for link in links:
+        if (link["inward"], link["outward"], link["type"]) in journal[_JOURNAL_STEP_LINKED]:
+            continue
+
+        cjm.issue.request_issue_link_create(cfg, link["inward"], link["outward"], link["type"])
+        _record_step(
+            journal, _JOURNAL_STEP_LINKED,
+            inward=link["inward"], outward=link["outward"], type=link["type"])
+        sys.stdout.write(
+            "Created link of type '{0:s}' between issues {1:s} and {2:s}\n"
+            "".format(link["type"], link["inward"], link["outward"]))
 
 
 def main(options):
@@ -247,13 +360,20 @@ def main(options):
     cfg["jira"]["issue"]["type"]["epic"] = "Epic"
     cfg["jira"]["issue"]["type"]["task"] = "Task"
 
+    cjm.store.update(cfg)
+
     # Load sprint data:
 
     tasks_data = cjm.data.load(cfg, options.tasks_file, "tasks.json")
 
+    journal_dir = (
+        os.path.dirname(os.path.abspath(options.tasks_file))
+        if options.journal_dir is None else options.journal_dir)
+    journal = _load_journal(cjm.journal.make_journal_path(journal_dir, tasks_data["set id"]))
+
     _verify_relation_links(cfg, tasks_data["tasks"])
 
-    _process_jira_state(cfg, tasks_data, tasks_data["tasks"])
+    _process_jira_state(cfg, tasks_data, tasks_data["tasks"], journal)
     issues = _process_issue_types(cfg, tasks_data["tasks"])
     _process_project_id(issues, _determine_project_id(cfg))
 
@@ -263,23 +383,20 @@ def main(options):
 
     _create_issues(
         cfg, tasks_data,
-        [i for i in issues if i["type name"] == cfg["jira"]["issue"]["type"]["epic"]])
+        [i for i in issues if i["type name"] == cfg["jira"]["issue"]["type"]["epic"]], journal)
     _update_epics(
-        cfg, [i for i in issues if i["type name"] == cfg["jira"]["issue"]["type"]["epic"]])
+        cfg, [i for i in issues if i["type name"] == cfg["jira"]["issue"]["type"]["epic"]],
+        journal)
     _process_epic_links(issues)
     _create_issues(
         cfg, tasks_data,
-        [i for i in issues if i["type name"] != cfg["jira"]["issue"]["type"]["epic"]])
+        [i for i in issues if i["type name"] != cfg["jira"]["issue"]["type"]["epic"]], journal)
 
     related_links = _extract_links(issues)
 
     #link_types = set(t["name"] for t in cjm.issue.request_issue_link_types(cfg)) # Use it to verify
 
-    for link in related_links:
-        cjm.issue.request_issue_link_create(cfg, link["inward"], link["outward"], link["type"])
-        sys.stdout.write(
-            "Created link of type '{0:s}' between issues {1:s} and {2:s}\n"
-            "".format(link["type"], link["inward"], link["outward"]))
+    _create_links(cfg, related_links, journal)
 
     return cjm.codes.NO_ERROR
 
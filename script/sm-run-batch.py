@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# SPDX-License-Identifier: MIT
+# Copyright (C) 2020-2021 Mobica Limited
+
+"""Command line script generating sprint data files and reports for multiple sprints at once"""
+
+# Standard library imports
+import concurrent.futures
+import json
+import os
+import sys
+
+# Third party imports
+import jsonschema
+import tabulate
+
+# Project imports
+import cjm
+import cjm.cfg
+import cjm.codes
+import cjm.data
+import cjm.invoke
+import cjm.request
+import cjm.run
+import cjm.schema
+import cjm.sprint
+
+
+_STEP_RESULT_DONE = "done"
+_STEP_RESULT_SKIPPED = "skipped"
+_STEP_RESULT_FAILED = "failed"
+
+# Step name, script name, data variant and the flag indicating if the step generates a report
+#  (the steps are always executed in this order):
+_STEPS = (
+    ("capacity", cjm.SM_CREATE_CAPACITY_FILE, "capacity", False),
+    ("commitment", cjm.SM_CREATE_COMMITMENT_FILE, "commitment", False),
+    ("delivery", cjm.SM_CREATE_DELIVERY_FILE, "delivery", False),
+    ("capacity-report", cjm.SM_GENERATE_CAPACITY_REPORT, "capacity", True),
+    ("commitment-report", cjm.SM_GENERATE_COMMITMENT_REPORT, "commitment", True),
+    ("delivery-report", cjm.SM_CREATE_GENERATE_DELIVERY_REPORT, "delivery", True))
+
+
+def parse_options(args, defaults):
+    """Parse command line options"""
+    parser = cjm.cfg.make_common_parser(defaults)
+
+    parser.add_argument(
+        "sprint_files", action="store", nargs="*", metavar="SPRINT_FILE",
+        help=(
+            "Path to the json sprint data file as generated by the {0:s} script and described by"
+            " the {1:s} schema"
+            "".format(cjm.SM_CREATE_SPRINT_FILE, cjm.schema.make_subpath("sprint.json"))))
+    parser.add_argument(
+        "--sprint-list", action="store", metavar="PATH", dest="sprint_list_path",
+        help=(
+            "PATH to a file listing the sprint data files to be processed (a json list or a text"
+            " file with one path per line, the paths are relative to the list file directory)."
+            " If neither this option nor the sprint files are given, the sprint list file"
+            " referenced by the {0:s} file is used".format(cjm.sprint.SPRINT_LIST_CONFIG_FILE)))
+    parser.add_argument(
+        "-s", "--step", action="append", dest="steps", choices=[s[0] for s in _STEPS],
+        required=True,
+        help=(
+            "Processing step to be executed for each sprint. Data file steps write the data files"
+            " referenced by the sprint data file. Report steps write the reports next to them"))
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, metavar="N", dest="jobs",
+        default=os.cpu_count(),
+        help="Number of sprints processed in parallel (default: {0:d})".format(os.cpu_count()))
+    parser.add_argument(
+        "--overwrite", action="store_true", dest="overwrite",
+        help=(
+            "Overwrite existing data files (they are skipped by default as they may contain"
+            " manual changes, e.g. personal holidays)"))
+
+    default_client_name = defaults.get("client", {}).get("name")
+    default_template_path = defaults.get("path", {}).get(
+        "report template",
+        os.path.join(cjm.cfg.make_default_data_path(), "odt", "report-template.odt"))
+
+    parser.add_argument(
+        "--client", action="store", metavar="NAME", dest="client_name",
+        default=default_client_name,
+        help="NAME of the client{0:s}".format(cjm.cfg.fmt_dft(default_client_name)))
+    parser.add_argument(
+        "--template", action="store", metavar="PATH", dest="template_path",
+        default=default_template_path,
+        help=(
+            "PATH to the report template file{0:s}"
+            "".format(cjm.cfg.fmt_dft(default_template_path))))
+    parser.add_argument(
+        "--author", action="store", metavar="NAME", dest="author_name",
+        help="NAME of the report author (default: full name of the jira user)")
+
+    return parser.parse_args(args)
+
+
+def _make_common_args(cfg, options):
+    """Compose common command line arguments passed to every script. Paths are made absolute as
+    the scripts are run in the sprint data file directories, so they don't see the defaults file
+    of the current directory"""
+    def __abs_path(path):
+        return None if path is None else os.path.abspath(path)
+
+    args = []
+
+    for arg_name, value in (
+            (cjm.cfg.SCHEME_ARG_NAME, cfg["jira"]["scheme"]),
+            (cjm.cfg.HOST_NAME_ARG_NAME, cfg["jira"]["host"]),
+            (cjm.cfg.USER_NAME_ARG_NAME, cfg["jira"]["user"]["name"]),
+            (cjm.cfg.USER_TOKEN_ARG_NAME, cfg["jira"]["user"]["token"]),
+            ("--data-dir", __abs_path(cfg["path"]["data"])),
+            ("--store", __abs_path(cfg["path"]["store"])),
+            ("--snapshot-dir", __abs_path(cfg["path"]["snapshots"])),
+            ("--week-system", cfg["calendar"]["week"]["system"])):
+        if value is not None:
+            args += [arg_name, value]
+
+    if options.verbose:
+        args.append("--verbose")
+
+    return args
+
+
+def _make_report_args(options):
+    """Compose command line arguments passed to the report generation scripts"""
+    args = []
+
+    for arg_name, value in (
+            ("--client", options.client_name),
+            ("--template", os.path.abspath(options.template_path)),
+            ("--author", options.author_name)):
+        if value is not None:
+            args += [arg_name, value]
+
+    return args
+
+
+def _write_data_file(file_path, data):
+    """Write given data file content. Never leave a partially written file behind"""
+    tmp_path = "{0:s}.tmp".format(file_path)
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as data_file:
+            data_file.write(data)
+        os.replace(tmp_path, file_path)
+    except IOError as e:
+        sys.stderr.write("ERROR: Data file ('{0:s}') I/O error\n".format(file_path))
+        sys.stderr.write("    {0}\n".format(e))
+        return cjm.codes.FILESYSTEM_ERROR
+
+    return cjm.codes.NO_ERROR
+
+
+def _run_step(cfg, sprint_data, sprint_path, step, batch):
+    """Run single processing step. Return the result, exit code and output file path"""
+    _, script_name, variant, is_report = step
+
+    if is_report:
+        output_path = cjm.data.make_default_file_name(
+            cfg, sprint_data, "{0:s}_report".format(variant), "odt")
+        code, _ = cjm.invoke.run_script(
+            script_name,
+            batch["common args"] + batch["report args"] + ["-o", output_path, sprint_path])
+    else:
+        output_path = cfg["path"][variant]
+
+        if os.path.exists(output_path) and not batch["overwrite"]:
+            return _STEP_RESULT_SKIPPED, cjm.codes.NO_ERROR, os.path.abspath(output_path)
+
+        code, output = cjm.invoke.run_script(
+            script_name, batch["common args"] + ["--json-output", sprint_path])
+
+        if code == cjm.codes.NO_ERROR:
+            code = _write_data_file(output_path, output)
+
+    return (
+        _STEP_RESULT_DONE if code == cjm.codes.NO_ERROR else _STEP_RESULT_FAILED,
+        code, os.path.abspath(output_path))
+
+
+def _process_sprint(sprint_path, step_names, batch):
+    """Run the requested steps for given sprint in the sprint data file directory. Stop at the
+    first failed step. Return the list of step results. The batch dict holds the "common args",
+    "report args" and the "overwrite" flag"""
+    results = []
+    cwd = os.getcwd()
+
+    def __add_result(step_name, result, code, output_path):
+        results.append({
+            "sprint file": sprint_path, "step": step_name, "result": result, "code": code,
+            "output file": output_path})
+
+    try:
+        os.chdir(os.path.dirname(sprint_path))
+
+        defaults = cjm.cfg.load_defaults()
+        options = cjm.cfg.make_common_parser(defaults).parse_args(batch["common args"])
+        cfg = cjm.cfg.apply_options(
+            cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+        sprint_data = cjm.data.load(cfg, sprint_path, "sprint.json")
+        cjm.sprint.apply_data_file_paths(cfg, sprint_data)
+
+        # Responses related to one sprint are not reused by the other ones:
+        with cjm.request.memo_scope():
+            for step in [s for s in _STEPS if s[0] in step_names]:
+                result, code, output_path = _run_step(cfg, sprint_data, sprint_path, step, batch)
+                __add_result(step[0], result, code, output_path)
+
+                if result == _STEP_RESULT_FAILED:
+                    break
+    except cjm.codes.CjmError as e:
+        __add_result(None, _STEP_RESULT_FAILED, e.code, None)
+    except jsonschema.exceptions.ValidationError as e:
+        sys.stderr.write(
+            "ERROR: Sprint data file ('{0:s}') validation error\n".format(sprint_path))
+        sys.stderr.write("    {0:s}\n".format(e.message))
+        __add_result(None, _STEP_RESULT_FAILED, cjm.codes.INPUT_DATA_ERROR, None)
+    finally:
+        os.chdir(cwd)
+
+    return results
+
+
+def main(options, defaults):
+    """Entry function"""
+    cfg = cjm.cfg.apply_options(cjm.cfg.apply_config(cjm.cfg.init_defaults(), defaults), options)
+
+    sprint_paths = list(options.sprint_files)
+
+    sprint_list_path = options.sprint_list_path
+
+    if sprint_list_path is None and not sprint_paths:
+        sprint_list_path = cjm.sprint.find_config_sprint_list()
+
+    if sprint_list_path is not None:
+        sprint_paths += cjm.sprint.load_sprint_list(sprint_list_path)
+
+    if not sprint_paths:
+        sys.stderr.write(
+            "ERROR: No sprint data files specified. Use the positional arguments, the"
+            " '--sprint-list' option or the {0:s} file to specify them\n"
+            "".format(cjm.sprint.SPRINT_LIST_CONFIG_FILE))
+        return cjm.codes.INVALID_ARGUMENT_ERROR
+
+    sprint_paths = [os.path.abspath(p) for p in sprint_paths]
+    batch = {
+        "common args": _make_common_args(cfg, options),
+        "report args": _make_report_args(options),
+        "overwrite": options.overwrite
+    }
+
+    # Every worker process keeps its own request session and caches and reuses them for all the
+    #  sprints it processes:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(options.jobs, 1)) as executor:
+        futures = [
+            executor.submit(_process_sprint, p, options.steps, batch) for p in sprint_paths]
+        results = [r for f in futures for r in f.result()]
+
+    if options.json_output:
+        print(json.dumps(results, indent=4, sort_keys=False))
+    else:
+        print(tabulate.tabulate(
+            [(os.path.relpath(r["sprint file"]), r["step"] or "", r["result"], r["code"],
+              "" if r["output file"] is None else r["output file"])
+             for r in results],
+            headers=["Sprint File", "Step", "Result", "Code", "Output File"], tablefmt="orgtbl"))
+
+    failed = [r for r in results if r["result"] == _STEP_RESULT_FAILED]
+
+    return failed[0]["code"] if failed else cjm.codes.NO_ERROR
+
+
+if __name__ == "__main__":
+    cjm.run.run_2(main, parse_options)